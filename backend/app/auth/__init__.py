@@ -2,6 +2,7 @@ from app.auth.jwt import (
     SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    PASSWORD_HASH_WORKERS,
     verify_password,
     get_password_hash,
     authenticate_user,
@@ -9,12 +10,27 @@ from app.auth.jwt import (
     get_current_user,
     require_admin,
     oauth2_scheme,
+    optional_oauth2_scheme,
+    token_cache,
+    revoked_tokens,
+    revoke_token,
+)
+from app.auth.rate_limit import (
+    RateLimit,
+    TokenBucketLimiter,
+    MemoryTokenBucketLimiter,
+    SQLiteTokenBucketLimiter,
+    create_limiter,
+    check_login_rate,
+    client_ip,
+    login_limiter,
 )
 
 __all__ = [
     "SECRET_KEY",
     "ALGORITHM",
     "ACCESS_TOKEN_EXPIRE_MINUTES",
+    "PASSWORD_HASH_WORKERS",
     "verify_password",
     "get_password_hash",
     "authenticate_user",
@@ -22,4 +38,16 @@ __all__ = [
     "get_current_user",
     "require_admin",
     "oauth2_scheme",
+    "optional_oauth2_scheme",
+    "token_cache",
+    "revoked_tokens",
+    "revoke_token",
+    "RateLimit",
+    "TokenBucketLimiter",
+    "MemoryTokenBucketLimiter",
+    "SQLiteTokenBucketLimiter",
+    "create_limiter",
+    "check_login_rate",
+    "client_ip",
+    "login_limiter",
 ]
@@ -1,4 +1,8 @@
+import asyncio
+import hashlib
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
@@ -9,6 +13,7 @@ from jwt.exceptions import InvalidTokenError
 from pwdlib import PasswordHash
 
 from app.models import TokenData
+from app.services.cache import TTLCache
 
 # Configuration from environment variables
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production-use-openssl-rand-hex-32")
@@ -18,15 +23,49 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 # Password hasher
 password_hash = PasswordHash.recommended()
 
-# Hardcoded admin user (as per requirements)
-# Password: admin123 (hashed with Argon2)
+# Argon2 runs in a small dedicated thread pool (argon2-cffi releases the GIL)
+# so logins never block the event loop; the pool size caps how many hashes
+# run at once, further logins queue for a free worker
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+# Argon2 hash of the default password "admin123", precomputed so that
+# importing this module doesn't cost a hash
+_DEFAULT_ADMIN_PASSWORD_HASH = (
+    "$argon2id$v=19$m=65536,t=3,p=4$DVkRE5heXFwlk5xDcxezkw$"
+    "kwcd6ic7nolaLDTp16RY/kmzGaAr1CjyM+KEG8SufWI"
+)
+
+# Admin credentials from configuration. ADMIN_PASSWORD_HASH (an Argon2 hash)
+# is preferred; a plain ADMIN_PASSWORD is hashed once, off the event loop, on
+# the first login.
 ADMIN_USER = {
-    "username": "admin",
-    "hashed_password": password_hash.hash("admin123"),
+    "username": os.getenv("ADMIN_USERNAME", "admin"),
+    "hashed_password": os.getenv("ADMIN_PASSWORD_HASH") or None,
     "role": "admin"
 }
+_ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
+if ADMIN_USER["hashed_password"] is None and not _ADMIN_PASSWORD:
+    ADMIN_USER["hashed_password"] = _DEFAULT_ADMIN_PASSWORD_HASH
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+# Same scheme for endpoints where a token is optional (logout)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+# Verified tokens by SHA-256 digest, so repeated requests with the same token
+# skip the signature check and claim parsing; entries expire with the token
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "4096"))
+token_cache = TTLCache(
+    max_entries=TOKEN_CACHE_MAX_ENTRIES, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+# Tokens revoked by /api/auth/logout (digest -> exp), kept until they expire
+# anyway. The list is per process; set TOKEN_REVOCATION=0 to keep logout
+# client-side only.
+TOKEN_REVOCATION = os.getenv("TOKEN_REVOCATION", "1").lower() not in ("0", "false", "no")
+revoked_tokens: dict[bytes, float] = {}
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -39,11 +78,27 @@ def get_password_hash(password: str) -> str:
     return password_hash.hash(password)
 
 
-def authenticate_user(username: str, password: str) -> dict | None:
-    """Authenticate user against hardcoded admin credentials."""
+async def _run_hasher(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+
+
+async def _admin_password_hash() -> str:
+    if ADMIN_USER["hashed_password"] is None:
+        ADMIN_USER["hashed_password"] = await _run_hasher(get_password_hash, _ADMIN_PASSWORD)
+    return ADMIN_USER["hashed_password"]
+
+
+async def authenticate_user(username: str, password: str) -> dict | None:
+    """
+    Authenticate user against the configured admin credentials.
+
+    The Argon2 verification runs in the password hashing pool, so the
+    event loop keeps serving other requests meanwhile.
+    """
     if username != ADMIN_USER["username"]:
         return None
-    if not verify_password(password, ADMIN_USER["hashed_password"]):
+    hashed_password = await _admin_password_hash()
+    if not await _run_hasher(verify_password, password, hashed_password):
         return None
     return ADMIN_USER
 
@@ -59,22 +114,64 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def revoke_token(token: str) -> bool:
+    """
+    Reject a token from now on, until it expires.
+
+    Returns False (and revokes nothing) for tokens that aren't valid, so
+    the revocation list only ever holds tokens this server issued.
+    """
+    if not TOKEN_REVOCATION:
+        return False
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except InvalidTokenError:
+        return False
+    now = time.time()
+    for digest, expires_at in list(revoked_tokens.items()):
+        if expires_at <= now:
+            del revoked_tokens[digest]
+    digest = token_digest(token)
+    # Tokens without an exp never expire, so neither does their revocation
+    revoked_tokens[digest] = payload.get("exp", float("inf"))
+    token_cache.delete(digest)
+    return True
+
+
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenData:
-    """Dependency to validate JWT token and extract user data."""
+    """
+    Dependency to validate JWT token and extract user data.
+
+    Verified tokens are served from token_cache until they expire.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    digest = token_digest(token)
+    if digest in revoked_tokens:
+        raise credentials_exception
+    user = token_cache.get(digest)
+    if user is not None:
+        return user
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         role: str = payload.get("role")
         if username is None:
             raise credentials_exception
-        return TokenData(username=username, role=role)
     except InvalidTokenError:
         raise credentials_exception
+    user = TokenData(username=username, role=role)
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        token_cache.set(digest, user, ttl=min(expires_at - time.time(), token_cache.ttl))
+    return user
 
 
 async def require_admin(
@@ -0,0 +1,284 @@
+import ipaddress
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from fastapi import Request
+
+from app.database import run_write
+
+# Which store the login throttle keeps its buckets in: "memory" (per
+# process), "sqlite" (shared by every worker using the database) or "off"
+LOGIN_RATE_LIMIT_BACKEND = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory").lower()
+# Attempts allowed in a burst, and how many more are allowed per minute
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "10"))
+LOGIN_USERNAME_BURST = int(os.getenv("LOGIN_USERNAME_BURST", "10"))
+LOGIN_USERNAME_PER_MINUTE = float(os.getenv("LOGIN_USERNAME_PER_MINUTE", "5"))
+# How often buckets that have refilled completely are dropped
+RATE_LIMIT_SWEEP_SECONDS = float(os.getenv("RATE_LIMIT_SWEEP_SECONDS", "60"))
+# Most buckets kept in memory; the oldest go first beyond that
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Addresses or networks (comma-separated) of proxies allowed to pass on the
+# client IP, e.g. the frontend server that calls /api/auth/login for users.
+# Only list a proxy that sets the header itself rather than relaying the
+# browser's, or clients can pick a fresh throttle bucket on every attempt
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+# Header those proxies put the client IP in: X-Forwarded-For or X-Real-IP
+FORWARDED_IP_HEADER = os.getenv("FORWARDED_IP_HEADER", "X-Forwarded-For")
+
+RATE_LIMIT_TABLE = "rate_limit_bucket"
+
+
+def parse_proxies(value: str) -> tuple:
+    """Parse a comma-separated list of IPs and CIDR networks, or raise ValueError."""
+    return tuple(
+        ipaddress.ip_network(item.strip(), strict=False)
+        for item in value.split(",") if item.strip()
+    )
+
+
+trusted_proxies = parse_proxies(TRUSTED_PROXIES)
+
+
+def _is_trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in trusted_proxies)
+
+
+def client_ip(request: Request) -> str | None:
+    """
+    The IP a request came from, for throttling.
+
+    That is the peer address, unless the peer is a trusted proxy: then the
+    FORWARDED_IP_HEADER is read right to left, skipping further trusted
+    proxies, and the first other address is the client. Hops left of it
+    were supplied by the client and can't be trusted. A missing or
+    malformed header falls back to the peer address.
+    """
+    peer = request.client.host if request.client else None
+    if peer is None or not _is_trusted(peer):
+        return peer
+    forwarded = request.headers.get(FORWARDED_IP_HEADER)
+    if not forwarded:
+        return peer
+    client = peer
+    for hop in reversed(forwarded.split(",")):
+        hop = hop.strip()
+        try:
+            ipaddress.ip_address(hop)
+        except ValueError:
+            break
+        client = hop
+        if not _is_trusted(hop):
+            break
+    return client
+
+
+class RateLimit:
+    """
+    A token bucket: `burst` tokens, refilled at `per_minute` tokens a minute.
+
+    Buckets are stored as the time at which they will be full again (the
+    generic cell rate algorithm), a single float per key: a request is
+    allowed while that time is at most `tolerance` seconds ahead, and
+    taking a token pushes it `interval` seconds further. A bucket whose
+    time has passed is full, which is the same as not storing it at all.
+    """
+
+    def __init__(self, burst: int, per_minute: float):
+        self.burst = burst
+        self.per_minute = per_minute
+        self.interval = 60.0 / per_minute
+        self.tolerance = (burst - 1) * self.interval
+
+
+class TokenBucketLimiter(ABC):
+    """Base class for rate limiter stores."""
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """
+        Take a token from the key's bucket.
+
+        Returns 0.0 if the request is allowed, otherwise the seconds until a
+        token is available. Rejected requests don't use up tokens.
+        """
+
+    @abstractmethod
+    async def reset(self) -> None:
+        """Forget every bucket."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class NoRateLimiter(TokenBucketLimiter):
+    """Allows everything (LOGIN_RATE_LIMIT_BACKEND=off)."""
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        return 0.0
+
+    async def reset(self) -> None:
+        pass
+
+
+class MemoryTokenBucketLimiter(TokenBucketLimiter):
+    """
+    Buckets held in a dict of key -> full-again time, in this process only.
+
+    Full buckets are swept out every sweep_seconds, and at most max_keys are
+    kept, dropping the least recently inserted ones first.
+    """
+
+    def __init__(
+        self,
+        sweep_seconds: float = RATE_LIMIT_SWEEP_SECONDS,
+        max_keys: int = RATE_LIMIT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.sweep_seconds = sweep_seconds
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: dict[str, float] = {}
+        self._next_sweep = clock() + sweep_seconds
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        now = self._clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        full_at = self._buckets.get(key, now)
+        wait = full_at - now - limit.tolerance
+        if wait > 0:
+            self.rejected += 1
+            return wait
+        self.allowed += 1
+        if key not in self._buckets and len(self._buckets) >= self.max_keys:
+            del self._buckets[next(iter(self._buckets))]
+            self.evictions += 1
+        self._buckets[key] = max(full_at, now) + limit.interval
+        return 0.0
+
+    def _sweep(self, now: float) -> None:
+        full = [key for key, full_at in self._buckets.items() if full_at <= now]
+        for key in full:
+            del self._buckets[key]
+        self.evictions += len(full)
+        self._next_sweep = now + self.sweep_seconds
+
+    async def reset(self) -> None:
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "buckets": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+
+class SQLiteTokenBucketLimiter(TokenBucketLimiter):
+    """
+    Buckets stored in the rate_limit_bucket table, shared by every process.
+
+    Taking a token is a single conditional upsert, so concurrent workers
+    can't both take the last one. Full buckets are deleted every
+    sweep_seconds by whichever request comes along.
+    """
+
+    def __init__(
+        self,
+        sweep_seconds: float = RATE_LIMIT_SWEEP_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.sweep_seconds = sweep_seconds
+        self._clock = clock
+        self._next_sweep = clock() + sweep_seconds
+        self.allowed = 0
+        self.rejected = 0
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        now = self._clock()
+        sweep = now >= self._next_sweep
+        if sweep:
+            self._next_sweep = now + self.sweep_seconds
+
+        async def job(db):
+            if sweep:
+                await db.execute(f"DELETE FROM {RATE_LIMIT_TABLE} WHERE full_at <= ?", (now,))
+            cursor = await db.execute(
+                f"""
+                INSERT INTO {RATE_LIMIT_TABLE} (key, full_at) VALUES (:key, :now + :interval)
+                ON CONFLICT(key) DO UPDATE SET full_at = MAX(full_at, :now) + :interval
+                WHERE full_at - :now <= :tolerance
+                RETURNING full_at
+                """,
+                {"key": key, "now": now, "interval": limit.interval, "tolerance": limit.tolerance},
+            )
+            if await cursor.fetchone() is not None:
+                return 0.0
+            cursor = await db.execute(
+                f"SELECT full_at FROM {RATE_LIMIT_TABLE} WHERE key = ?", (key,)
+            )
+            row = await cursor.fetchone()
+            return max(row[0] - now - limit.tolerance, 0.0)
+
+        wait = await run_write(job)
+        if wait > 0:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    async def reset(self) -> None:
+        async def job(db):
+            await db.execute(f"DELETE FROM {RATE_LIMIT_TABLE}")
+
+        await run_write(job)
+
+    def stats(self) -> dict:
+        return {"backend": "sqlite", "allowed": self.allowed, "rejected": self.rejected}
+
+
+def create_limiter(backend: str = LOGIN_RATE_LIMIT_BACKEND) -> TokenBucketLimiter:
+    if backend == "off":
+        return NoRateLimiter()
+    if backend == "sqlite":
+        return SQLiteTokenBucketLimiter()
+    if backend == "memory":
+        return MemoryTokenBucketLimiter()
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+LOGIN_IP_LIMIT = RateLimit(LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE)
+LOGIN_USERNAME_LIMIT = RateLimit(LOGIN_USERNAME_BURST, LOGIN_USERNAME_PER_MINUTE)
+login_limiter = create_limiter()
+
+
+async def check_login_rate(client_ip: str | None, username: str) -> int:
+    """
+    Throttle a login attempt by client IP, then by username.
+
+    Returns 0 if the attempt may go ahead, otherwise the whole seconds to
+    wait (for Retry-After). Called before any password hashing.
+    """
+    if client_ip:
+        wait = await login_limiter.acquire(f"ip:{client_ip}", LOGIN_IP_LIMIT)
+        if wait > 0:
+            return math.ceil(wait)
+    wait = await login_limiter.acquire(f"user:{username.strip().lower()}", LOGIN_USERNAME_LIMIT)
+    return math.ceil(wait)
@@ -1,30 +1,879 @@
+import asyncio
 import os
+import re
+import sqlite3
+import time
 import aiosqlite
+from collections import deque
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Awaitable, Callable, TypeVar
 
 DATABASE_PATH = Path(os.getenv("DATABASE_PATH", "/data/sqlite3.db"))
 
+# Connection pool sizing (readers are cheap, SQLite allows a single writer)
+DB_POOL_MAX_READERS = int(os.getenv("DB_POOL_MAX_READERS", "8"))
+DB_POOL_MAX_WRITERS = int(os.getenv("DB_POOL_MAX_WRITERS", "1"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10"))
 
-@asynccontextmanager
-async def get_db():
-    """Async context manager for database connections."""
+# Writes are funneled through a single writer task and group-committed
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "64"))
+
+T = TypeVar("T")
+
+
+def _choice(name: str, default: str, allowed: set[str]) -> str:
+    value = os.getenv(name, default).upper()
+    if value not in allowed:
+        raise ValueError(f"{name} must be one of {sorted(allowed)}, got {value!r}")
+    return value
+
+
+# Storage profile (see https://www.sqlite.org/pragma.html)
+STORAGE_PROFILE = {
+    "journal_mode": _choice(
+        "SQLITE_JOURNAL_MODE", "WAL",
+        {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY"},
+    ),
+    "synchronous": _choice(
+        "SQLITE_SYNCHRONOUS", "NORMAL", {"OFF", "NORMAL", "FULL", "EXTRA"}
+    ),
+    # Negative values are KiB, so -20000 is ~20 MB of page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-20000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": _choice("SQLITE_TEMP_STORE", "MEMORY", {"DEFAULT", "FILE", "MEMORY"}),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+}
+
+
+async def _connect(readonly: bool = False) -> aiosqlite.Connection:
+    """Open a connection and apply the per-connection PRAGMAs."""
     db = await aiosqlite.connect(DATABASE_PATH)
     db.row_factory = aiosqlite.Row
+    # Wait on locks instead of failing immediately with "database is locked"
+    await db.execute(f"PRAGMA busy_timeout = {STORAGE_PROFILE['busy_timeout']}")
     # Enable foreign key support for cascading deletes
     await db.execute("PRAGMA foreign_keys = ON")
+    await db.execute(f"PRAGMA synchronous = {STORAGE_PROFILE['synchronous']}")
+    await db.execute(f"PRAGMA cache_size = {STORAGE_PROFILE['cache_size']}")
+    await db.execute(f"PRAGMA mmap_size = {STORAGE_PROFILE['mmap_size']}")
+    await db.execute(f"PRAGMA temp_store = {STORAGE_PROFILE['temp_store']}")
+    if readonly:
+        await db.execute("PRAGMA query_only = ON")
+    return db
+
+
+class _Lane:
+    """A bounded set of interchangeable connections (all readers or all writers)."""
+
+    def __init__(self, name: str, size: int, readonly: bool):
+        self.name = name
+        self.size = size
+        self.readonly = readonly
+        self.idle: list[aiosqlite.Connection] = []
+        self.slots = asyncio.Semaphore(size)
+        self.opened = 0
+        self.in_use = 0
+        self.acquired = 0
+        self.reused = 0
+        self.discarded = 0
+        self.wait_seconds = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "open": self.opened,
+            "idle": len(self.idle),
+            "in_use": self.in_use,
+            "acquired": self.acquired,
+            "reused": self.reused,
+            "discarded": self.discarded,
+            "wait_seconds": round(self.wait_seconds, 6),
+        }
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections.
+
+    Readers and writers are kept in separate lanes so that reads never queue
+    behind the single writer. Connections are health-checked when handed out
+    and PRAGMAs are applied only once, when a connection is first opened.
+    """
+
+    def __init__(
+        self,
+        max_readers: int = DB_POOL_MAX_READERS,
+        max_writers: int = DB_POOL_MAX_WRITERS,
+        acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT,
+    ):
+        self.acquire_timeout = acquire_timeout
+        self._lanes = {
+            True: _Lane("readers", max_readers, readonly=True),
+            False: _Lane("writers", max_writers, readonly=False),
+        }
+        self._closed = False
+
+    async def _checkout(self, lane: _Lane) -> aiosqlite.Connection:
+        """Hand out a healthy connection from the lane, opening one if needed."""
+        while lane.idle:
+            db = lane.idle.pop()
+            try:
+                await db.execute("SELECT 1")
+            except Exception:
+                lane.discarded += 1
+                lane.opened -= 1
+                await _close_quietly(db)
+                continue
+            lane.reused += 1
+            return db
+        db = await _connect(readonly=lane.readonly)
+        lane.opened += 1
+        return db
+
+    async def _checkin(self, lane: _Lane, db: aiosqlite.Connection) -> None:
+        """Return a connection to the lane, discarding it if it is unusable."""
+        try:
+            if db.in_transaction:
+                await db.rollback()
+        except Exception:
+            lane.discarded += 1
+            lane.opened -= 1
+            await _close_quietly(db)
+            return
+        if self._closed:
+            lane.opened -= 1
+            await _close_quietly(db)
+            return
+        lane.idle.append(db)
+
+    @asynccontextmanager
+    async def connection(self, readonly: bool = False):
+        """Borrow a connection from the reader or writer lane."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        lane = self._lanes[readonly]
+        started = time.perf_counter()
+        await asyncio.wait_for(lane.slots.acquire(), timeout=self.acquire_timeout)
+        lane.wait_seconds += time.perf_counter() - started
+        try:
+            db = await self._checkout(lane)
+        except BaseException:
+            lane.slots.release()
+            raise
+        lane.acquired += 1
+        lane.in_use += 1
+        try:
+            yield db
+        finally:
+            lane.in_use -= 1
+            try:
+                await self._checkin(lane, db)
+            finally:
+                lane.slots.release()
+
+    async def close(self) -> None:
+        """Close every idle connection; in-use connections close on return."""
+        self._closed = True
+        for lane in self._lanes.values():
+            while lane.idle:
+                lane.opened -= 1
+                await _close_quietly(lane.idle.pop())
+
+    def stats(self) -> dict:
+        """Return connection usage counters for each lane."""
+        return {lane.name: lane.stats() for lane in self._lanes.values()}
+
+
+async def _close_quietly(db: aiosqlite.Connection) -> None:
+    try:
+        await db.close()
+    except Exception:
+        pass
+
+
+_pool: ConnectionPool | None = None
+
+
+def get_pool() -> ConnectionPool | None:
+    """Return the application connection pool, if one has been opened."""
+    return _pool
+
+
+async def open_pool(**kwargs) -> ConnectionPool:
+    """Create the application connection pool (called from the app lifespan)."""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(**kwargs)
+    return _pool
+
+
+async def close_pool() -> None:
+    """Close the application connection pool."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+class WriteQueue:
+    """
+    Single writer task that serializes and group-commits database writes.
+
+    Each submitted job is an async callable that receives the writer
+    connection. Jobs that are queued together run in one transaction, each
+    inside its own savepoint, so a failing job is rolled back on its own and
+    its exception is re-raised to the caller without affecting the others.
+    Jobs must not commit themselves.
+    """
+
+    def __init__(self, max_batch: int = DB_WRITE_BATCH_SIZE):
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self.submitted = 0
+        self.batches = 0
+        self.failed = 0
+        self.largest_batch = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Drain queued jobs and stop the writer task."""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+    async def submit(self, job: Callable[[aiosqlite.Connection], Awaitable[T]]) -> T:
+        """Queue a write job and wait for its transaction to commit."""
+        future = asyncio.get_running_loop().create_future()
+        self.submitted += 1
+        await self._queue.put((job, future))
+        return await future
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch: list) -> None:
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        outcomes = []
+        try:
+            async with get_db() as db:
+                await db.execute("BEGIN IMMEDIATE")
+                for job, future in batch:
+                    if future.done():
+                        # Caller went away before the job ran
+                        continue
+                    await db.execute("SAVEPOINT write_job")
+                    try:
+                        result = await job(db)
+                    except Exception as exc:
+                        await db.execute("ROLLBACK TO write_job")
+                        await db.execute("RELEASE write_job")
+                        outcomes.append((future, None, exc))
+                    else:
+                        await db.execute("RELEASE write_job")
+                        outcomes.append((future, result, None))
+                await db.commit()
+        except Exception as exc:
+            self.failed += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                self.failed += 1
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "failed": self.failed,
+            "largest_batch": self.largest_batch,
+        }
+
+
+_write_queue: WriteQueue | None = None
+
+
+def get_write_queue() -> WriteQueue | None:
+    """Return the application write queue, if it is running."""
+    return _write_queue
+
+
+async def start_write_queue(**kwargs) -> WriteQueue:
+    """Start the single writer task (called from the app lifespan)."""
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteQueue(**kwargs)
+        _write_queue.start()
+    return _write_queue
+
+
+async def stop_write_queue() -> None:
+    """Flush pending writes and stop the writer task."""
+    global _write_queue
+    if _write_queue is not None:
+        queue, _write_queue = _write_queue, None
+        await queue.stop()
+
+
+async def run_write(job: Callable[[aiosqlite.Connection], Awaitable[T]]) -> T:
+    """
+    Run an INSERT/UPDATE/DELETE job and commit it.
+
+    Goes through the writer queue when the app has one running, otherwise
+    runs the job on a writer connection and commits directly.
+    """
+    if _write_queue is not None:
+        return await _write_queue.submit(job)
+
+    async with get_db() as db:
+        result = await job(db)
+        await db.commit()
+        return result
+
+
+class QueryStats:
+    """SQL statements run, and the time spent in them, for one request."""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by the metrics middleware around each request; get_db then counts
+# the statements run on its connections into it
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+# Statement tracing (off by default): every statement run through get_db is
+# recorded in a ring buffer, with its plan when slower than the threshold
+DB_QUERY_TRACE = os.getenv("DB_QUERY_TRACE", "0").lower() not in ("0", "false", "no")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+DB_QUERY_TRACE_BUFFER = int(os.getenv("DB_QUERY_TRACE_BUFFER", "500"))
+
+_SQL_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_SPACE = re.compile(r"\s+")
+# Statements worth an EXPLAIN QUERY PLAN when slow
+_PLANNABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def fingerprint_sql(sql: str) -> str:
+    """
+    Normalize a statement so that runs differing only in values group together.
+
+    Comments and extra whitespace are dropped, literals become ? and
+    placeholder lists such as IN (?, ?, ?) become (...).
+    """
+    sql = _SQL_COMMENTS.sub(" ", sql)
+    sql = _SQL_LITERALS.sub("?", sql)
+    sql = _SQL_LISTS.sub("(...)", sql)
+    return _SQL_SPACE.sub(" ", sql).strip()
+
+
+class QueryTracer:
+    """
+    Ring buffer of the most recent statements run through get_db.
+
+    Each entry has the statement's fingerprint, time spent executing and
+    fetching, and rows fetched. Statements slower than slow_ms also get
+    their EXPLAIN QUERY PLAN, run once on the same connection.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = DB_QUERY_TRACE,
+        slow_ms: float = DB_SLOW_QUERY_MS,
+        max_entries: int = DB_QUERY_TRACE_BUFFER,
+    ):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.entries: deque[dict] = deque(maxlen=max_entries)
+        self.traced = 0
+        self.slow = 0
+
+    def record(self, sql: str, seconds: float) -> dict:
+        entry = {
+            "at": time.time(),
+            "fingerprint": fingerprint_sql(sql),
+            "sql": sql.strip(),
+            "duration_ms": seconds * 1000,
+            "rows": 0,
+            "slow": False,
+            "plan": None,
+        }
+        self.entries.append(entry)
+        self.traced += 1
+        return entry
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def fingerprints(self, entries: list[dict]) -> list[dict]:
+        """Entries grouped by fingerprint, most total time first."""
+        groups: dict[str, dict] = {}
+        for entry in entries:
+            group = groups.get(entry["fingerprint"])
+            if group is None:
+                group = groups[entry["fingerprint"]] = {
+                    "fingerprint": entry["fingerprint"],
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "rows": 0,
+                    "slow": 0,
+                }
+            group["calls"] += 1
+            group["total_ms"] += entry["duration_ms"]
+            group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+            group["rows"] += entry["rows"]
+            group["slow"] += entry["slow"]
+        return sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)
+
+
+query_tracer = QueryTracer()
+
+
+class _TracedCursor:
+    """A cursor that adds fetched rows and fetch time to its trace entry."""
+
+    def __init__(self, cursor: aiosqlite.Cursor, connection, entry: dict, sql: str, parameters):
+        self._cursor = cursor
+        self._connection = connection
+        self._entry = entry
+        self._sql = sql
+        self._parameters = parameters
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def _fetch(self, call, *args):
+        started = time.perf_counter()
+        result = await call(*args)
+        self._entry["duration_ms"] += (time.perf_counter() - started) * 1000
+        if isinstance(result, list):
+            self._entry["rows"] += len(result)
+        elif result is not None:
+            self._entry["rows"] += 1
+        await self._connection._check_slow(self._entry, self._sql, self._parameters)
+        return result
+
+    async def fetchone(self):
+        return await self._fetch(self._cursor.fetchone)
+
+    async def fetchmany(self, size: int | None = None):
+        return await self._fetch(self._cursor.fetchmany, size)
+
+    async def fetchall(self):
+        return await self._fetch(self._cursor.fetchall)
+
+    async def __aiter__(self):
+        while True:
+            rows = await self.fetchmany(self._cursor.arraysize)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+
+class _InstrumentedConnection:
+    """
+    A connection that counts statements into a QueryStats and/or traces
+    them into a QueryTracer; everything else goes to the connection.
+    """
+
+    def __init__(
+        self,
+        db: aiosqlite.Connection,
+        stats: QueryStats | None,
+        tracer: QueryTracer | None,
+    ):
+        self._db = db
+        self._stats = stats
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    async def _run(self, call, sql: str, *args, single: bool = False):
+        started = time.perf_counter()
+        try:
+            result = await call(sql, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            if self._stats is not None:
+                self._stats.queries += 1
+                self._stats.seconds += elapsed
+        if self._tracer is None:
+            return result
+        return await self._trace(sql, args, elapsed, result, single)
+
+    async def _trace(self, sql: str, args: tuple, elapsed: float, cursor, single: bool):
+        entry = self._tracer.record(sql, elapsed)
+        if not single:
+            # executemany/executescript: report what was changed, never plan
+            entry["rows"] = max(getattr(cursor, "rowcount", 0), 0)
+            return cursor
+        parameters = args[0] if args else None
+        await self._check_slow(entry, sql, parameters)
+        return _TracedCursor(cursor, self, entry, sql, parameters)
+
+    async def _check_slow(self, entry: dict, sql: str, parameters) -> None:
+        tracer = self._tracer
+        if entry["slow"] or entry["duration_ms"] < tracer.slow_ms:
+            return
+        entry["slow"] = True
+        tracer.slow += 1
+        if not sql.lstrip().upper().startswith(_PLANNABLE):
+            return
+        try:
+            cursor = await self._db.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+            entry["plan"] = [row[3] for row in await cursor.fetchall()]
+        except Exception as exc:
+            entry["plan"] = [f"EXPLAIN QUERY PLAN failed: {exc}"]
+
+    async def execute(self, sql: str, parameters=None):
+        return await self._run(self._db.execute, sql, parameters, single=True)
+
+    async def executemany(self, sql: str, parameters):
+        return await self._run(self._db.executemany, sql, parameters)
+
+    async def executescript(self, sql_script: str):
+        return await self._run(self._db.executescript, sql_script)
+
+
+def _instrument(db: aiosqlite.Connection):
+    stats = query_stats.get()
+    tracer = query_tracer if query_tracer.enabled else None
+    if stats is None and tracer is None:
+        return db
+    return _InstrumentedConnection(db, stats, tracer)
+
+
+@asynccontextmanager
+async def get_db(readonly: bool = False):
+    """
+    Async context manager for database connections.
+
+    Borrows a warm connection from the pool when the app has one open, and
+    falls back to a short-lived connection otherwise (scripts, tests).
+    Inside a request, statements are counted for the metrics endpoint, and
+    every statement is traced while query_tracer is enabled.
+    """
+    if _pool is not None:
+        async with _pool.connection(readonly=readonly) as db:
+            yield _instrument(db)
+        return
+
+    db = await _connect(readonly=readonly)
     try:
-        yield db
+        yield _instrument(db)
     finally:
         await db.close()
 
 
+# Marks the tables derived from campaign_kpi (rollups, running totals) as
+# possibly stale: set in the same transaction that drops their triggers
+DERIVED_TABLES_DIRTY = "derived_tables_dirty"
+
+
+async def get_flag(db: aiosqlite.Connection, name: str) -> bool:
+    cursor = await db.execute("SELECT 1 FROM maintenance_flag WHERE name = ?", (name,))
+    return await cursor.fetchone() is not None
+
+
+async def set_flag(db: aiosqlite.Connection, name: str) -> None:
+    """Set a maintenance flag (does not commit)."""
+    await db.execute("INSERT OR IGNORE INTO maintenance_flag (name) VALUES (?)", (name,))
+
+
+async def clear_flag(db: aiosqlite.Connection, name: str) -> None:
+    """Clear a maintenance flag (does not commit)."""
+    await db.execute("DELETE FROM maintenance_flag WHERE name = ?", (name,))
+
+
+# Materialized week/month rollups of campaign_kpi, keyed by period start.
+# The expressions must match the grouping used by kpi_service.
+ROLLUP_TABLES = {
+    "week": ("campaign_kpi_weekly", "date({col}, 'weekday 0', '-6 days')"),
+    "month": ("campaign_kpi_monthly", "date({col}, 'start of month')"),
+}
+
+
+def _rollup_schema(table: str, period_expr: str) -> str:
+    """DDL for one rollup table plus the triggers that keep it in sync."""
+    new_period = period_expr.format(col="NEW.date")
+    old_period = period_expr.format(col="OLD.date")
+    add_new = f"""
+        INSERT INTO {table} (campaign_id, period_start, total_hours, days_count)
+        VALUES (NEW.campaign_id, {new_period}, NEW.hours, 1)
+        ON CONFLICT(campaign_id, period_start) DO UPDATE SET
+            total_hours = round(total_hours + excluded.total_hours, 6),
+            days_count = days_count + 1;
+    """
+    remove_old = f"""
+        UPDATE {table}
+        SET total_hours = round(total_hours - OLD.hours, 6),
+            days_count = days_count - 1
+        WHERE campaign_id = OLD.campaign_id AND period_start = {old_period};
+        DELETE FROM {table}
+        WHERE campaign_id = OLD.campaign_id AND period_start = {old_period}
+          AND days_count <= 0;
+    """
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            campaign_id INTEGER NOT NULL,
+            period_start DATE NOT NULL,
+            total_hours REAL NOT NULL DEFAULT 0,
+            days_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (campaign_id, period_start),
+            FOREIGN KEY (campaign_id) REFERENCES campaign(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_insert
+        AFTER INSERT ON campaign_kpi
+        BEGIN {add_new} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_update
+        AFTER UPDATE OF campaign_id, date, hours ON campaign_kpi
+        BEGIN {remove_old} {add_new} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_delete
+        AFTER DELETE ON campaign_kpi
+        BEGIN {remove_old} END;
+    """
+
+
+async def rebuild_rollups(db: aiosqlite.Connection) -> None:
+    """Recompute every rollup table from campaign_kpi (does not commit)."""
+    for table, period_expr in ROLLUP_TABLES.values():
+        period = period_expr.format(col="date")
+        await db.execute(f"DELETE FROM {table}")
+        await db.execute(f"""
+            INSERT INTO {table} (campaign_id, period_start, total_hours, days_count)
+            SELECT campaign_id, {period}, round(SUM(hours), 6), COUNT(*)
+            FROM campaign_kpi
+            GROUP BY campaign_id, {period}
+        """)
+
+
+# Running totals of campaign_kpi per campaign: one row per KPI day holding
+# the hours and day count up to and including that day, so the totals of
+# any date range are the difference of two point lookups
+CUMULATIVE_TABLE = "campaign_kpi_cumulative"
+
+
+def _cumulative_schema(table: str = CUMULATIVE_TABLE) -> str:
+    """DDL for the running-total table plus the triggers that keep it in sync."""
+    add_new = f"""
+        INSERT INTO {table} (campaign_id, date, cum_hours, cum_days)
+        SELECT NEW.campaign_id, NEW.date,
+               round(COALESCE(previous.cum_hours, 0) + NEW.hours, 6),
+               COALESCE(previous.cum_days, 0) + 1
+        FROM (SELECT 1)
+        LEFT JOIN (
+            SELECT cum_hours, cum_days FROM {table}
+            WHERE campaign_id = NEW.campaign_id AND date < NEW.date
+            ORDER BY date DESC LIMIT 1
+        ) AS previous ON 1;
+        UPDATE {table}
+        SET cum_hours = round(cum_hours + NEW.hours, 6),
+            cum_days = cum_days + 1
+        WHERE campaign_id = NEW.campaign_id AND date > NEW.date;
+    """
+    remove_old = f"""
+        DELETE FROM {table}
+        WHERE campaign_id = OLD.campaign_id AND date = OLD.date;
+        UPDATE {table}
+        SET cum_hours = round(cum_hours - OLD.hours, 6),
+            cum_days = cum_days - 1
+        WHERE campaign_id = OLD.campaign_id AND date > OLD.date;
+    """
+    # Changing only the hours of a day shifts that day and every later one
+    shift_hours = f"""
+        UPDATE {table}
+        SET cum_hours = round(cum_hours + NEW.hours - OLD.hours, 6)
+        WHERE campaign_id = NEW.campaign_id AND date >= NEW.date;
+    """
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            campaign_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            cum_hours REAL NOT NULL,
+            cum_days INTEGER NOT NULL,
+            PRIMARY KEY (campaign_id, date),
+            FOREIGN KEY (campaign_id) REFERENCES campaign(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_insert
+        AFTER INSERT ON campaign_kpi
+        BEGIN {add_new} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_update_hours
+        AFTER UPDATE OF hours ON campaign_kpi
+        WHEN NEW.campaign_id = OLD.campaign_id AND NEW.date = OLD.date
+        BEGIN {shift_hours} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_update
+        AFTER UPDATE OF campaign_id, date ON campaign_kpi
+        WHEN NEW.campaign_id != OLD.campaign_id OR NEW.date != OLD.date
+        BEGIN {remove_old} {add_new} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_delete
+        AFTER DELETE ON campaign_kpi
+        BEGIN {remove_old} END;
+    """
+
+
+async def rebuild_cumulative(db: aiosqlite.Connection) -> None:
+    """Recompute the running-total table from campaign_kpi (does not commit)."""
+    await db.execute(f"DELETE FROM {CUMULATIVE_TABLE}")
+    await db.execute(f"""
+        INSERT INTO {CUMULATIVE_TABLE} (campaign_id, date, cum_hours, cum_days)
+        SELECT campaign_id,
+               date,
+               round(SUM(hours) OVER running, 6),
+               COUNT(*) OVER running
+        FROM campaign_kpi
+        WINDOW running AS (PARTITION BY campaign_id ORDER BY date)
+    """)
+
+
+async def rebuild_cumulative_since(db: aiosqlite.Connection, since: dict[int, str]) -> None:
+    """
+    Recompute the running totals of some campaigns from a date on (does not commit).
+
+    `since` maps campaign ids to the first date to recompute; days before
+    it are kept and the totals carry on from the last of them, so the cost
+    is the number of days from that date, not the campaign's history.
+    """
+    for campaign_id, start in since.items():
+        await db.execute(
+            f"DELETE FROM {CUMULATIVE_TABLE} WHERE campaign_id = ? AND date >= ?",
+            (campaign_id, start),
+        )
+        await db.execute(f"""
+            INSERT INTO {CUMULATIVE_TABLE} (campaign_id, date, cum_hours, cum_days)
+            SELECT kpi.campaign_id,
+                   kpi.date,
+                   round(COALESCE(base.cum_hours, 0) + SUM(kpi.hours) OVER running, 6),
+                   COALESCE(base.cum_days, 0) + COUNT(*) OVER running
+            FROM campaign_kpi AS kpi
+            LEFT JOIN (
+                SELECT cum_hours, cum_days FROM {CUMULATIVE_TABLE}
+                WHERE campaign_id = :campaign_id AND date < :start
+                ORDER BY date DESC LIMIT 1
+            ) AS base ON 1
+            WHERE kpi.campaign_id = :campaign_id AND kpi.date >= :start
+            WINDOW running AS (ORDER BY kpi.date)
+        """, {"campaign_id": campaign_id, "start": start})
+
+
+# FTS5 indexes for admin search: source table -> (fts table, indexed columns)
+FTS_TABLES = {
+    "agent": ("agent_fts", ("first_name", "last_name", "email")),
+    "campaign": ("campaign_fts", ("name", "description")),
+}
+
+# Set by init_db once it knows whether this SQLite build has FTS5
+_fts5_enabled = False
+
+
+def fts5_enabled() -> bool:
+    """Whether the FTS5 search indexes exist (otherwise search falls back to LIKE)."""
+    return _fts5_enabled
+
+
+def _fts_schema(table: str, fts_table: str, columns: tuple[str, ...]) -> str:
+    """DDL for an external-content FTS5 index plus the triggers that sync it."""
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{col}" for col in columns)
+    old_values = ", ".join(f"OLD.{col}" for col in columns)
+    add_new = f"""
+        INSERT INTO {fts_table} (rowid, {cols}) VALUES (NEW.id, {new_values});
+    """
+    remove_old = f"""
+        INSERT INTO {fts_table} ({fts_table}, rowid, {cols})
+        VALUES ('delete', OLD.id, {old_values});
+    """
+    return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+            {cols}, content='{table}', content_rowid='id'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_insert
+        AFTER INSERT ON {table}
+        BEGIN {add_new} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_update
+        AFTER UPDATE OF {cols} ON {table}
+        BEGIN {remove_old} {add_new} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_delete
+        AFTER DELETE ON {table}
+        BEGIN {remove_old} END;
+    """
+
+
+async def _init_fts(db: aiosqlite.Connection) -> bool:
+    """Create (and on first creation, populate) the FTS5 search indexes."""
+    try:
+        for table, (fts_table, columns) in FTS_TABLES.items():
+            cursor = await db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?", (fts_table,)
+            )
+            existed = await cursor.fetchone() is not None
+            await db.executescript(_fts_schema(table, fts_table, columns))
+            if not existed:
+                await db.execute(
+                    f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')"
+                )
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        print("SQLite was built without FTS5, search will use LIKE")
+        return False
+    return True
+
+
 async def init_db():
     """Initialize database with schema if tables don't exist."""
     # Ensure directory exists
     DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     async with get_db() as db:
+        # WAL lets readers keep going while a write is in progress
+        await db.execute(f"PRAGMA journal_mode = {STORAGE_PROFILE['journal_mode']}")
         await db.executescript("""
             CREATE TABLE IF NOT EXISTS agent (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -61,7 +910,32 @@ async def init_db():
                 FOREIGN KEY (campaign_id) REFERENCES campaign(id) ON DELETE CASCADE,
                 UNIQUE(campaign_id, date)
             );
-            
+
+            -- Per-campaign badge threshold overrides (one row per tier)
+            CREATE TABLE IF NOT EXISTS badge_tier (
+                campaign_id INTEGER NOT NULL,
+                badge TEXT NOT NULL
+                    CHECK (badge IN ('bronze', 'silver', 'gold', 'platinum')),
+                min_hours REAL NOT NULL CHECK (min_hours >= 0),
+                version INTEGER NOT NULL,
+                PRIMARY KEY (campaign_id, badge),
+                FOREIGN KEY (campaign_id) REFERENCES campaign(id) ON DELETE CASCADE
+            ) WITHOUT ROWID;
+
+            -- Login throttle buckets shared by workers
+            -- (LOGIN_RATE_LIMIT_BACKEND=sqlite): when each bucket is full again
+            CREATE TABLE IF NOT EXISTS rate_limit_bucket (
+                key TEXT PRIMARY KEY,
+                full_at REAL NOT NULL
+            ) WITHOUT ROWID;
+
+            -- Set while maintenance that leaves derived tables out of date is
+            -- in progress (see DERIVED_TABLES_DIRTY); init_db repairs them
+            CREATE TABLE IF NOT EXISTS maintenance_flag (
+                name TEXT PRIMARY KEY,
+                set_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            ) WITHOUT ROWID;
+
             -- Create indexes for better query performance
             CREATE INDEX IF NOT EXISTS idx_campaign_kpi_campaign_date 
                 ON campaign_kpi(campaign_id, date);
@@ -69,6 +943,38 @@ async def init_db():
                 ON campaign_agent(campaign_id);
             CREATE INDEX IF NOT EXISTS idx_campaign_agent_agent 
                 ON campaign_agent(agent_id);
+            -- Keyset pagination order for the admin listings
+            CREATE INDEX IF NOT EXISTS idx_agent_created_at_id
+                ON agent(created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_campaign_created_at_id
+                ON campaign(created_at, id);
         """)
+
+        # Rollup tables; backfill them the first time they are created, or
+        # when a bulk load that suspended their triggers never finished
+        derived_dirty = await get_flag(db, DERIVED_TABLES_DIRTY)
+        cursor = await db.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+            tuple(table for table, _ in ROLLUP_TABLES.values()),
+        )
+        rollups_existed = (await cursor.fetchone())[0] == len(ROLLUP_TABLES)
+        for table, period_expr in ROLLUP_TABLES.values():
+            await db.executescript(_rollup_schema(table, period_expr))
+        if not rollups_existed or derived_dirty:
+            await rebuild_rollups(db)
+
+        cursor = await db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (CUMULATIVE_TABLE,),
+        )
+        cumulative_existed = await cursor.fetchone() is not None
+        await db.executescript(_cumulative_schema())
+        if not cumulative_existed or derived_dirty:
+            await rebuild_cumulative(db)
+        if derived_dirty:
+            await clear_flag(db, DERIVED_TABLES_DIRTY)
+
+        global _fts5_enabled
+        _fts5_enabled = await _init_fts(db)
         await db.commit()
         print("Database initialized successfully")
@@ -0,0 +1,239 @@
+"""
+Bulk import of historical KPI hours from CSV or Parquet files.
+Run with: python -m app.ingest FILE [FILE ...]
+
+Each row needs a `date`, an `hours` value and either a `campaign_id` or a
+campaign name (`campaign`/`campaign_name`). Files are streamed in chunks of
+--batch-size rows and each chunk is committed as one transaction. Existing
+(campaign, date) rows are overwritten.
+
+While the load runs, the secondary campaign_kpi index and the triggers that
+maintain derived tables are dropped; they are recreated and the derived
+tables rebuilt from scratch once the load finishes (or fails). If the
+process dies before that, the derived tables stay flagged as dirty and the
+next init_db (API start-up or another load) rebuilds them. A running
+API server keeps serving cached KPI responses until KPI_CACHE_TTL_SECONDS
+expires.
+
+Parquet support needs pyarrow (`pip install pyarrow`).
+"""
+import argparse
+import asyncio
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+from app.database import (
+    DERIVED_TABLES_DIRTY,
+    clear_flag,
+    get_db,
+    init_db,
+    rebuild_cumulative,
+    rebuild_rollups,
+    set_flag,
+)
+from app.services.kpi_service import parse_kpi_row
+
+DEFAULT_BATCH_SIZE = 50_000
+
+# Secondary index dropped for the duration of a load
+KPI_INDEX = "idx_campaign_kpi_campaign_date"
+
+CAMPAIGN_NAME_COLUMNS = ("campaign", "campaign_name")
+
+
+def read_csv(path: Path, batch_size: int) -> Iterator[list[dict]]:
+    """Yield the rows of a CSV file (with a header line) in chunks."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(row)
+            if len(chunk) >= batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def read_parquet(path: Path, batch_size: int) -> Iterator[list[dict]]:
+    """Yield the rows of a Parquet file in chunks, one record batch at a time."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Reading Parquet files requires pyarrow (pip install pyarrow)")
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield batch.to_pylist()
+
+
+READERS = {".csv": read_csv, ".parquet": read_parquet, ".pq": read_parquet}
+
+
+def read_file(path: Path, batch_size: int) -> Iterator[list[dict]]:
+    reader = READERS.get(path.suffix.lower())
+    if reader is None:
+        raise SystemExit(f"Unsupported file type: {path} (expected .csv or .parquet)")
+    return reader(path, batch_size)
+
+
+def resolve_row(row: dict, campaigns: dict[str, int]) -> tuple[int, str, float]:
+    """Turn one input record into a (campaign_id, date, hours) tuple."""
+    campaign_id = row.get("campaign_id")
+    if campaign_id in (None, ""):
+        name = next(
+            (row[col] for col in CAMPAIGN_NAME_COLUMNS if row.get(col) not in (None, "")),
+            None,
+        )
+        if name is None:
+            raise ValueError("row has neither campaign_id nor campaign name")
+        campaign_id = campaigns.get(str(name).strip())
+        if campaign_id is None:
+            raise ValueError(f"unknown campaign {name!r}")
+    day = row.get("date")
+    if day is not None and not isinstance(day, str):
+        # Parquet date columns arrive as datetime.date
+        day = day.isoformat()
+    return parse_kpi_row(campaign_id, day, row.get("hours"))
+
+
+async def _suspend_derived_tables(db) -> list[str]:
+    """
+    Drop the campaign_kpi triggers and index for a load, and commit.
+
+    The derived tables are flagged dirty in the same transaction, so a load
+    that never reaches _restore_derived_tables is repaired by init_db.
+    Returns the triggers' DDL for restoring.
+    """
+    cursor = await db.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'campaign_kpi'"
+    )
+    triggers = await cursor.fetchall()
+    await set_flag(db, DERIVED_TABLES_DIRTY)
+    for trigger in triggers:
+        await db.execute(f"DROP TRIGGER IF EXISTS {trigger['name']}")
+    await db.execute(f"DROP INDEX IF EXISTS {KPI_INDEX}")
+    await db.commit()
+    return [trigger["sql"] for trigger in triggers]
+
+
+async def _restore_derived_tables(db, triggers: list[str]) -> None:
+    """Recreate the index and triggers, rebuild the derived tables and commit."""
+    await db.execute(
+        f"CREATE INDEX IF NOT EXISTS {KPI_INDEX} ON campaign_kpi(campaign_id, date)"
+    )
+    await rebuild_rollups(db)
+    await rebuild_cumulative(db)
+    for sql in triggers:
+        await db.execute(sql)
+    await clear_flag(db, DERIVED_TABLES_DIRTY)
+    await db.commit()
+
+
+async def ingest(
+    paths: list[Path],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_errors: int = 20,
+    quiet: bool = False,
+) -> dict:
+    """Load KPI rows from the given files; returns counts and throughput."""
+    await init_db()
+    stats = {"read": 0, "loaded": 0, "skipped": 0, "batches": 0}
+    started = time.perf_counter()
+
+    def report(message: str) -> None:
+        if not quiet:
+            print(message, file=sys.stderr)
+
+    async with get_db() as db:
+        cursor = await db.execute("SELECT id, name FROM campaign")
+        campaigns = {row["name"]: row["id"] for row in await cursor.fetchall()}
+        known_ids = set(campaigns.values())
+
+        triggers = await _suspend_derived_tables(db)
+
+        try:
+            for path in paths:
+                # Data rows of this file, for error messages
+                row_number = 0
+                for chunk in read_file(path, batch_size):
+                    rows = []
+                    for record in chunk:
+                        stats["read"] += 1
+                        row_number += 1
+                        try:
+                            row = resolve_row(record, campaigns)
+                            if row[0] not in known_ids:
+                                raise ValueError(f"campaign {row[0]} does not exist")
+                        except ValueError as e:
+                            stats["skipped"] += 1
+                            if stats["skipped"] <= max_errors:
+                                report(f"{path}: row {row_number}: {e}")
+                            continue
+                        rows.append(row)
+
+                    await db.executemany(
+                        """
+                        INSERT INTO campaign_kpi (campaign_id, date, hours)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT(campaign_id, date) DO UPDATE SET hours = excluded.hours
+                        """,
+                        rows,
+                    )
+                    await db.commit()
+                    stats["loaded"] += len(rows)
+                    stats["batches"] += 1
+                    elapsed = time.perf_counter() - started
+                    report(
+                        f"{stats['loaded']:,} rows loaded "
+                        f"({stats['loaded'] / elapsed:,.0f} rows/sec)"
+                    )
+        finally:
+            await db.rollback()
+            rebuild_started = time.perf_counter()
+            await _restore_derived_tables(db, triggers)
+            report(f"Indexes and rollups rebuilt in {time.perf_counter() - rebuild_started:.1f}s")
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_second"] = round(stats["loaded"] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.ingest",
+        description="Bulk load campaign KPI hours from CSV or Parquet files.",
+    )
+    parser.add_argument("files", nargs="+", type=Path, help="CSV or Parquet files")
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help=f"rows per chunk and per transaction (default {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--max-errors", type=int, default=20,
+        help="how many skipped rows to print (default 20)",
+    )
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    if args.batch_size <= 0:
+        parser.error("--batch-size must be positive")
+    for path in args.files:
+        if not path.is_file():
+            parser.error(f"no such file: {path}")
+
+    stats = asyncio.run(
+        ingest(args.files, args.batch_size, args.max_errors, args.quiet)
+    )
+    print(
+        f"Loaded {stats['loaded']:,} of {stats['read']:,} rows "
+        f"({stats['skipped']:,} skipped) in {stats['seconds']:.1f}s "
+        f"- {stats['rows_per_second']:,.0f} rows/sec"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,39 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import init_db
-from app.routers import auth, agents, campaigns, kpis
+from app.database import (
+    init_db,
+    open_pool,
+    close_pool,
+    get_pool,
+    start_write_queue,
+    stop_write_queue,
+    get_write_queue,
+)
+from app.auth import login_limiter, token_cache
+from app.routers import auth, agents, campaigns, kpis, admin
+from app.services import count_cache, kpi_cache, kpi_flights, kpi_broadcaster
+from app.services.metrics import (
+    METRICS_CONTENT_TYPE,
+    CallbackMetric,
+    MetricsMiddleware,
+    register_caches,
+    registry,
+    render_metrics,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
+    """Initialize database, connection pool and writer task on startup."""
     await init_db()
+    await open_pool()
+    await start_write_queue()
     yield
+    await kpi_broadcaster.close()
+    await stop_write_queue()
+    await close_pool()
 
 
 app = FastAPI(
@@ -28,15 +51,47 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request counts, latency, response size and DB usage per route template
+app.add_middleware(MetricsMiddleware)
+
+register_caches({
+    "kpi": kpi_cache.stats,
+    "list_count": count_cache.stats,
+    "token": token_cache.stats,
+})
+registry.register(CallbackMetric(
+    "kpi_single_flight_total", "KPI cache misses computed (led) or shared (coalesced).",
+    "outcome", lambda: {"led": kpi_flights.calls, "coalesced": kpi_flights.coalesced},
+    kind="counter",
+))
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(agents.router)
 app.include_router(campaigns.router)
 app.include_router(kpis.router)
+app.include_router(admin.router)
 
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "callcenter-kpi-api"}
+    pool = get_pool()
+    write_queue = get_write_queue()
+    return {
+        "status": "healthy",
+        "service": "callcenter-kpi-api",
+        "database_pool": pool.stats() if pool else None,
+        "write_queue": write_queue.stats() if write_queue else None,
+        "kpi_cache": kpi_cache.stats(),
+        "kpi_single_flight": kpi_flights.stats(),
+        "token_cache": token_cache.stats(),
+        "login_rate_limit": login_limiter.stats(),
+        "live_streams": kpi_broadcaster.stats(),
+    }
+
+
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics():
+    """Runtime metrics in the Prometheus text exposition format."""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
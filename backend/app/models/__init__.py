@@ -21,10 +21,24 @@ from app.models.schemas import (
     AssignmentResponse,
     KPIDataPoint,
     KPIResponse,
+    KPIBatchResponse,
+    KPIColumnarSeries,
+    KPIColumnarResponse,
     KPISummary,
     DailyBadgeResponse,
     BadgeSummaryResponse,
+    KPIRangeSummaryResponse,
+    DashboardResponse,
+    BadgeThresholdsResponse,
+    BadgeTiersUpdate,
+    BadgeTiersResponse,
     BadgeType,
+    KPIBulkRowError,
+    KPIBulkResponse,
+    QueryTraceEntry,
+    QueryFingerprint,
+    QueryTraceSettings,
+    QueryTraceResponse,
 )
 
 __all__ = [
@@ -50,8 +64,22 @@ __all__ = [
     "AssignmentResponse",
     "KPIDataPoint",
     "KPIResponse",
+    "KPIBatchResponse",
+    "KPIColumnarSeries",
+    "KPIColumnarResponse",
     "KPISummary",
     "DailyBadgeResponse",
     "BadgeSummaryResponse",
+    "KPIRangeSummaryResponse",
+    "DashboardResponse",
+    "BadgeThresholdsResponse",
+    "BadgeTiersUpdate",
+    "BadgeTiersResponse",
     "BadgeType",
+    "KPIBulkRowError",
+    "KPIBulkResponse",
+    "QueryTraceEntry",
+    "QueryFingerprint",
+    "QueryTraceSettings",
+    "QueryTraceResponse",
 ]
@@ -67,6 +67,7 @@ class AgentListResponse(BaseModel):
     page: int
     limit: int
     pages: int
+    next_cursor: str | None = None
 
 
 # ============== Campaign Schemas ==============
@@ -118,6 +119,7 @@ class CampaignListResponse(BaseModel):
     page: int
     limit: int
     pages: int
+    next_cursor: str | None = None
 
 
 # ============== Assignment Schemas ==============
@@ -173,15 +175,44 @@ class KPIResponse(BaseModel):
     period: PeriodInfo
     data: list[KPIDataPoint]
     summary: KPISummary
+    tier_version: int = 0
+
+
+class KPIColumnarSeries(BaseModel):
+    length: int
+    start: str | None
+    step: str | None
+    dates: list[str] | None
+    hours: list[float]
+    badge: list[int]
+    days_in_period: list[int] | None
+    is_complete: list[bool] | None
+
+
+class KPIColumnarResponse(BaseModel):
+    campaign: CampaignBrief
+    period: PeriodInfo
+    format: Literal["columnar"]
+    badge_codes: list[BadgeType]
+    series: KPIColumnarSeries
+    summary: KPISummary
+    tier_version: int = 0
+
+
+class KPIBatchResponse(BaseModel):
+    period: PeriodInfo
+    campaigns: dict[int, KPIResponse]
+    not_found: list[int] = []
 
 
 class DailyBadgeResponse(BaseModel):
     date: str
     hours: float
     badge: BadgeType
-    threshold: int
+    threshold: float
     next_badge: BadgeType
     hours_to_next: float
+    tier_version: int = 0
 
 
 class BadgeSummaryPeriod(BaseModel):
@@ -197,3 +228,87 @@ class BadgeSummaryResponse(BaseModel):
     total_hours: float
     average_daily_hours: float
     average_badge: BadgeType
+    tier_version: int = 0
+
+
+class DashboardResponse(BaseModel):
+    kpis: KPIResponse
+    badge: DailyBadgeResponse
+    badge_summary: BadgeSummaryResponse
+
+
+class KPIRangeSummaryResponse(BaseModel):
+    campaign: CampaignBrief
+    period: BadgeSummaryPeriod
+    summary: KPISummary
+    average_badge: BadgeType
+    tier_version: int = 0
+
+
+class BadgeThresholdsResponse(BaseModel):
+    thresholds: dict[str, float]
+    description: str
+
+
+class BadgeTiersUpdate(BaseModel):
+    bronze: float = Field(..., ge=0)
+    silver: float = Field(..., ge=0)
+    gold: float = Field(..., ge=0)
+    platinum: float = Field(..., ge=0)
+
+
+class BadgeTiersResponse(BaseModel):
+    campaign_id: int
+    thresholds: dict[str, float]
+    version: int
+    is_default: bool
+
+
+class KPIBulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class KPIBulkResponse(BaseModel):
+    received: int
+    upserted: int
+    failed: int
+    errors: list[KPIBulkRowError]
+    errors_truncated: bool = False
+    chunks: int
+    elapsed_ms: float
+    rows_per_second: float
+
+
+class QueryTraceEntry(BaseModel):
+    at: float
+    fingerprint: str
+    sql: str
+    duration_ms: float
+    rows: int
+    slow: bool
+    plan: list[str] | None = None
+
+
+class QueryFingerprint(BaseModel):
+    fingerprint: str
+    calls: int
+    total_ms: float
+    max_ms: float
+    rows: int
+    slow: int
+
+
+class QueryTraceSettings(BaseModel):
+    enabled: bool | None = None
+    slow_query_ms: float | None = Field(None, ge=0)
+
+
+class QueryTraceResponse(BaseModel):
+    enabled: bool
+    slow_query_ms: float
+    buffer_size: int
+    traced: int
+    slow: int
+    fingerprints: list[QueryFingerprint]
+    entries: list[QueryTraceEntry]
@@ -1,3 +1,3 @@
-from app.routers import auth, agents, campaigns, kpis
+from app.routers import auth, agents, campaigns, kpis, admin
 
-__all__ = ["auth", "agents", "campaigns", "kpis"]
+__all__ = ["auth", "agents", "campaigns", "kpis", "admin"]
@@ -0,0 +1,58 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from app.auth import require_admin
+from app.database import query_tracer
+from app.models import TokenData, QueryTraceResponse, QueryTraceSettings
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+def _trace_response(slow_only: bool = False, limit: int | None = None) -> dict:
+    entries = [entry for entry in query_tracer.entries if entry["slow"] or not slow_only]
+    return {
+        "enabled": query_tracer.enabled,
+        "slow_query_ms": query_tracer.slow_ms,
+        "buffer_size": query_tracer.entries.maxlen,
+        "traced": query_tracer.traced,
+        "slow": query_tracer.slow,
+        "fingerprints": query_tracer.fingerprints(entries),
+        "entries": entries[::-1][:limit],
+    }
+
+
+@router.get("/queries", response_model=QueryTraceResponse)
+async def get_query_trace(
+    _: Annotated[TokenData, Depends(require_admin)],
+    slow_only: bool = Query(False, description="Only statements over the slow threshold"),
+    limit: int = Query(100, ge=1, le=10000, description="Most recent entries to return"),
+):
+    """
+    Get traced SQL statements, newest first.
+
+    Fingerprints group every buffered statement differing only in values,
+    so N+1 patterns show up as one fingerprint with many calls. Slow
+    statements carry their EXPLAIN QUERY PLAN.
+    """
+    return _trace_response(slow_only, limit)
+
+
+@router.put("/queries", response_model=QueryTraceResponse)
+async def update_query_trace(
+    settings: QueryTraceSettings,
+    _: Annotated[TokenData, Depends(require_admin)],
+):
+    """Turn statement tracing on or off, or change the slow threshold, at runtime."""
+    if settings.enabled is not None:
+        query_tracer.enabled = settings.enabled
+    if settings.slow_query_ms is not None:
+        query_tracer.slow_ms = settings.slow_query_ms
+    return _trace_response(limit=0)
+
+
+@router.delete("/queries", response_model=QueryTraceResponse)
+async def clear_query_trace(_: Annotated[TokenData, Depends(require_admin)]):
+    """Empty the trace buffer."""
+    query_tracer.clear()
+    return _trace_response()
@@ -1,10 +1,21 @@
 from typing import Annotated
 from math import ceil
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 
 from app.auth import require_admin
-from app.database import get_db
+from app.database import get_db, run_write
+from app.services import (
+    search_filter,
+    cached_count,
+    decode_cursor,
+    encode_cursor,
+    invalidate_counts,
+    bump_table,
+    make_etag,
+    not_modified,
+    table_version,
+)
 from app.models import (
     TokenData,
     AgentCreate,
@@ -22,23 +33,49 @@ router = APIRouter(prefix="/api/agents", tags=["agents"])
 @router.get("", response_model=AgentListResponse)
 async def list_agents(
     _: Annotated[TokenData, Depends(require_admin)],
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     search: str | None = None,
     is_active: bool | None = None,
+    cursor_token: str | None = Query(
+        None,
+        alias="cursor",
+        description="Keyset pagination: empty for the first page, then next_cursor",
+    ),
 ):
-    """List all agents with pagination and filtering."""
-    async with get_db() as db:
+    """
+    List all agents with pagination and filtering.
+
+    Pages by OFFSET by default. Passing `cursor` switches to keyset
+    pagination on (created_at, id), which costs the same for every page and
+    serves the total from a short-lived cache. `search` uses the FTS5 index
+    (word-prefix matches, offset pages ranked by relevance) and falls back
+    to a LIKE scan when FTS5 is unavailable. Responses carry a weak ETag;
+    a matching If-None-Match gets a 304 without touching the database.
+    """
+    etag = make_etag(
+        "agents",
+        table_version("agent"), table_version("campaign"), table_version("campaign_agent"),
+        sorted(request.query_params.multi_items()),
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = etag
+
+    async with get_db(readonly=True) as db:
         # Build query conditions
         conditions = []
         params = []
         
+        search_sql = None
         if search:
-            conditions.append(
-                "(first_name LIKE ? OR last_name LIKE ? OR email LIKE ?)"
-            )
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param])
+            # Offset pages are ranked by relevance, cursor pages keep created_at order
+            search_sql = search_filter("agent", search, ranked=cursor_token is None)
+            conditions.append(search_sql["condition"])
+            params.extend(search_sql["params"])
         
         if is_active is not None:
             conditions.append("is_active = ?")
@@ -46,50 +83,88 @@ async def list_agents(
         
         where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) as count FROM agent{where_clause}"
-        cursor = await db.execute(count_query, params)
-        row = await cursor.fetchone()
-        total = row["count"]
+        join = search_sql["join"] if search_sql else ""
+        join_params = search_sql["join_params"] if search_sql else []
+        
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if join:
+            # The ranked JOIN already applies the search (the first condition);
+            # keeping the condition too would run the MATCH twice
+            page_conditions = page_conditions[1:]
+            page_params = page_params[len(search_sql["params"]):]
+        if cursor_token:
+            try:
+                after_created_at, after_id = decode_cursor(cursor_token)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor",
+                )
+            page_conditions.append("(created_at, id) < (?, ?)")
+            page_params.extend([after_created_at, after_id])
+        page_where = " WHERE " + " AND ".join(page_conditions) if page_conditions else ""
+        
+        if cursor_token is None:
+            # Get total count
+            count_query = f"SELECT COUNT(*) as count FROM agent{where_clause}"
+            cursor = await db.execute(count_query, params)
+            row = await cursor.fetchone()
+            total = row["count"]
+            offset = (page - 1) * limit
+        else:
+            total = await cached_count(db, "agent", where_clause, params)
+            offset = 0
+        
+        order_by = "hit.rank, id DESC" if join else "created_at DESC, id DESC"
         
-        # Get paginated results
-        offset = (page - 1) * limit
+        # Get paginated results (one extra row tells us if there is a next page)
         query = f"""
             SELECT id, first_name, last_name, email, is_active, created_at 
             FROM agent
-            {where_clause}
-            ORDER BY created_at DESC
+            {join}
+            {page_where}
+            ORDER BY {order_by}
             LIMIT ? OFFSET ?
         """
-        cursor = await db.execute(query, params + [limit, offset])
+        cursor = await db.execute(query, join_params + page_params + [limit + 1, offset])
         rows = await cursor.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            if not join:
+                next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
         
-        # Get campaigns for each agent
-        agents = []
-        for row in rows:
-            agent_id = row["id"]
-            campaigns_query = """
-                SELECT c.id, c.name, c.is_active
+        # Get campaigns for every agent on the page in one query
+        campaigns_by_agent: dict[int, list[CampaignBrief]] = {
+            row["id"]: [] for row in rows
+        }
+        if campaigns_by_agent:
+            placeholders = ", ".join("?" * len(campaigns_by_agent))
+            campaigns_query = f"""
+                SELECT ca.agent_id, c.id, c.name, c.is_active
                 FROM campaign c
                 JOIN campaign_agent ca ON c.id = ca.campaign_id
-                WHERE ca.agent_id = ?
+                WHERE ca.agent_id IN ({placeholders})
             """
-            cursor = await db.execute(campaigns_query, (agent_id,))
-            campaign_rows = await cursor.fetchall()
-            campaigns = [
-                CampaignBrief(id=c["id"], name=c["name"], is_active=bool(c["is_active"]))
-                for c in campaign_rows
-            ]
-            
-            agents.append(AgentResponse(
+            cursor = await db.execute(campaigns_query, list(campaigns_by_agent))
+            for c in await cursor.fetchall():
+                campaigns_by_agent[c["agent_id"]].append(
+                    CampaignBrief(id=c["id"], name=c["name"], is_active=bool(c["is_active"]))
+                )
+        
+        agents = [
+            AgentResponse(
                 id=row["id"],
                 first_name=row["first_name"],
                 last_name=row["last_name"],
                 email=row["email"],
                 is_active=bool(row["is_active"]),
                 created_at=row["created_at"],
-                campaigns=campaigns,
-            ))
+                campaigns=campaigns_by_agent[row["id"]],
+            )
+            for row in rows
+        ]
         
         return AgentListResponse(
             data=agents,
@@ -97,6 +172,7 @@ async def list_agents(
             page=page,
             limit=limit,
             pages=ceil(total / limit) if total > 0 else 1,
+            next_cursor=next_cursor,
         )
 
 
@@ -106,41 +182,42 @@ async def create_agent(
     agent: AgentCreate,
 ):
     """Create a new agent."""
-    async with get_db() as db:
-        try:
-            cursor = await db.execute(
-                """
-                INSERT INTO agent (first_name, last_name, email, is_active)
-                VALUES (?, ?, ?, ?)
-                """,
-                (agent.first_name, agent.last_name, agent.email, agent.is_active),
-            )
-            await db.commit()
-            agent_id = cursor.lastrowid
-            
-            # Fetch the created agent
-            cursor = await db.execute(
-                "SELECT * FROM agent WHERE id = ?",
-                (agent_id,),
-            )
-            row = await cursor.fetchone()
-            
-            return AgentResponse(
-                id=row["id"],
-                first_name=row["first_name"],
-                last_name=row["last_name"],
-                email=row["email"],
-                is_active=bool(row["is_active"]),
-                created_at=row["created_at"],
-                campaigns=[],
+    async def insert_agent(db):
+        cursor = await db.execute(
+            """
+            INSERT INTO agent (first_name, last_name, email, is_active)
+            VALUES (?, ?, ?, ?)
+            """,
+            (agent.first_name, agent.last_name, agent.email, agent.is_active),
+        )
+        # Fetch the created agent
+        cursor = await db.execute(
+            "SELECT * FROM agent WHERE id = ?",
+            (cursor.lastrowid,),
+        )
+        return await cursor.fetchone()
+
+    try:
+        row = await run_write(insert_agent)
+    except Exception as e:
+        if "UNIQUE constraint failed" in str(e):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="An agent with this email already exists",
             )
-        except Exception as e:
-            if "UNIQUE constraint failed" in str(e):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="An agent with this email already exists",
-                )
-            raise
+        raise
+    invalidate_counts("agent")
+    bump_table("agent")
+
+    return AgentResponse(
+        id=row["id"],
+        first_name=row["first_name"],
+        last_name=row["last_name"],
+        email=row["email"],
+        is_active=bool(row["is_active"]),
+        created_at=row["created_at"],
+        campaigns=[],
+    )
 
 
 @router.get("/{agent_id}", response_model=AgentResponse)
@@ -149,7 +226,7 @@ async def get_agent(
     agent_id: int,
 ):
     """Get a specific agent by ID."""
-    async with get_db() as db:
+    async with get_db(readonly=True) as db:
         cursor = await db.execute(
             "SELECT * FROM agent WHERE id = ?",
             (agent_id,),
@@ -194,55 +271,60 @@ async def update_agent(
     agent: AgentUpdate,
 ):
     """Update an existing agent."""
-    async with get_db() as db:
+    async with get_db(readonly=True) as db:
         # Check if agent exists
         cursor = await db.execute(
             "SELECT * FROM agent WHERE id = ?",
             (agent_id,),
         )
         existing = await cursor.fetchone()
-        
-        if not existing:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Agent not found",
+    
+    if not existing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Agent not found",
+        )
+    
+    # Build update query
+    updates = []
+    params = []
+    
+    if agent.first_name is not None:
+        updates.append("first_name = ?")
+        params.append(agent.first_name)
+    if agent.last_name is not None:
+        updates.append("last_name = ?")
+        params.append(agent.last_name)
+    if agent.email is not None:
+        updates.append("email = ?")
+        params.append(agent.email)
+    if agent.is_active is not None:
+        updates.append("is_active = ?")
+        params.append(agent.is_active)
+    
+    if updates:
+        params.append(agent_id)
+
+        async def apply_update(db):
+            await db.execute(
+                f"UPDATE agent SET {', '.join(updates)} WHERE id = ?",
+                params,
             )
-        
-        # Build update query
-        updates = []
-        params = []
-        
-        if agent.first_name is not None:
-            updates.append("first_name = ?")
-            params.append(agent.first_name)
-        if agent.last_name is not None:
-            updates.append("last_name = ?")
-            params.append(agent.last_name)
-        if agent.email is not None:
-            updates.append("email = ?")
-            params.append(agent.email)
-        if agent.is_active is not None:
-            updates.append("is_active = ?")
-            params.append(agent.is_active)
-        
-        if updates:
-            try:
-                params.append(agent_id)
-                await db.execute(
-                    f"UPDATE agent SET {', '.join(updates)} WHERE id = ?",
-                    params,
+
+        try:
+            await run_write(apply_update)
+        except Exception as e:
+            if "UNIQUE constraint failed" in str(e):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="An agent with this email already exists",
                 )
-                await db.commit()
-            except Exception as e:
-                if "UNIQUE constraint failed" in str(e):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="An agent with this email already exists",
-                    )
-                raise
-        
-        # Return updated agent
-        return await get_agent(_, agent_id)
+            raise
+        invalidate_counts("agent")
+        bump_table("agent")
+    
+    # Return updated agent
+    return await get_agent(_, agent_id)
 
 
 @router.delete("/{agent_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -251,19 +333,17 @@ async def delete_agent(
     agent_id: int,
 ):
     """Delete an agent."""
-    async with get_db() as db:
-        cursor = await db.execute(
-            "SELECT id FROM agent WHERE id = ?",
-            (agent_id,),
+    async def remove_agent(db):
+        cursor = await db.execute("DELETE FROM agent WHERE id = ?", (agent_id,))
+        return cursor.rowcount
+
+    if not await run_write(remove_agent):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Agent not found",
         )
-        if not await cursor.fetchone():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Agent not found",
-            )
-        
-        await db.execute("DELETE FROM agent WHERE id = ?", (agent_id,))
-        await db.commit()
+    invalidate_counts("agent")
+    bump_table("agent", "campaign_agent")
 
 
 @router.post("/{agent_id}/campaigns", response_model=AssignmentResponse)
@@ -273,7 +353,7 @@ async def assign_campaigns_to_agent(
     assignment: CampaignAssignment,
 ):
     """Assign campaigns to an agent."""
-    async with get_db() as db:
+    async with get_db(readonly=True) as db:
         # Check if agent exists
         cursor = await db.execute(
             "SELECT id FROM agent WHERE id = ?",
@@ -284,7 +364,8 @@ async def assign_campaigns_to_agent(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Agent not found",
             )
-        
+    
+    async def insert_assignments(db):
         count = 0
         for campaign_id in assignment.campaign_ids:
             try:
@@ -299,12 +380,15 @@ async def assign_campaigns_to_agent(
             except Exception:
                 # Skip duplicates
                 pass
-        
-        await db.commit()
-        return AssignmentResponse(
-            message=f"Assigned {count} campaigns to agent",
-            count=count,
-        )
+        return count
+
+    count = await run_write(insert_assignments)
+    if count:
+        bump_table("campaign_agent")
+    return AssignmentResponse(
+        message=f"Assigned {count} campaigns to agent",
+        count=count,
+    )
 
 
 @router.delete("/{agent_id}/campaigns/{campaign_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -314,7 +398,7 @@ async def remove_campaign_from_agent(
     campaign_id: int,
 ):
     """Remove a campaign assignment from an agent."""
-    async with get_db() as db:
+    async def remove_assignment(db):
         cursor = await db.execute(
             """
             DELETE FROM campaign_agent 
@@ -322,10 +406,11 @@ async def remove_campaign_from_agent(
             """,
             (agent_id, campaign_id),
         )
-        await db.commit()
-        
-        if cursor.rowcount == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Assignment not found",
-            )
+        return cursor.rowcount
+
+    if not await run_write(remove_assignment):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found",
+        )
+    bump_table("campaign_agent")
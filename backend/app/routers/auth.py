@@ -1,14 +1,18 @@
 from datetime import timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     authenticate_user,
+    check_login_rate,
+    client_ip,
     create_access_token,
     get_current_user,
+    optional_oauth2_scheme,
+    revoke_token,
 )
 from app.models import Token, TokenData, UserInfo
 
@@ -16,13 +20,27 @@ router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
 
 @router.post("/login", response_model=Token)
-async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+async def login(
+    request: Request,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+):
     """
     Authenticate admin user and return JWT token.
     
-    Use OAuth2 password flow with username and password.
+    Use OAuth2 password flow with username and password. Attempts are
+    throttled per client IP and per username; throttled attempts get a
+    429 with Retry-After before any password is checked. Behind a trusted
+    proxy (TRUSTED_PROXIES) the client IP is taken from its forwarded header.
     """
-    user = authenticate_user(form_data.username, form_data.password)
+    retry_after = await check_login_rate(client_ip(request), form_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+    
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,11 +70,13 @@ async def get_current_user_info(
 
 
 @router.post("/logout")
-async def logout():
+async def logout(token: Annotated[str | None, Depends(optional_oauth2_scheme)]):
     """
     Logout endpoint.
     
-    Note: JWT tokens are stateless, so logout is handled client-side
-    by removing the token. This endpoint is provided for API completeness.
+    The bearer token sent with the request, if any, is revoked in this
+    process until it expires; the client should still discard it.
     """
+    if token:
+        revoke_token(token)
     return {"message": "Successfully logged out"}
@@ -1,10 +1,22 @@
 from typing import Annotated
 from math import ceil
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 
 from app.auth import require_admin
-from app.database import get_db
+from app.database import get_db, run_write
+from app.services import (
+    search_filter,
+    invalidate_campaign,
+    cached_count,
+    decode_cursor,
+    encode_cursor,
+    invalidate_counts,
+    bump_table,
+    make_etag,
+    not_modified,
+    table_version,
+)
 from app.models import (
     TokenData,
     CampaignCreate,
@@ -22,21 +34,49 @@ router = APIRouter(prefix="/api/campaigns", tags=["campaigns"])
 
 @router.get("", response_model=CampaignListResponse)
 async def list_campaigns(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     search: str | None = None,
     is_active: bool | None = None,
+    cursor_token: str | None = Query(
+        None,
+        alias="cursor",
+        description="Keyset pagination: empty for the first page, then next_cursor",
+    ),
 ):
-    """List all campaigns with pagination and filtering. Public endpoint."""
-    async with get_db() as db:
+    """
+    List all campaigns with pagination and filtering. Public endpoint.
+
+    Pages by OFFSET by default. Passing `cursor` switches to keyset
+    pagination on (created_at, id), which costs the same for every page and
+    serves the total from a short-lived cache. `search` uses the FTS5 index
+    (word-prefix matches, offset pages ranked by relevance) and falls back
+    to a LIKE scan when FTS5 is unavailable. Responses carry a weak ETag;
+    a matching If-None-Match gets a 304 without touching the database.
+    """
+    etag = make_etag(
+        "campaigns",
+        table_version("campaign"), table_version("campaign_agent"),
+        sorted(request.query_params.multi_items()),
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = etag
+
+    async with get_db(readonly=True) as db:
         # Build query conditions
         conditions = []
         params = []
         
+        search_sql = None
         if search:
-            conditions.append("(name LIKE ? OR description LIKE ?)")
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param])
+            # Offset pages are ranked by relevance, cursor pages keep created_at order
+            search_sql = search_filter("campaign", search, ranked=cursor_token is None)
+            conditions.append(search_sql["condition"])
+            params.extend(search_sql["params"])
         
         if is_active is not None:
             conditions.append("is_active = ?")
@@ -44,27 +84,63 @@ async def list_campaigns(
         
         where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) as count FROM campaign{where_clause}"
-        cursor = await db.execute(count_query, params)
-        row = await cursor.fetchone()
-        total = row["count"]
+        join = search_sql["join"] if search_sql else ""
+        join_params = search_sql["join_params"] if search_sql else []
+        
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if join:
+            # The ranked JOIN already applies the search (the first condition);
+            # keeping the condition too would run the MATCH twice
+            page_conditions = page_conditions[1:]
+            page_params = page_params[len(search_sql["params"]):]
+        if cursor_token:
+            try:
+                after_created_at, after_id = decode_cursor(cursor_token)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor",
+                )
+            page_conditions.append("(created_at, id) < (?, ?)")
+            page_params.extend([after_created_at, after_id])
+        page_where = " WHERE " + " AND ".join(page_conditions) if page_conditions else ""
+        
+        if cursor_token is None:
+            # Get total count
+            count_query = f"SELECT COUNT(*) as count FROM campaign{where_clause}"
+            cursor = await db.execute(count_query, params)
+            row = await cursor.fetchone()
+            total = row["count"]
+            offset = (page - 1) * limit
+        else:
+            total = await cached_count(db, "campaign", where_clause, params)
+            offset = 0
+        
+        order_by = "hit.rank, id DESC" if join else "created_at DESC, id DESC"
         
         # Get paginated results with agent count
-        offset = (page - 1) * limit
+        # (one extra row tells us if there is a next page)
         query = f"""
             SELECT 
-                c.id, c.name, c.description, c.is_active, c.created_at,
-                COUNT(ca.agent_id) as agent_count
-            FROM campaign c
-            LEFT JOIN campaign_agent ca ON c.id = ca.campaign_id
-            {where_clause}
-            GROUP BY c.id
-            ORDER BY c.created_at DESC
+                id, name, description, is_active, created_at,
+                (
+                    SELECT COUNT(*) FROM campaign_agent ca
+                    WHERE ca.campaign_id = campaign.id
+                ) as agent_count
+            FROM campaign
+            {join}
+            {page_where}
+            ORDER BY {order_by}
             LIMIT ? OFFSET ?
         """
-        cursor = await db.execute(query, params + [limit, offset])
+        cursor = await db.execute(query, join_params + page_params + [limit + 1, offset])
         rows = await cursor.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            if not join:
+                next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
         
         campaigns = [
             CampaignResponse(
@@ -84,6 +160,7 @@ async def list_campaigns(
             page=page,
             limit=limit,
             pages=ceil(total / limit) if total > 0 else 1,
+            next_cursor=next_cursor,
         )
 
 
@@ -93,46 +170,47 @@ async def create_campaign(
     campaign: CampaignCreate,
 ):
     """Create a new campaign. Admin only."""
-    async with get_db() as db:
-        try:
-            cursor = await db.execute(
-                """
-                INSERT INTO campaign (name, description, is_active)
-                VALUES (?, ?, ?)
-                """,
-                (campaign.name, campaign.description, campaign.is_active),
-            )
-            await db.commit()
-            campaign_id = cursor.lastrowid
-            
-            # Fetch the created campaign
-            cursor = await db.execute(
-                "SELECT * FROM campaign WHERE id = ?",
-                (campaign_id,),
-            )
-            row = await cursor.fetchone()
-            
-            return CampaignResponse(
-                id=row["id"],
-                name=row["name"],
-                description=row["description"],
-                is_active=bool(row["is_active"]),
-                created_at=row["created_at"],
-                agent_count=0,
+    async def insert_campaign(db):
+        cursor = await db.execute(
+            """
+            INSERT INTO campaign (name, description, is_active)
+            VALUES (?, ?, ?)
+            """,
+            (campaign.name, campaign.description, campaign.is_active),
+        )
+        # Fetch the created campaign
+        cursor = await db.execute(
+            "SELECT * FROM campaign WHERE id = ?",
+            (cursor.lastrowid,),
+        )
+        return await cursor.fetchone()
+
+    try:
+        row = await run_write(insert_campaign)
+    except Exception as e:
+        if "UNIQUE constraint failed" in str(e):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A campaign with this name already exists",
             )
-        except Exception as e:
-            if "UNIQUE constraint failed" in str(e):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="A campaign with this name already exists",
-                )
-            raise
+        raise
+    invalidate_counts("campaign")
+    bump_table("campaign")
+
+    return CampaignResponse(
+        id=row["id"],
+        name=row["name"],
+        description=row["description"],
+        is_active=bool(row["is_active"]),
+        created_at=row["created_at"],
+        agent_count=0,
+    )
 
 
 @router.get("/{campaign_id}", response_model=CampaignDetailResponse)
 async def get_campaign(campaign_id: int):
     """Get a specific campaign by ID with assigned agents. Public endpoint."""
-    async with get_db() as db:
+    async with get_db(readonly=True) as db:
         cursor = await db.execute(
             "SELECT * FROM campaign WHERE id = ?",
             (campaign_id,),
@@ -181,52 +259,58 @@ async def update_campaign(
     campaign: CampaignUpdate,
 ):
     """Update an existing campaign. Admin only."""
-    async with get_db() as db:
+    async with get_db(readonly=True) as db:
         # Check if campaign exists
         cursor = await db.execute(
             "SELECT * FROM campaign WHERE id = ?",
             (campaign_id,),
         )
         existing = await cursor.fetchone()
-        
-        if not existing:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Campaign not found",
+    
+    if not existing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
+        )
+    
+    # Build update query
+    updates = []
+    params = []
+    
+    if campaign.name is not None:
+        updates.append("name = ?")
+        params.append(campaign.name)
+    if campaign.description is not None:
+        updates.append("description = ?")
+        params.append(campaign.description)
+    if campaign.is_active is not None:
+        updates.append("is_active = ?")
+        params.append(campaign.is_active)
+    
+    if updates:
+        params.append(campaign_id)
+
+        async def apply_update(db):
+            await db.execute(
+                f"UPDATE campaign SET {', '.join(updates)} WHERE id = ?",
+                params,
             )
-        
-        # Build update query
-        updates = []
-        params = []
-        
-        if campaign.name is not None:
-            updates.append("name = ?")
-            params.append(campaign.name)
-        if campaign.description is not None:
-            updates.append("description = ?")
-            params.append(campaign.description)
-        if campaign.is_active is not None:
-            updates.append("is_active = ?")
-            params.append(campaign.is_active)
-        
-        if updates:
-            try:
-                params.append(campaign_id)
-                await db.execute(
-                    f"UPDATE campaign SET {', '.join(updates)} WHERE id = ?",
-                    params,
+
+        try:
+            await run_write(apply_update)
+        except Exception as e:
+            if "UNIQUE constraint failed" in str(e):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A campaign with this name already exists",
                 )
-                await db.commit()
-            except Exception as e:
-                if "UNIQUE constraint failed" in str(e):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="A campaign with this name already exists",
-                    )
-                raise
-        
-        # Return updated campaign
-        return await get_campaign(campaign_id)
+            raise
+        invalidate_campaign(campaign_id)
+        invalidate_counts("campaign")
+        bump_table("campaign")
+    
+    # Return updated campaign
+    return await get_campaign(campaign_id)
 
 
 @router.delete("/{campaign_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -235,19 +319,18 @@ async def delete_campaign(
     campaign_id: int,
 ):
     """Delete a campaign. Admin only."""
-    async with get_db() as db:
-        cursor = await db.execute(
-            "SELECT id FROM campaign WHERE id = ?",
-            (campaign_id,),
+    async def remove_campaign(db):
+        cursor = await db.execute("DELETE FROM campaign WHERE id = ?", (campaign_id,))
+        return cursor.rowcount
+
+    if not await run_write(remove_campaign):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
         )
-        if not await cursor.fetchone():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Campaign not found",
-            )
-        
-        await db.execute("DELETE FROM campaign WHERE id = ?", (campaign_id,))
-        await db.commit()
+    invalidate_campaign(campaign_id)
+    invalidate_counts("campaign")
+    bump_table("campaign", "campaign_agent")
 
 
 @router.post("/{campaign_id}/agents", response_model=AssignmentResponse)
@@ -257,7 +340,7 @@ async def assign_agents_to_campaign(
     assignment: AgentAssignment,
 ):
     """Assign agents to a campaign. Admin only."""
-    async with get_db() as db:
+    async with get_db(readonly=True) as db:
         # Check if campaign exists
         cursor = await db.execute(
             "SELECT id FROM campaign WHERE id = ?",
@@ -268,7 +351,8 @@ async def assign_agents_to_campaign(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Campaign not found",
             )
-        
+    
+    async def insert_assignments(db):
         count = 0
         for agent_id in assignment.agent_ids:
             try:
@@ -283,12 +367,15 @@ async def assign_agents_to_campaign(
             except Exception:
                 # Skip duplicates
                 pass
-        
-        await db.commit()
-        return AssignmentResponse(
-            message=f"Assigned {count} agents to campaign",
-            count=count,
-        )
+        return count
+
+    count = await run_write(insert_assignments)
+    if count:
+        bump_table("campaign_agent")
+    return AssignmentResponse(
+        message=f"Assigned {count} agents to campaign",
+        count=count,
+    )
 
 
 @router.delete("/{campaign_id}/agents/{agent_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -298,7 +385,7 @@ async def remove_agent_from_campaign(
     agent_id: int,
 ):
     """Remove an agent assignment from a campaign. Admin only."""
-    async with get_db() as db:
+    async def remove_assignment(db):
         cursor = await db.execute(
             """
             DELETE FROM campaign_agent 
@@ -306,10 +393,11 @@ async def remove_agent_from_campaign(
             """,
             (agent_id, campaign_id),
         )
-        await db.commit()
-        
-        if cursor.rowcount == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Assignment not found",
-            )
+        return cursor.rowcount
+
+    if not await run_write(remove_assignment):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found",
+        )
+    bump_table("campaign_agent")
@@ -1,17 +1,134 @@
+import asyncio
+import json
+import os
+import time
 from datetime import date, timedelta
-from typing import Literal
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
 
-from app.services import get_campaign_kpis, get_daily_badge, get_badge_summary
-from app.models import KPIResponse, DailyBadgeResponse, BadgeSummaryResponse
+from app.auth import require_admin
+from app.services import (
+    get_campaign_kpis,
+    get_campaigns_kpis,
+    get_daily_badge,
+    get_badge_summary,
+    get_kpi_summary,
+    get_campaign_dashboard,
+    get_badge_tiers,
+    set_badge_tiers,
+    reset_badge_tiers,
+    BADGE_THRESHOLDS,
+    kpi_broadcaster,
+    campaign_version,
+    FastJSONResponse,
+    MsgPackResponse,
+    to_columnar,
+    wants_msgpack,
+    make_etag,
+    not_modified,
+    parse_kpi_row,
+    upsert_campaign_kpis,
+)
+from app.models import (
+    KPIResponse,
+    KPIBatchResponse,
+    KPIColumnarResponse,
+    DailyBadgeResponse,
+    BadgeSummaryResponse,
+    KPIRangeSummaryResponse,
+    DashboardResponse,
+    BadgeThresholdsResponse,
+    BadgeTiersUpdate,
+    BadgeTiersResponse,
+    KPIBulkResponse,
+    TokenData,
+)
 
 router = APIRouter(prefix="/api/kpis", tags=["kpis"])
 
+# Rows written per transaction by the bulk endpoint
+KPI_BULK_CHUNK_SIZE = int(os.getenv("KPI_BULK_CHUNK_SIZE", "1000"))
+# Cap on per-row errors echoed back, so a bad file can't blow up the response
+KPI_BULK_MAX_ERRORS = 1000
+# Comment lines sent on idle live streams so proxies keep them open
+KPI_STREAM_HEARTBEAT_SECONDS = float(os.getenv("KPI_STREAM_HEARTBEAT_SECONDS", "15"))
+# Serialize KPI series straight from the service output (no response_model
+# re-validation); set KPI_FAST_JSON=0 to go through Pydantic instead
+KPI_FAST_JSON = os.getenv("KPI_FAST_JSON", "1").lower() not in ("0", "false", "no")
+# Most campaign ids accepted by an explicit ?ids= list
+KPI_BATCH_MAX_IDS = int(os.getenv("KPI_BATCH_MAX_IDS", "1000"))
 
-@router.get("/campaigns/{campaign_id}", response_model=KPIResponse)
+
+def _parse_campaign_ids(ids: str) -> list[int] | None:
+    """Parse ?ids=1,2,3 (None for ?ids=all)."""
+    if ids.strip().lower() == "all":
+        return None
+    try:
+        campaign_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of campaign ids or 'all'",
+        )
+    if not campaign_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must not be empty",
+        )
+    if len(campaign_ids) > KPI_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {KPI_BATCH_MAX_IDS} campaign ids per request, use ids=all instead",
+        )
+    return campaign_ids
+
+
+@router.get("/campaigns", response_model=KPIBatchResponse)
+async def get_batch_kpis(
+    ids: str = Query(
+        ...,
+        description="Comma-separated campaign ids, or 'all'",
+    ),
+    start_date: date = Query(
+        default_factory=lambda: date.today() - timedelta(days=30),
+        description="Start date for KPI data",
+    ),
+    end_date: date = Query(
+        default_factory=date.today,
+        description="End date for KPI data",
+    ),
+    group_by: Literal["day", "week", "month"] = Query(
+        default="day",
+        description="How to group the KPI data",
+    ),
+):
+    """
+    Get KPI data for many campaigns in one request.
+
+    Public endpoint for wallboards and the admin overview.
+    Returns one KPI response per campaign, keyed by campaign id; unknown ids
+    are listed in not_found instead of failing the request.
+    """
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be before or equal to end_date",
+        )
+
+    campaign_ids = _parse_campaign_ids(ids)
+    result = await get_campaigns_kpis(campaign_ids, start_date, end_date, group_by)
+    if KPI_FAST_JSON:
+        return FastJSONResponse(result)
+    return result
+
+
+@router.get("/campaigns/{campaign_id}", response_model=KPIResponse | KPIColumnarResponse)
 async def get_kpis(
     campaign_id: int,
+    request: Request,
+    response: Response,
     start_date: date = Query(
         default_factory=lambda: date.today() - timedelta(days=30),
         description="Start date for KPI data",
@@ -24,12 +141,20 @@ async def get_kpis(
         default="day",
         description="How to group the KPI data",
     ),
+    series_format: Literal["rows", "columnar"] = Query(
+        default="rows",
+        alias="format",
+        description="rows: one object per period; columnar: parallel arrays",
+    ),
 ):
     """
     Get KPI data for a campaign.
     
     Public endpoint for customer dashboard.
     Returns hours worked per campaign per day, grouped by day, week, or month.
+    With `format=columnar` the series is sent as parallel arrays (dates as
+    start + step when dense, badges as integer codes). Clients sending
+    `Accept: application/msgpack` get MessagePack when msgpack is installed.
     """
     if start_date > end_date:
         raise HTTPException(
@@ -37,6 +162,23 @@ async def get_kpis(
             detail="start_date must be before or equal to end_date",
         )
     
+    msgpack_body = wants_msgpack(request)
+    etag = make_etag(
+        "kpis",
+        campaign_id,
+        campaign_version(campaign_id),
+        start_date,
+        end_date,
+        group_by,
+        series_format,
+        msgpack_body,
+    )
+    headers = {"ETag": etag, "Vary": "Accept"}
+    cached = not_modified(request, etag)
+    if cached is not None:
+        cached.headers["Vary"] = "Accept"
+        return cached
+
     result = await get_campaign_kpis(campaign_id, start_date, end_date, group_by)
     
     if result is None:
@@ -45,12 +187,85 @@ async def get_kpis(
             detail="Campaign not found",
         )
     
+    if series_format == "columnar":
+        result = to_columnar(result)
+    if msgpack_body:
+        return MsgPackResponse(result, headers=headers)
+    if KPI_FAST_JSON:
+        return FastJSONResponse(result, headers=headers)
+    response.headers.update(headers)
+    return result
+
+
+@router.get("/campaigns/{campaign_id}/dashboard", response_model=DashboardResponse)
+async def get_dashboard(
+    campaign_id: int,
+    request: Request,
+    response: Response,
+    start_date: date = Query(
+        default_factory=lambda: date.today() - timedelta(days=30),
+        description="Start date for KPI data and the badge summary",
+    ),
+    end_date: date = Query(
+        default_factory=date.today,
+        description="End date for KPI data and the badge summary",
+    ),
+    group_by: Literal["day", "week", "month"] = Query(
+        default="day",
+        description="How to group the KPI data",
+    ),
+    target_date: date = Query(
+        default_factory=date.today,
+        description="Date to get the badge for",
+    ),
+):
+    """
+    Get everything the customer dashboard shows in one request.
+
+    Public endpoint for customer dashboard.
+    Returns the KPI series (`kpis`), the badge for target_date (`badge`) and
+    the badge summary (`badge_summary`), each shaped like the response of its
+    own endpoint, computed together from a single scan of the daily data.
+    """
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be before or equal to end_date",
+        )
+
+    etag = make_etag(
+        "dashboard",
+        campaign_id,
+        campaign_version(campaign_id),
+        start_date,
+        end_date,
+        group_by,
+        target_date,
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    result = await get_campaign_dashboard(
+        campaign_id, start_date, end_date, group_by, target_date
+    )
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
+        )
+
+    if KPI_FAST_JSON:
+        return FastJSONResponse(result, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return result
 
 
 @router.get("/campaigns/{campaign_id}/badge", response_model=DailyBadgeResponse)
 async def get_badge(
     campaign_id: int,
+    request: Request,
+    response: Response,
     target_date: date = Query(
         default_factory=date.today,
         description="Date to get badge for",
@@ -62,6 +277,11 @@ async def get_badge(
     Public endpoint for customer dashboard gamification.
     Returns the badge earned and progress to next badge.
     """
+    etag = make_etag("badge", campaign_id, campaign_version(campaign_id), target_date)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
     result = await get_daily_badge(campaign_id, target_date)
     
     if result is None:
@@ -70,12 +290,64 @@ async def get_badge(
             detail="Campaign not found",
         )
     
+    response.headers["ETag"] = etag
     return result
 
 
+def _sse_event(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+@router.get("/campaigns/{campaign_id}/stream")
+async def stream_campaign_updates(campaign_id: int):
+    """
+    Stream live badge updates for today as Server-Sent Events.
+
+    Public endpoint for customer dashboards and wallboards.
+    Sends a `snapshot` event with today's badge info on connect, then a
+    `delta` event with only the changed fields whenever the day's hours or
+    badge change, and `gone` if the campaign is deleted. Viewers of the same
+    campaign share one upstream computation.
+    """
+    queue = await kpi_broadcaster.subscribe(campaign_id)
+    if queue is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
+        )
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(
+                        queue.get(), KPI_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event == "closed":
+                    return
+                if event == "gone":
+                    yield _sse_event("gone", {"campaign_id": campaign_id})
+                    return
+                yield _sse_event(event, payload)
+        finally:
+            await kpi_broadcaster.unsubscribe(campaign_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/campaigns/{campaign_id}/badge-summary", response_model=BadgeSummaryResponse)
 async def get_campaign_badge_summary(
     campaign_id: int,
+    request: Request,
+    response: Response,
     start_date: date = Query(
         default_factory=lambda: date.today() - timedelta(days=30),
         description="Start date for badge summary",
@@ -98,6 +370,13 @@ async def get_campaign_badge_summary(
             detail="start_date must be before or equal to end_date",
         )
     
+    etag = make_etag(
+        "badge_summary", campaign_id, campaign_version(campaign_id), start_date, end_date
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
     result = await get_badge_summary(campaign_id, start_date, end_date)
     
     if result is None:
@@ -106,6 +385,242 @@ async def get_campaign_badge_summary(
             detail="Campaign not found",
         )
     
+    response.headers["ETag"] = etag
+    return result
+
+
+@router.get("/campaigns/{campaign_id}/summary", response_model=KPIRangeSummaryResponse)
+async def get_campaign_summary(
+    campaign_id: int,
+    request: Request,
+    response: Response,
+    start_date: date = Query(
+        default_factory=lambda: date.today() - timedelta(days=30),
+        description="Start date for the summary",
+    ),
+    end_date: date = Query(
+        default_factory=date.today,
+        description="End date for the summary",
+    ),
+):
+    """
+    Get total and average daily hours for a campaign over a date range.
+
+    Public endpoint for dashboard summary cards. Answered from running
+    totals, so any range costs the same, from a week to several years.
+    """
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be before or equal to end_date",
+        )
+
+    etag = make_etag(
+        "summary", campaign_id, campaign_version(campaign_id), start_date, end_date
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    result = await get_kpi_summary(campaign_id, start_date, end_date)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
+        )
+
+    response.headers["ETag"] = etag
+    return result
+
+
+@router.get("/badge-thresholds", response_model=BadgeThresholdsResponse)
+async def get_default_badge_thresholds():
+    """
+    Get the default badge thresholds.
+
+    Public endpoint. Campaigns without an override use these; see
+    /campaigns/{campaign_id}/badge-tiers for the tiers of one campaign.
+    """
+    return {
+        "thresholds": BADGE_THRESHOLDS,
+        "description": (
+            "Minimum hours worked in a day to earn each badge. "
+            "Campaigns may override these tiers."
+        ),
+    }
+
+
+@router.get("/campaigns/{campaign_id}/badge-tiers", response_model=BadgeTiersResponse)
+async def get_campaign_badge_tiers(campaign_id: int):
+    """
+    Get the badge thresholds used for a campaign.
+
+    Public endpoint. `version` matches the `tier_version` of KPI and badge
+    responses, so clients only need to refetch the tiers when it changes.
+    """
+    result = await get_badge_tiers(campaign_id)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
+        )
+    return result
+
+
+@router.put("/campaigns/{campaign_id}/badge-tiers", response_model=BadgeTiersResponse)
+async def update_campaign_badge_tiers(
+    campaign_id: int,
+    tiers: BadgeTiersUpdate,
+    _: Annotated[TokenData, Depends(require_admin)],
+):
+    """
+    Override the badge thresholds for a campaign. Admin only.
+
+    All four tiers must be given in ascending order. Badges of the campaign
+    are recomputed with the new tiers from the next request on.
+    """
+    try:
+        result = await set_badge_tiers(campaign_id, tiers.model_dump())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
+        )
     return result
 
 
+@router.delete("/campaigns/{campaign_id}/badge-tiers", response_model=BadgeTiersResponse)
+async def delete_campaign_badge_tiers(
+    campaign_id: int,
+    _: Annotated[TokenData, Depends(require_admin)],
+):
+    """Remove a campaign's badge tier override, going back to the defaults. Admin only."""
+    result = await reset_badge_tiers(campaign_id)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
+        )
+    return result
+
+
+class _BulkLoader:
+    """Validates incoming KPI rows and writes them in chunked transactions."""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.pending: list[tuple[int, int, str, float]] = []
+        self.received = 0
+        self.upserted = 0
+        self.failed = 0
+        self.chunks = 0
+        self.errors: list[dict] = []
+
+    def error(self, row_number: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < KPI_BULK_MAX_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    async def add(self, row_number: int, item) -> None:
+        self.received += 1
+        if not isinstance(item, dict):
+            self.error(row_number, "row must be an object")
+            return
+        try:
+            campaign_id, day, hours = parse_kpi_row(
+                item.get("campaign_id"), item.get("date"), item.get("hours")
+            )
+        except ValueError as e:
+            self.error(row_number, str(e))
+            return
+        self.pending.append((row_number, campaign_id, day, hours))
+        if len(self.pending) >= self.chunk_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        result = await upsert_campaign_kpis(rows)
+        self.chunks += 1
+        self.upserted += result["upserted"]
+        for error in result["errors"]:
+            self.error(error["row"], error["error"])
+
+
+@router.post("/bulk", response_model=KPIBulkResponse)
+async def bulk_upsert_kpis(
+    _: Annotated[TokenData, Depends(require_admin)],
+    request: Request,
+):
+    """
+    Insert or update many KPI rows at once. Admin only.
+
+    Accepts a JSON array of `{"campaign_id", "date", "hours"}` objects, or the
+    same objects as NDJSON (`Content-Type: application/x-ndjson`), which is
+    streamed rather than buffered. Existing (campaign_id, date) rows are
+    overwritten. Rows are validated one by one and written in chunks, one
+    transaction per chunk. Invalid rows are reported by their 1-based
+    position (array index or line number) and do not stop the import.
+    """
+    started = time.perf_counter()
+    loader = _BulkLoader(KPI_BULK_CHUNK_SIZE)
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonl" in content_type:
+        line_number = 0
+        buffer = b""
+
+        async def handle_line(line: bytes) -> None:
+            if not line.strip():
+                return
+            try:
+                item = json.loads(line)
+            except ValueError:
+                loader.received += 1
+                loader.error(line_number, "invalid JSON")
+                return
+            await loader.add(line_number, item)
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                await handle_line(line)
+        if buffer:
+            line_number += 1
+            await handle_line(buffer)
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body must be a JSON array or NDJSON",
+            )
+        if not isinstance(items, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body must be a JSON array of KPI rows",
+            )
+        for row_number, item in enumerate(items, start=1):
+            await loader.add(row_number, item)
+
+    await loader.flush()
+    elapsed = time.perf_counter() - started
+    return KPIBulkResponse(
+        received=loader.received,
+        upserted=loader.upserted,
+        failed=loader.failed,
+        errors=loader.errors,
+        errors_truncated=loader.failed > len(loader.errors),
+        chunks=loader.chunks,
+        elapsed_ms=round(elapsed * 1000, 2),
+        rows_per_second=round(loader.received / elapsed, 1) if elapsed > 0 else 0.0,
+    )
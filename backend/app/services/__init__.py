@@ -3,9 +3,55 @@ from app.services.kpi_service import (
     calculate_badge,
     get_badge_threshold,
     get_next_badge_info,
+    BadgeLadder,
+    DEFAULT_BADGE_LADDER,
+    classify_hours,
+    BADGE_CODES,
+    to_columnar,
     get_campaign_kpis,
+    get_campaigns_kpis,
     get_daily_badge,
     get_badge_summary,
+    get_kpi_summary,
+    get_campaign_dashboard,
+    get_badge_tiers,
+    set_badge_tiers,
+    reset_badge_tiers,
+    invalidate_campaign,
+    kpi_cache,
+    kpi_flights,
+    parse_kpi_row,
+    upsert_campaign_kpis,
+)
+from app.services.badge_tiers import (
+    BADGE_TIER_NAMES,
+    BadgeTierStore,
+    badge_tier_store,
+    validate_thresholds,
+)
+from app.services.pagination import (
+    count_cache,
+    cached_count,
+    encode_cursor,
+    decode_cursor,
+    invalidate_counts,
+)
+from app.services.search import build_match_query, search_filter
+from app.services.live import KPIBroadcaster, kpi_broadcaster
+from app.services.serialization import (
+    FastJSONResponse,
+    MsgPackResponse,
+    json_dumps,
+    wants_msgpack,
+)
+from app.services.versions import (
+    bump_campaign,
+    bump_table,
+    campaign_version,
+    table_version,
+    make_etag,
+    etag_matches,
+    not_modified,
 )
 
 __all__ = [
@@ -13,7 +59,47 @@ __all__ = [
     "calculate_badge",
     "get_badge_threshold",
     "get_next_badge_info",
+    "BadgeLadder",
+    "DEFAULT_BADGE_LADDER",
+    "classify_hours",
+    "BADGE_CODES",
+    "to_columnar",
     "get_campaign_kpis",
+    "get_campaigns_kpis",
     "get_daily_badge",
     "get_badge_summary",
+    "get_kpi_summary",
+    "get_campaign_dashboard",
+    "get_badge_tiers",
+    "set_badge_tiers",
+    "reset_badge_tiers",
+    "invalidate_campaign",
+    "kpi_cache",
+    "kpi_flights",
+    "parse_kpi_row",
+    "upsert_campaign_kpis",
+    "BADGE_TIER_NAMES",
+    "BadgeTierStore",
+    "badge_tier_store",
+    "validate_thresholds",
+    "count_cache",
+    "cached_count",
+    "encode_cursor",
+    "decode_cursor",
+    "invalidate_counts",
+    "build_match_query",
+    "search_filter",
+    "KPIBroadcaster",
+    "kpi_broadcaster",
+    "FastJSONResponse",
+    "json_dumps",
+    "MsgPackResponse",
+    "wants_msgpack",
+    "bump_campaign",
+    "bump_table",
+    "campaign_version",
+    "table_version",
+    "make_etag",
+    "etag_matches",
+    "not_modified",
 ]
@@ -0,0 +1,182 @@
+import bisect
+import functools
+import os
+import time
+from collections import Counter
+from typing import Iterable
+
+from app.models import BadgeType
+
+# Default badge thresholds (hours per day), used by campaigns without overrides
+BADGE_THRESHOLDS = {
+    "platinum": 240,
+    "gold": 180,
+    "silver": 120,
+    "bronze": 60,
+}
+
+# Tier names in ascending order; an override must set all of them
+BADGE_TIER_NAMES = ("bronze", "silver", "gold", "platinum")
+
+# How long another process's badge_tier changes can go unnoticed
+BADGE_TIER_RELOAD_SECONDS = float(os.getenv("BADGE_TIER_RELOAD_SECONDS", "60"))
+
+
+class BadgeLadder:
+    """
+    Badge thresholds compiled for fast lookups.
+
+    Tiers are sorted by threshold so the badge for an hours value is a
+    bisect over the limits: the index returned is the number of thresholds
+    reached, 0 meaning no badge. classify() does this for a whole series.
+    The version identifies the tier configuration (0 for the defaults).
+    `thresholds` is keyed highest tier first, like BADGE_THRESHOLDS, so
+    responses list the tiers in the same order however they were given.
+    """
+
+    def __init__(self, thresholds: dict[str, float], version: int = 0):
+        tiers = sorted(thresholds.items(), key=lambda tier: tier[1])
+        self.badges: tuple[BadgeType, ...] = (None, *(name for name, _ in tiers))
+        self.limits: list[float] = [float(limit) for _, limit in tiers]
+        self.thresholds = {
+            name: float(thresholds[name])
+            for name in reversed(BADGE_TIER_NAMES) if name in thresholds
+        }
+        self.version = version
+        self._code = functools.partial(bisect.bisect_right, self.limits)
+
+    def code(self, hours: float) -> int:
+        """Index into self.badges of the badge earned with these hours."""
+        return self._code(hours)
+
+    def badge(self, hours: float) -> BadgeType:
+        return self.badges[self._code(hours)]
+
+    def threshold(self, badge: BadgeType) -> float:
+        """Hours needed for a badge (0 for no badge)."""
+        if badge is None:
+            return 0.0
+        return self.thresholds.get(badge, 0.0)
+
+    def next_info(self, hours: float) -> dict:
+        code = self._code(hours)
+        if code == len(self.limits):
+            return {"next_badge": None, "hours_to_next": 0.0}
+        return {
+            "next_badge": self.badges[code + 1],
+            "hours_to_next": round(self.limits[code] - hours, 1),
+        }
+
+    def classify(self, hours: Iterable[float], with_next: bool = False) -> dict:
+        """
+        Classify a whole hours series in one pass.
+
+        Returns the badge code of every value, the number of values per
+        badge ("none" for no badge) and, if asked, the hours still missing
+        to the next tier (0.0 at the top tier).
+        """
+        hours = hours if isinstance(hours, list) else list(hours)
+        codes = list(map(self._code, hours))
+        tallies = Counter(codes)
+        result = {
+            "codes": codes,
+            "counts": {
+                (badge or "none"): tallies.get(code, 0)
+                for code, badge in enumerate(self.badges)
+            },
+        }
+        if with_next:
+            top = len(self.limits)
+            limits = self.limits
+            result["hours_to_next"] = [
+                round(limits[code] - value, 1) if code < top else 0.0
+                for code, value in zip(codes, hours)
+            ]
+        return result
+
+
+DEFAULT_BADGE_LADDER = BadgeLadder(BADGE_THRESHOLDS)
+
+
+def validate_thresholds(thresholds: dict[str, float]) -> dict[str, float]:
+    """
+    Check a full set of tier thresholds for an override.
+
+    Every tier must be set, non-negative and strictly above the one below
+    it. Returns the thresholds in BADGE_TIER_NAMES order, or raises
+    ValueError describing the first problem found.
+    """
+    missing = [name for name in BADGE_TIER_NAMES if name not in thresholds]
+    if missing:
+        raise ValueError(f"Missing thresholds for: {', '.join(missing)}")
+    previous_name, previous = None, None
+    for name in BADGE_TIER_NAMES:
+        value = thresholds[name]
+        if value < 0:
+            raise ValueError(f"{name} threshold must not be negative")
+        if previous is not None and value <= previous:
+            raise ValueError(f"{name} threshold must be above {previous_name} ({previous:g})")
+        previous_name, previous = name, value
+    return {name: thresholds[name] for name in BADGE_TIER_NAMES}
+
+
+class BadgeTierStore:
+    """
+    Every badge_tier override compiled into a BadgeLadder, held in memory.
+
+    The whole table is loaded with one query and kept until invalidate() is
+    called (after a change in this process) or reload_seconds pass (to pick
+    up changes made by other processes), so resolving a campaign's ladder is
+    normally a dict lookup and never a query per request.
+    """
+
+    def __init__(self, reload_seconds: float = BADGE_TIER_RELOAD_SECONDS):
+        self.reload_seconds = reload_seconds
+        self._ladders: dict[int, BadgeLadder] = {}
+        self._loaded_at: float | None = None
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        """Reload the overrides on next use."""
+        self._generation += 1
+        self._loaded_at = None
+
+    async def _load(self, db) -> None:
+        generation = self._generation
+        started = time.monotonic()
+        cursor = await db.execute(
+            "SELECT campaign_id, badge, min_hours, version FROM badge_tier "
+            "ORDER BY campaign_id, min_hours DESC"
+        )
+        tiers: dict[int, dict] = {}
+        versions: dict[int, int] = {}
+        for row in await cursor.fetchall():
+            tiers.setdefault(row["campaign_id"], {})[row["badge"]] = row["min_hours"]
+            versions[row["campaign_id"]] = max(versions.get(row["campaign_id"], 0), row["version"])
+        ladders = {
+            campaign_id: BadgeLadder(thresholds, versions[campaign_id])
+            for campaign_id, thresholds in tiers.items()
+        }
+        # An invalidate() while the query ran means the rows may be stale
+        if generation == self._generation:
+            self._ladders = ladders
+            self._loaded_at = started
+
+    def _stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.reload_seconds
+        )
+
+    async def ladders(self, db) -> dict[int, BadgeLadder]:
+        """Overridden ladders keyed by campaign id, loading them if needed."""
+        if self._stale():
+            await self._load(db)
+        return self._ladders
+
+    async def ladder(self, db, campaign_id: int) -> BadgeLadder:
+        """The ladder a campaign's badges are computed with."""
+        return (await self.ladders(db)).get(campaign_id, DEFAULT_BADGE_LADDER)
+
+
+badge_tier_store = BadgeTierStore()
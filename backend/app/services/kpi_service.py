@@ -1,30 +1,106 @@
 import calendar
-from datetime import date
-from typing import Literal
+import functools
+import math
+import os
+import time
+from datetime import date, timedelta
+from typing import Callable, Iterable, Literal
 
-from app.database import get_db
+from app.database import (
+    get_db,
+    rebuild_cumulative_since,
+    run_write,
+    CUMULATIVE_TABLE,
+    ROLLUP_TABLES,
+)
 from app.models import BadgeType
+from app.services.badge_tiers import (
+    BADGE_THRESHOLDS,
+    BadgeLadder,
+    DEFAULT_BADGE_LADDER,
+    badge_tier_store,
+    validate_thresholds,
+)
+from app.services.cache import SingleFlight, TTLCache
+from app.services.versions import bump_campaign
 
-# Badge thresholds (hours per day)
-BADGE_THRESHOLDS = {
-    "platinum": 240,
-    "gold": 180,
-    "silver": 120,
-    "bronze": 60,
-}
+# Integer codes for badges in columnar responses (the code is the index)
+BADGE_CODES = (None, "bronze", "silver", "gold", "platinum")
+_BADGE_CODE = {badge: code for code, badge in enumerate(BADGE_CODES)}
+
+# Campaign ids per IN (...) list, well under SQLite's bound-parameter limit
+MAX_CAMPAIGNS_PER_QUERY = 500
+
+# Response cache for the public dashboard endpoints, tagged by campaign id
+kpi_cache = TTLCache(
+    max_entries=int(os.getenv("KPI_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("KPI_CACHE_TTL_SECONDS", "30")),
+)
+
+# Identical concurrent cache misses share one computation
+kpi_flights = SingleFlight()
+
+# Upserts of at least this many rows that go back before a campaign's last
+# KPI day recompute the running totals from the earliest day written, in
+# one pass, instead of shifting the later days through the per-row triggers
+KPI_CUMULATIVE_REBUILD_ROWS = int(os.getenv("KPI_CUMULATIVE_REBUILD_ROWS", "200"))
+
+
+def cached_response(kind: str):
+    """
+    Cache a campaign-scoped service result in kpi_cache.
+
+    The key is (kind, campaign_id, *args), e.g. campaign id, start, end and
+    group_by. Missing campaigns (None) are not cached. Concurrent misses for
+    the same key share one computation through kpi_flights; the campaign's
+    cache version is part of the flight key, so calls made after an
+    invalidation never join a computation that started before it.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(campaign_id: int, *args, **kwargs):
+            key = (kind, campaign_id, *args, *sorted(kwargs.items()))
+            result = kpi_cache.get(key)
+            if result is not None:
+                return result
+            versions = kpi_cache.tag_versions((campaign_id,))
+
+            async def compute():
+                result = await fn(campaign_id, *args, **kwargs)
+                if result is not None:
+                    kpi_cache.set(key, result, tags=(campaign_id,), versions=versions)
+                return result
+
+            return await kpi_flights.do((key, versions[campaign_id]), compute)
+        return wrapper
+    return decorator
+
+
+# Callbacks told about every invalidated campaign (e.g. the live stream)
+_change_listeners: list[Callable[[int], None]] = []
+
+
+def add_change_listener(listener: Callable[[int], None]) -> None:
+    """Register a callback run with the campaign id whenever it is invalidated."""
+    _change_listeners.append(listener)
+
+
+def invalidate_campaign(campaign_id: int) -> None:
+    """Drop cached responses after a campaign's KPI rows or metadata change."""
+    kpi_cache.invalidate(campaign_id)
+    bump_campaign(campaign_id)
+    for listener in _change_listeners:
+        listener(campaign_id)
+
+
+def classify_hours(hours: Iterable[float], with_next: bool = False) -> dict:
+    """Classify a series of hours values against BADGE_THRESHOLDS, see BadgeLadder.classify."""
+    return DEFAULT_BADGE_LADDER.classify(hours, with_next)
 
 
 def calculate_badge(hours: float) -> BadgeType:
     """Calculate badge based on hours worked."""
-    if hours >= BADGE_THRESHOLDS["platinum"]:
-        return "platinum"
-    elif hours >= BADGE_THRESHOLDS["gold"]:
-        return "gold"
-    elif hours >= BADGE_THRESHOLDS["silver"]:
-        return "silver"
-    elif hours >= BADGE_THRESHOLDS["bronze"]:
-        return "bronze"
-    return None
+    return DEFAULT_BADGE_LADDER.badge(hours)
 
 
 def get_badge_threshold(badge: BadgeType) -> int:
@@ -36,30 +112,221 @@ def get_badge_threshold(badge: BadgeType) -> int:
 
 def get_next_badge_info(hours: float) -> dict:
     """Get information about the next badge tier."""
-    if hours >= BADGE_THRESHOLDS["platinum"]:
-        return {"next_badge": None, "hours_to_next": 0}
-    elif hours >= BADGE_THRESHOLDS["gold"]:
-        return {
-            "next_badge": "platinum",
-            "hours_to_next": round(BADGE_THRESHOLDS["platinum"] - hours, 1),
-        }
-    elif hours >= BADGE_THRESHOLDS["silver"]:
-        return {
-            "next_badge": "gold",
-            "hours_to_next": round(BADGE_THRESHOLDS["gold"] - hours, 1),
-        }
-    elif hours >= BADGE_THRESHOLDS["bronze"]:
-        return {
-            "next_badge": "silver",
-            "hours_to_next": round(BADGE_THRESHOLDS["silver"] - hours, 1),
-        }
+    return DEFAULT_BADGE_LADDER.next_info(hours)
+
+
+def _average_hours(total_hours: float, days: int) -> float:
+    """
+    Average daily hours of a period, the value its badge is classified on.
+
+    Rounded to 6 places so that the same days summed in a different order
+    (rollup triggers, SQL SUM, Python) can't land on different sides of a
+    tier threshold; hours are recorded with far fewer decimals than that.
+    """
+    return round(total_hours / max(days, 1), 6)
+
+
+def _period_start(d: date, group_by: Literal["week", "month"]) -> date:
+    """First day of the week (Monday) or month containing d."""
+    if group_by == "week":
+        return d - timedelta(days=d.weekday())
+    return d.replace(day=1)
+
+
+def _next_period_start(d: date, group_by: Literal["week", "month"]) -> date:
+    """First day of the period following the one that starts at d."""
+    if group_by == "week":
+        return d + timedelta(days=7)
+    _, month_days = calendar.monthrange(d.year, d.month)
+    return d + timedelta(days=month_days)
+
+
+async def _fetch_day_series(
+    db,
+    campaign_ids: list[int],
+    start_date: date,
+    end_date: date,
+) -> list:
+    """Get per-day totals for one or more campaigns, ordered by campaign and date."""
+    placeholders = ", ".join("?" * len(campaign_ids))
+    cursor = await db.execute(
+        f"""
+        SELECT 
+            campaign_id,
+            date as period_date,
+            SUM(hours) as total_hours,
+            COUNT(DISTINCT date) as days_in_period
+        FROM campaign_kpi
+        WHERE campaign_id IN ({placeholders})
+          AND date BETWEEN ? AND ?
+        GROUP BY campaign_id, date
+        ORDER BY campaign_id, period_date
+        """,
+        (*campaign_ids, start_date.isoformat(), end_date.isoformat()),
+    )
+    return await cursor.fetchall()
+
+
+async def _fetch_rollup_periods(
+    db,
+    campaign_ids: list[int],
+    start_date: date,
+    end_date: date,
+    group_by: Literal["week", "month"],
+) -> list:
+    """
+    Get per-period totals for week/month grouped series of one or more campaigns.
+
+    Periods that lie entirely inside the range come straight from the rollup
+    table. Only the partial periods at either edge of the range are summed
+    from daily rows, so the cost grows with the number of periods rather than
+    the number of days.
+    """
+    table, period_expr = ROLLUP_TABLES[group_by]
+    date_expr = period_expr.format(col="date")
+    placeholders = ", ".join("?" * len(campaign_ids))
+
+    # Full periods are those starting in [first_full, after_last_full)
+    first_full = _period_start(start_date, group_by)
+    if first_full < start_date:
+        first_full = _next_period_start(first_full, group_by)
+    after_last_full = _period_start(end_date + timedelta(days=1), group_by)
+
+    if first_full >= after_last_full:
+        # No complete period in range, aggregate the daily rows directly
+        first_full = after_last_full = end_date + timedelta(days=1)
+
+    query = f"""
+        SELECT campaign_id,
+               period_start as period_date,
+               total_hours,
+               days_count as days_in_period
+        FROM {table}
+        WHERE campaign_id IN ({placeholders})
+          AND period_start >= ? AND period_start < ?
+        UNION ALL
+        SELECT campaign_id,
+               {date_expr} as period_date,
+               SUM(hours) as total_hours,
+               COUNT(DISTINCT date) as days_in_period
+        FROM campaign_kpi
+        WHERE campaign_id IN ({placeholders})
+          AND ((date >= ? AND date < ?) OR (date >= ? AND date <= ?))
+        GROUP BY campaign_id, {date_expr}
+        ORDER BY campaign_id, period_date
+    """
+    cursor = await db.execute(
+        query,
+        (
+            *campaign_ids,
+            first_full.isoformat(),
+            after_last_full.isoformat(),
+            *campaign_ids,
+            start_date.isoformat(),
+            first_full.isoformat(),
+            after_last_full.isoformat(),
+            end_date.isoformat(),
+        ),
+    )
+    return await cursor.fetchall()
+
+
+async def _fetch_series(
+    db,
+    campaign_ids: list[int],
+    start_date: date,
+    end_date: date,
+    group_by: Literal["day", "week", "month"],
+) -> dict[int, list]:
+    """Grouped KPI rows for each of the given campaigns, keyed by campaign id."""
+    series = {campaign_id: [] for campaign_id in campaign_ids}
+    for offset in range(0, len(campaign_ids), MAX_CAMPAIGNS_PER_QUERY):
+        chunk = campaign_ids[offset:offset + MAX_CAMPAIGNS_PER_QUERY]
+        if group_by == "day":
+            rows = await _fetch_day_series(db, chunk, start_date, end_date)
+        else:
+            rows = await _fetch_rollup_periods(db, chunk, start_date, end_date, group_by)
+        for row in rows:
+            series[row["campaign_id"]].append(row)
+    return series
+
+
+def _build_kpi_response(
+    campaign,
+    rows: list,
+    start_date: date,
+    end_date: date,
+    group_by: Literal["day", "week", "month"],
+    ladder: BadgeLadder = DEFAULT_BADGE_LADDER,
+) -> dict:
+    """Turn a campaign row and its grouped KPI rows into a KPIResponse payload."""
+    data = []
+    total_hours = 0.0
+    total_days = 0
+    
+    # Determine expected days per period for completeness check
+    if group_by == "week":
+        expected_days = 7
+    elif group_by == "month":
+        expected_days = None  # Varies by month, will check per-period
     else:
-        return {
-            "next_badge": "bronze",
-            "hours_to_next": round(BADGE_THRESHOLDS["bronze"] - hours, 1),
-        }
+        expected_days = 1
+    
+    # Badges are based on average daily hours within each period
+    badge_codes = ladder.classify(
+        _average_hours(row["total_hours"], row["days_in_period"]) for row in rows
+    )["codes"]
+    badges = ladder.badges
+    
+    for row, badge_code in zip(rows, badge_codes):
+        hours = row["total_hours"]
+        days_in_period = row["days_in_period"]
+        badge = badges[badge_code]
+        
+        # Check if this is a complete period
+        if group_by == "month":
+            # Calculate expected days for this specific month
+            period_date = date.fromisoformat(row["period_date"])
+            _, month_days = calendar.monthrange(period_date.year, period_date.month)
+            is_complete = days_in_period >= month_days
+        elif expected_days:
+            is_complete = days_in_period >= expected_days
+        else:
+            is_complete = True
+        
+        data.append({
+            "date": row["period_date"],
+            "hours": round(hours, 1),
+            "badge": badge,
+            "days_in_period": days_in_period,
+            "is_complete": is_complete,
+        })
+        
+        total_hours += hours
+        total_days += days_in_period
+    
+    return {
+        "campaign": {
+            "id": campaign["id"],
+            "name": campaign["name"],
+            "is_active": bool(campaign["is_active"]),
+        },
+        "period": {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "group_by": group_by,
+        },
+        "data": data,
+        "summary": {
+            "total_hours": round(total_hours, 1),
+            "average_daily_hours": round(_average_hours(total_hours, total_days), 1),
+            "days_with_data": total_days,
+        },
+        "tier_version": ladder.version,
+    }
 
 
+@cached_response("kpis")
 async def get_campaign_kpis(
     campaign_id: int,
     start_date: date,
@@ -67,7 +334,7 @@ async def get_campaign_kpis(
     group_by: Literal["day", "week", "month"] = "day",
 ) -> dict | None:
     """Get KPI data for a campaign with grouping."""
-    async with get_db() as db:
+    async with get_db(readonly=True) as db:
         # Verify campaign exists
         cursor = await db.execute(
             "SELECT id, name, is_active FROM campaign WHERE id = ?",
@@ -77,98 +344,225 @@ async def get_campaign_kpis(
         if not campaign:
             return None
         
-        # Build grouping expression based on group_by parameter
-        if group_by == "day":
-            date_expr = "date"
-        elif group_by == "week":
-            # Start of week (Monday)
-            date_expr = "date(date, 'weekday 0', '-6 days')"
-        else:  # month
-            date_expr = "date(date, 'start of month')"
-        
-        # Query includes count of days in each period for average calculation
-        query = f"""
-            SELECT 
-                {date_expr} as period_date,
-                SUM(hours) as total_hours,
-                COUNT(DISTINCT date) as days_in_period
-            FROM campaign_kpi
-            WHERE campaign_id = ?
-              AND date BETWEEN ? AND ?
-            GROUP BY {date_expr}
-            ORDER BY period_date
-        """
-        
-        cursor = await db.execute(
-            query,
-            (campaign_id, start_date.isoformat(), end_date.isoformat()),
+        series = await _fetch_series(db, [campaign_id], start_date, end_date, group_by)
+        ladder = await badge_tier_store.ladder(db, campaign_id)
+        return _build_kpi_response(
+            campaign, series[campaign_id], start_date, end_date, group_by, ladder
         )
-        rows = await cursor.fetchall()
-        
-        data = []
-        total_hours = 0
-        total_days = 0
-        
-        # Determine expected days per period for completeness check
-        if group_by == "week":
-            expected_days = 7
-        elif group_by == "month":
-            expected_days = None  # Varies by month, will check per-period
+
+
+async def get_campaigns_kpis(
+    campaign_ids: list[int] | None,
+    start_date: date,
+    end_date: date,
+    group_by: Literal["day", "week", "month"] = "day",
+) -> dict:
+    """
+    Get KPI data for many campaigns at once (all campaigns if ids is None).
+
+    Shares kpi_cache entries with get_campaign_kpis; the campaigns that miss
+    the cache are fetched together with one grouped query. Returns the
+    responses keyed by campaign id plus the requested ids that don't exist.
+    """
+    async with get_db(readonly=True) as db:
+        if campaign_ids is None:
+            cursor = await db.execute(
+                "SELECT id, name, is_active FROM campaign ORDER BY id"
+            )
         else:
-            expected_days = 1
-        
-        for row in rows:
-            hours = row["total_hours"]
-            days_in_period = row["days_in_period"]
-            # Calculate badge based on average daily hours within the period
-            avg_daily_hours = hours / max(days_in_period, 1)
-            badge = calculate_badge(avg_daily_hours)
-            
-            # Check if this is a complete period
-            if group_by == "month":
-                # Calculate expected days for this specific month
-                period_date = date.fromisoformat(row["period_date"])
-                _, month_days = calendar.monthrange(period_date.year, period_date.month)
-                is_complete = days_in_period >= month_days
-            elif expected_days:
-                is_complete = days_in_period >= expected_days
+            campaign_ids = sorted(set(campaign_ids))
+            placeholders = ", ".join("?" * len(campaign_ids))
+            cursor = await db.execute(
+                f"SELECT id, name, is_active FROM campaign WHERE id IN ({placeholders}) ORDER BY id",
+                campaign_ids,
+            )
+        campaigns = {row["id"]: row for row in await cursor.fetchall()}
+
+        results = {}
+        misses = []
+        for campaign_id in campaigns:
+            cached = kpi_cache.get(("kpis", campaign_id, start_date, end_date, group_by))
+            if cached is not None:
+                results[campaign_id] = cached
             else:
-                is_complete = True
-            
-            data.append({
-                "date": row["period_date"],
-                "hours": round(hours, 1),
-                "badge": badge,
-                "days_in_period": days_in_period,
-                "is_complete": is_complete,
-            })
-            
-            total_hours += hours
-            total_days += days_in_period
-        
-        return {
-            "campaign": {
-                "id": campaign["id"],
-                "name": campaign["name"],
-                "is_active": bool(campaign["is_active"]),
-            },
-            "period": {
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-                "group_by": group_by,
-            },
-            "data": data,
-            "summary": {
-                "total_hours": round(total_hours, 1),
-                "average_daily_hours": round(total_hours / max(total_days, 1), 1),
-                "days_with_data": total_days,
-            },
-        }
+                misses.append(campaign_id)
+
+        if misses:
+            versions = kpi_cache.tag_versions(misses)
+            series = await _fetch_series(db, misses, start_date, end_date, group_by)
+            ladders = await badge_tier_store.ladders(db)
+            for campaign_id in misses:
+                result = _build_kpi_response(
+                    campaigns[campaign_id],
+                    series[campaign_id],
+                    start_date,
+                    end_date,
+                    group_by,
+                    ladders.get(campaign_id, DEFAULT_BADGE_LADDER),
+                )
+                kpi_cache.set(
+                    ("kpis", campaign_id, start_date, end_date, group_by),
+                    result,
+                    tags=(campaign_id,),
+                    versions={campaign_id: versions[campaign_id]},
+                )
+                results[campaign_id] = result
+
+    not_found = [] if campaign_ids is None else [
+        campaign_id for campaign_id in campaign_ids if campaign_id not in campaigns
+    ]
+    return {
+        "period": {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "group_by": group_by,
+        },
+        "campaigns": {campaign_id: results[campaign_id] for campaign_id in campaigns},
+        "not_found": not_found,
+    }
+
+
+async def _fetch_range_totals(db, campaign_id: int, start_date: date, end_date: date):
+    """
+    Get a campaign row with its total hours and days with data in a range.
+
+    Subtracts the running totals of campaign_kpi_cumulative at the last KPI
+    day before start_date from those at the last one up to end_date. Both
+    are primary key lookups, so the cost is the same for a week or years.
+    The difference is rounded to 6 places, like _average_hours, so it
+    doesn't carry the float error of subtracting two large totals: the
+    result matches a SUM over the range. Returns None if the campaign
+    doesn't exist.
+    """
+    cursor = await db.execute(
+        f"""
+        SELECT
+            c.id,
+            c.name,
+            c.is_active,
+            round(
+                COALESCE(upto_end.cum_hours, 0) - COALESCE(before_start.cum_hours, 0), 6
+            ) as total_hours,
+            COALESCE(upto_end.cum_days, 0) - COALESCE(before_start.cum_days, 0) as total_days
+        FROM campaign c
+        LEFT JOIN (
+            SELECT cum_hours, cum_days FROM {CUMULATIVE_TABLE}
+            WHERE campaign_id = ? AND date <= ?
+            ORDER BY date DESC LIMIT 1
+        ) AS upto_end ON 1
+        LEFT JOIN (
+            SELECT cum_hours, cum_days FROM {CUMULATIVE_TABLE}
+            WHERE campaign_id = ? AND date < ?
+            ORDER BY date DESC LIMIT 1
+        ) AS before_start ON 1
+        WHERE c.id = ?
+        """,
+        (
+            campaign_id,
+            end_date.isoformat(),
+            campaign_id,
+            start_date.isoformat(),
+            campaign_id,
+        ),
+    )
+    return await cursor.fetchone()
 
 
+@cached_response("summary")
+async def get_kpi_summary(
+    campaign_id: int,
+    start_date: date,
+    end_date: date,
+) -> dict | None:
+    """
+    Get total and average daily hours for a campaign over a date range.
+
+    Served from running totals rather than the KPI rows themselves, so
+    summary cards cost the same whatever the range (see _fetch_range_totals).
+    """
+    async with get_db(readonly=True) as db:
+        row = await _fetch_range_totals(db, campaign_id, start_date, end_date)
+        if not row:
+            return None
+        ladder = await badge_tier_store.ladder(db, campaign_id)
+
+    total_days = row["total_days"]
+    total_hours = round(row["total_hours"], 1)
+    average_daily_hours = round(_average_hours(row["total_hours"], total_days), 1)
+    return {
+        "campaign": {
+            "id": row["id"],
+            "name": row["name"],
+            "is_active": bool(row["is_active"]),
+        },
+        "period": {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+        },
+        "summary": {
+            "total_hours": total_hours,
+            "average_daily_hours": average_daily_hours,
+            "days_with_data": total_days,
+        },
+        "average_badge": ladder.badge(average_daily_hours),
+        "tier_version": ladder.version,
+    }
+
+
+def to_columnar(result: dict) -> dict:
+    """
+    Re-shape a KPIResponse payload into parallel arrays.
+
+    Dates are sent as `start` plus the grouping as `step` when every period
+    follows the previous one, otherwise as a `dates` array. Badges become
+    BADGE_CODES indexes. For daily series days_in_period and is_complete
+    are always 1/true and are sent as null.
+    """
+    group_by = result["period"]["group_by"]
+    points = result["data"]
+    dates = [point["date"] for point in points]
+
+    dense = True
+    for previous, current in zip(dates, dates[1:]):
+        previous = date.fromisoformat(previous)
+        expected = (
+            previous + timedelta(days=1)
+            if group_by == "day"
+            else _next_period_start(previous, group_by)
+        )
+        if current != expected.isoformat():
+            dense = False
+            break
+
+    series = {
+        "length": len(points),
+        "start": dates[0] if dates else None,
+        "step": group_by if dense else None,
+        "dates": None if dense else dates,
+        "hours": [point["hours"] for point in points],
+        "badge": [_BADGE_CODE[point["badge"]] for point in points],
+    }
+    if group_by == "day":
+        series["days_in_period"] = series["is_complete"] = None
+    else:
+        series["days_in_period"] = [point["days_in_period"] for point in points]
+        series["is_complete"] = [point["is_complete"] for point in points]
+
+    return {
+        "campaign": result["campaign"],
+        "period": result["period"],
+        "format": "columnar",
+        "badge_codes": list(BADGE_CODES),
+        "series": series,
+        "summary": result["summary"],
+        "tier_version": result["tier_version"],
+    }
+
+
+@cached_response("badge")
 async def get_daily_badge(campaign_id: int, target_date: date) -> dict | None:
     """Get badge information for a specific day."""
-    async with get_db() as db:
+    async with get_db(readonly=True) as db:
         # Verify campaign exists
         cursor = await db.execute(
             "SELECT id, name FROM campaign WHERE id = ?",
@@ -189,20 +583,53 @@ async def get_daily_badge(campaign_id: int, target_date: date) -> dict | None:
         )
         row = await cursor.fetchone()
         hours = row["total_hours"] or 0
+        ladder = await badge_tier_store.ladder(db, campaign_id)
         
-        badge = calculate_badge(hours)
-        next_info = get_next_badge_info(hours)
-        
-        return {
-            "date": target_date.isoformat(),
-            "hours": round(hours, 1),
-            "badge": badge,
-            "threshold": get_badge_threshold(badge),
-            "next_badge": next_info["next_badge"],
-            "hours_to_next": next_info["hours_to_next"],
-        }
+        return _build_daily_badge(target_date, hours, ladder)
+
 
+def _build_daily_badge(target_date: date, hours: float, ladder: BadgeLadder) -> dict:
+    """Turn a day's hours into a DailyBadgeResponse payload."""
+    badge = ladder.badge(hours)
+    next_info = ladder.next_info(hours)
+    
+    return {
+        "date": target_date.isoformat(),
+        "hours": round(hours, 1),
+        "badge": badge,
+        "threshold": ladder.threshold(badge),
+        "next_badge": next_info["next_badge"],
+        "hours_to_next": next_info["hours_to_next"],
+        "tier_version": ladder.version,
+    }
+
+
+def badge_count_columns(ladder: BadgeLadder, column: str = "hours") -> tuple[str, list]:
+    """
+    SQL select-list counting values per badge tier, generated from a ladder.
+
+    Produces one `SUM(CASE ...) AS tier_<code>` column per entry of
+    ladder.badges with the tier bounds as bound parameters, so the SQL
+    always agrees with calculate_badge (>= lower bound, < next threshold).
+    """
+    columns = []
+    params = []
+    limits = ladder.limits
+    for code in range(len(ladder.badges)):
+        conditions = [f"{column} IS NOT NULL"]
+        if code > 0:
+            conditions.append(f"{column} >= ?")
+            params.append(limits[code - 1])
+        if code < len(limits):
+            conditions.append(f"{column} < ?")
+            params.append(limits[code])
+        columns.append(
+            f"SUM(CASE WHEN {' AND '.join(conditions)} THEN 1 ELSE 0 END) AS tier_{code}"
+        )
+    return ",\n".join(columns), params
 
+
+@cached_response("badge_summary")
 async def get_badge_summary(
     campaign_id: int,
     start_date: date,
@@ -212,10 +639,102 @@ async def get_badge_summary(
     Get badge summary for a campaign over a date range.
     
     Always calculates badges from daily data regardless of how the chart is grouped.
-    Returns the count of each badge type earned per day.
+    Returns the count of each badge type earned per day. Everything is
+    aggregated in SQLite, so only one row comes back however long the range.
     """
-    async with get_db() as db:
-        # Verify campaign exists
+    async with get_db(readonly=True) as db:
+        ladder = await badge_tier_store.ladder(db, campaign_id)
+        tier_columns, tier_params = badge_count_columns(ladder, "k.hours")
+        
+        # One row per campaign: the LEFT JOIN keeps campaigns without data in
+        # range, and UNIQUE(campaign_id, date) makes each kpi row one day
+        cursor = await db.execute(
+            f"""
+            SELECT 
+                c.id,
+                c.name,
+                c.is_active,
+                COUNT(k.id) as total_days,
+                TOTAL(k.hours) as total_hours,
+                {tier_columns}
+            FROM campaign c
+            LEFT JOIN campaign_kpi k
+              ON k.campaign_id = c.id
+             AND k.date BETWEEN ? AND ?
+            WHERE c.id = ?
+            GROUP BY c.id
+            """,
+            (*tier_params, start_date.isoformat(), end_date.isoformat(), campaign_id),
+        )
+        row = await cursor.fetchone()
+        if not row:
+            return None
+    
+    badge_counts = {
+        (badge or "none"): row[f"tier_{code}"] or 0
+        for code, badge in enumerate(ladder.badges)
+    }
+    return _build_badge_summary(
+        row, start_date, end_date, ladder, badge_counts, row["total_days"], row["total_hours"]
+    )
+
+
+def _build_badge_summary(
+    campaign,
+    start_date: date,
+    end_date: date,
+    ladder: BadgeLadder,
+    badge_counts: dict[str, int],
+    total_days: int,
+    total_hours: float,
+) -> dict:
+    """Turn per-tier day counts and range totals into a BadgeSummaryResponse payload."""
+    # Highest tier first, as in BadgeBreakdown
+    badge_counts = {
+        (badge or "none"): badge_counts[badge or "none"] for badge in reversed(ladder.badges)
+    }
+    average_daily_hours = round(_average_hours(total_hours, total_days), 1)
+    average_badge = ladder.badge(average_daily_hours)
+    
+    return {
+        "campaign": {
+            "id": campaign["id"],
+            "name": campaign["name"],
+            "is_active": bool(campaign["is_active"]),
+        },
+        "period": {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+        },
+        "badge_breakdown": badge_counts,
+        "total_days": total_days,
+        "total_hours": round(total_hours, 1),
+        "average_daily_hours": average_daily_hours,
+        "average_badge": average_badge,
+        "tier_version": ladder.version,
+    }
+
+
+@cached_response("dashboard")
+async def get_campaign_dashboard(
+    campaign_id: int,
+    start_date: date,
+    end_date: date,
+    group_by: Literal["day", "week", "month"],
+    target_date: date,
+) -> dict | None:
+    """
+    Get the KPI series, badge summary and a day's badge in one go.
+
+    Everything comes from one connection, one campaign lookup and one scan
+    of the range's daily rows: the badge summary is classified from them,
+    and target_date's hours are read from them when it falls in the range.
+    Week and month series go through the same rollup reader as
+    get_campaign_kpis (one more query), so both endpoints always agree.
+    The parts match get_campaign_kpis, get_badge_summary and
+    get_daily_badge.
+    """
+    async with get_db(readonly=True) as db:
         cursor = await db.execute(
             "SELECT id, name, is_active FROM campaign WHERE id = ?",
             (campaign_id,),
@@ -223,51 +742,223 @@ async def get_badge_summary(
         campaign = await cursor.fetchone()
         if not campaign:
             return None
-        
-        # Always query daily data for accurate badge calculation
-        query = """
-            SELECT 
-                date,
-                SUM(hours) as total_hours
-            FROM campaign_kpi
-            WHERE campaign_id = ?
-              AND date BETWEEN ? AND ?
-            GROUP BY date
-            ORDER BY date
-        """
-        
+        ladder = await badge_tier_store.ladder(db, campaign_id)
+        days = await _fetch_day_series(db, [campaign_id], start_date, end_date)
+
+        if start_date <= target_date <= end_date:
+            target_day = target_date.isoformat()
+            target_hours = next(
+                (row["total_hours"] for row in days if row["period_date"] == target_day), 0.0
+            )
+        else:
+            cursor = await db.execute(
+                "SELECT SUM(hours) FROM campaign_kpi WHERE campaign_id = ? AND date = ?",
+                (campaign_id, target_date.isoformat()),
+            )
+            target_hours = (await cursor.fetchone())[0] or 0.0
+
+        if group_by == "day":
+            series = days
+        else:
+            series = (
+                await _fetch_series(db, [campaign_id], start_date, end_date, group_by)
+            )[campaign_id]
+
+    hours = [row["total_hours"] for row in days]
+    badge_counts = ladder.classify(hours)["counts"]
+    return {
+        "kpis": _build_kpi_response(campaign, series, start_date, end_date, group_by, ladder),
+        "badge": _build_daily_badge(target_date, target_hours, ladder),
+        "badge_summary": _build_badge_summary(
+            campaign, start_date, end_date, ladder, badge_counts, len(days), sum(hours, 0.0)
+        ),
+    }
+
+
+def _tiers_response(campaign_id: int, ladder: BadgeLadder) -> dict:
+    return {
+        "campaign_id": campaign_id,
+        "thresholds": ladder.thresholds,
+        "version": ladder.version,
+        "is_default": ladder is DEFAULT_BADGE_LADDER,
+    }
+
+
+async def get_badge_tiers(campaign_id: int) -> dict | None:
+    """Get the badge thresholds a campaign uses (its override or the defaults)."""
+    async with get_db(readonly=True) as db:
+        cursor = await db.execute("SELECT id FROM campaign WHERE id = ?", (campaign_id,))
+        if not await cursor.fetchone():
+            return None
+        ladder = await badge_tier_store.ladder(db, campaign_id)
+    return _tiers_response(campaign_id, ladder)
+
+
+async def set_badge_tiers(campaign_id: int, thresholds: dict[str, float]) -> dict | None:
+    """
+    Replace a campaign's badge thresholds with an override.
+
+    Raises ValueError for an incomplete or non-ascending set of tiers.
+    The new version is the change time in milliseconds, so it also moves
+    forward across restarts and processes.
+    """
+    thresholds = validate_thresholds(thresholds)
+    version = int(time.time() * 1000)
+
+    async def write_tiers(db):
+        cursor = await db.execute("SELECT id FROM campaign WHERE id = ?", (campaign_id,))
+        if not await cursor.fetchone():
+            return False
+        await db.execute("DELETE FROM badge_tier WHERE campaign_id = ?", (campaign_id,))
+        await db.executemany(
+            "INSERT INTO badge_tier (campaign_id, badge, min_hours, version) VALUES (?, ?, ?, ?)",
+            [(campaign_id, badge, hours, version) for badge, hours in thresholds.items()],
+        )
+        return True
+
+    if not await run_write(write_tiers):
+        return None
+    badge_tier_store.invalidate()
+    invalidate_campaign(campaign_id)
+    return _tiers_response(campaign_id, BadgeLadder(thresholds, version))
+
+
+async def reset_badge_tiers(campaign_id: int) -> dict | None:
+    """Drop a campaign's override so it goes back to BADGE_THRESHOLDS."""
+    async def delete_tiers(db):
+        cursor = await db.execute("SELECT id FROM campaign WHERE id = ?", (campaign_id,))
+        if not await cursor.fetchone():
+            return False
+        await db.execute("DELETE FROM badge_tier WHERE campaign_id = ?", (campaign_id,))
+        return True
+
+    if not await run_write(delete_tiers):
+        return None
+    badge_tier_store.invalidate()
+    invalidate_campaign(campaign_id)
+    return _tiers_response(campaign_id, DEFAULT_BADGE_LADDER)
+
+
+def parse_kpi_row(campaign_id, day, hours) -> tuple[int, str, float]:
+    """
+    Validate one (campaign_id, date, hours) KPI row from an import.
+
+    Accepts JSON numbers or their string forms (CSV). Returns the normalized
+    row, or raises ValueError describing the first problem found.
+    """
+    if isinstance(campaign_id, bool) or campaign_id is None:
+        raise ValueError("campaign_id must be an integer")
+    try:
+        campaign_id = int(campaign_id)
+    except (TypeError, ValueError):
+        raise ValueError("campaign_id must be an integer")
+    if campaign_id <= 0:
+        raise ValueError("campaign_id must be positive")
+
+    try:
+        day = date.fromisoformat(day).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError("date must be an ISO date (YYYY-MM-DD)")
+
+    if isinstance(hours, bool) or hours is None:
+        raise ValueError("hours must be a number")
+    try:
+        hours = float(hours)
+    except (TypeError, ValueError):
+        raise ValueError("hours must be a number")
+    if not math.isfinite(hours) or hours < 0:
+        raise ValueError("hours must be a non-negative number")
+
+    return campaign_id, day, hours
+
+
+async def _back_dated_since(db, rows: list[tuple[int, str, float]]) -> dict[int, str]:
+    """
+    Earliest date of each campaign in rows sorted by (campaign_id, date).
+
+    Returns {} when every campaign's rows come after its last KPI day, as
+    in append-only loads, which the triggers handle without shifting.
+    """
+    since: dict[int, str] = {}
+    for campaign_id, day, _ in rows:
+        since.setdefault(campaign_id, day)
+    back_dated = False
+    for campaign_id, first_day in since.items():
         cursor = await db.execute(
-            query,
-            (campaign_id, start_date.isoformat(), end_date.isoformat()),
+            "SELECT MAX(date) FROM campaign_kpi WHERE campaign_id = ?", (campaign_id,)
         )
-        rows = await cursor.fetchall()
-        
-        badge_counts = {"platinum": 0, "gold": 0, "silver": 0, "bronze": 0, "none": 0}
-        total_hours = 0
-        
-        for row in rows:
-            hours = row["total_hours"]
-            badge = calculate_badge(hours)
-            total_hours += hours
-            badge_counts[badge or "none"] += 1
-        
-        total_days = len(rows)
-        average_daily_hours = round(total_hours / max(total_days, 1), 1)
-        average_badge = calculate_badge(average_daily_hours)
-        
-        return {
-            "campaign": {
-                "id": campaign["id"],
-                "name": campaign["name"],
-                "is_active": bool(campaign["is_active"]),
-            },
-            "period": {
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-            },
-            "badge_breakdown": badge_counts,
-            "total_days": total_days,
-            "total_hours": round(total_hours, 1),
-            "average_daily_hours": average_daily_hours,
-            "average_badge": average_badge,
-        }
+        last_day = (await cursor.fetchone())[0]
+        if last_day is not None and first_day <= last_day:
+            back_dated = True
+    return since if back_dated else {}
+
+
+async def upsert_campaign_kpis(rows: list[tuple[int, int, str, float]]) -> dict:
+    """
+    Insert or replace KPI rows in a single write transaction.
+
+    Each row is (row_number, campaign_id, date, hours). Rows for unknown
+    campaigns are reported as errors instead of failing the batch. Returns
+    the number of rows written, the per-row errors and the campaign ids
+    touched, and invalidates cached responses for those campaigns.
+
+    Rows are written in (campaign_id, date) order: the running-total
+    trigger shifts every later day of a campaign, so an unsorted batch of
+    back-dated days would rewrite the same rows over and over. Appending
+    after a campaign's last day shifts nothing and keeps the triggers.
+    A batch of KPI_CUMULATIVE_REBUILD_ROWS or more that goes back before
+    the last day drops them for the write instead, and recomputes each
+    touched campaign from its earliest row in the batch, in the same
+    transaction.
+    """
+    campaign_ids = sorted({row[1] for row in rows})
+
+    async def write_rows(db):
+        placeholders = ", ".join("?" * len(campaign_ids))
+        cursor = await db.execute(
+            f"SELECT id FROM campaign WHERE id IN ({placeholders})",
+            campaign_ids,
+        )
+        known = {row["id"] for row in await cursor.fetchall()}
+        # sorted() is stable, so the last of duplicate rows still wins
+        valid = sorted(
+            (row[1:] for row in rows if row[1] in known),
+            key=lambda row: (row[0], row[1]),
+        )
+        errors = [
+            {"row": row[0], "error": f"campaign {row[1]} does not exist"}
+            for row in rows
+            if row[1] not in known
+        ]
+        since = {}
+        if len(valid) >= KPI_CUMULATIVE_REBUILD_ROWS:
+            since = await _back_dated_since(db, valid)
+        triggers = []
+        if since:
+            cursor = await db.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name GLOB ?",
+                (f"trg_{CUMULATIVE_TABLE}_*",),
+            )
+            triggers = await cursor.fetchall()
+            for trigger in triggers:
+                await db.execute(f"DROP TRIGGER {trigger['name']}")
+        await db.executemany(
+            """
+            INSERT INTO campaign_kpi (campaign_id, date, hours)
+            VALUES (?, ?, ?)
+            ON CONFLICT(campaign_id, date) DO UPDATE SET hours = excluded.hours
+            """,
+            valid,
+        )
+        if triggers:
+            await rebuild_cumulative_since(db, since)
+            for trigger in triggers:
+                await db.execute(trigger["sql"])
+        return {"upserted": len(valid), "errors": errors, "campaign_ids": known}
+
+    if not rows:
+        return {"upserted": 0, "errors": [], "campaign_ids": set()}
+    result = await run_write(write_rows)
+    for campaign_id in result["campaign_ids"]:
+        invalidate_campaign(campaign_id)
+    return result
@@ -0,0 +1,187 @@
+import asyncio
+import os
+from datetime import date
+from typing import Awaitable, Callable
+
+from app.services.kpi_service import add_change_listener, get_daily_badge
+
+# How often a watched campaign is re-checked when no change was signalled
+# (picks up writes from other processes, e.g. `python -m app.ingest`, and
+# the day rolling over)
+KPI_STREAM_POLL_SECONDS = float(os.getenv("KPI_STREAM_POLL_SECONDS", "15"))
+# Events buffered per subscriber before it is considered too slow
+KPI_STREAM_QUEUE_SIZE = 16
+
+Snapshot = dict | None
+
+
+class _Topic:
+    """Subscribers of one campaign plus the single task that watches it."""
+
+    def __init__(self):
+        self.subscribers: set[asyncio.Queue] = set()
+        self.changed = asyncio.Event()
+        self.snapshot: Snapshot = None
+        self.error: Exception | None = None
+        self.ready = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+
+def diff_snapshots(old: Snapshot, new: dict) -> dict:
+    """Fields of new that differ from old; the date is always included."""
+    if old is None:
+        return dict(new)
+    delta = {key: value for key, value in new.items() if old.get(key) != value}
+    if delta:
+        delta["date"] = new["date"]
+    return delta
+
+
+class KPIBroadcaster:
+    """
+    In-process fan-out of live daily badge updates.
+
+    Each watched campaign gets one upstream task that recomputes today's
+    badge when kpi_service reports a change (or every poll interval) and
+    pushes only the changed fields to every subscriber queue. Viewers of the
+    same campaign share that task, so the cost is per campaign, not per
+    connection, and the task stops when the last viewer leaves.
+
+    Subscriber queues receive ("snapshot" | "delta", payload) events, then a
+    final ("gone", None) if the campaign is deleted or ("closed", None) on
+    shutdown.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], Awaitable[Snapshot]] | None = None,
+        poll_interval: float = KPI_STREAM_POLL_SECONDS,
+        queue_size: int = KPI_STREAM_QUEUE_SIZE,
+    ):
+        self._fetch = fetch or (lambda campaign_id: get_daily_badge(campaign_id, date.today()))
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._topics: dict[int, _Topic] = {}
+        self.computations = 0
+        self.events_sent = 0
+        self.dropped = 0
+
+    def notify(self, campaign_id: int) -> None:
+        """Signal that a campaign's KPI data may have changed."""
+        topic = self._topics.get(campaign_id)
+        if topic is not None:
+            topic.changed.set()
+
+    async def subscribe(self, campaign_id: int) -> asyncio.Queue | None:
+        """
+        Start receiving updates for a campaign.
+
+        Returns a queue primed with the current snapshot, or None if the
+        campaign does not exist. Callers must unsubscribe() when done.
+        Re-raises the error if the first computation for the campaign failed.
+        """
+        topic = self._topics.get(campaign_id)
+        if topic is None:
+            topic = self._topics[campaign_id] = _Topic()
+            topic.task = asyncio.create_task(self._watch(campaign_id, topic))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        topic.subscribers.add(queue)
+        await topic.ready.wait()
+        if topic.snapshot is None:
+            await self.unsubscribe(campaign_id, queue)
+            if topic.error is not None:
+                raise topic.error
+            return None
+        queue.put_nowait(("snapshot", topic.snapshot))
+        return queue
+
+    async def unsubscribe(self, campaign_id: int, queue: asyncio.Queue) -> None:
+        topic = self._topics.get(campaign_id)
+        if topic is None:
+            return
+        topic.subscribers.discard(queue)
+        if not topic.subscribers:
+            del self._topics[campaign_id]
+            topic.task.cancel()
+            try:
+                await topic.task
+            except asyncio.CancelledError:
+                pass
+
+    async def _watch(self, campaign_id: int, topic: _Topic) -> None:
+        while True:
+            self.computations += 1
+            first = not topic.ready.is_set()
+            try:
+                snapshot = await self._fetch(campaign_id)
+            except Exception as e:
+                if first:
+                    topic.error = e
+                    self._retire(campaign_id, topic)
+                    return
+                # Keep the last good snapshot and retry on the next change/poll
+                print(f"Live KPI update for campaign {campaign_id} failed: {e}")
+                snapshot = topic.snapshot
+            if snapshot is None:
+                self._retire(campaign_id, topic)
+                self._publish(topic, ("gone", None))
+                return
+            delta = diff_snapshots(topic.snapshot, snapshot)
+            topic.snapshot = snapshot
+            topic.ready.set()
+            if delta and not first:
+                self._publish(topic, ("delta", delta))
+
+            try:
+                await asyncio.wait_for(topic.changed.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            topic.changed.clear()
+
+    def _retire(self, campaign_id: int, topic: _Topic) -> None:
+        """Forget a topic whose campaign is gone so new viewers start afresh."""
+        topic.snapshot = None
+        topic.ready.set()
+        if self._topics.get(campaign_id) is topic:
+            del self._topics[campaign_id]
+
+    def _publish(self, topic: _Topic, event: tuple) -> None:
+        for queue in list(topic.subscribers):
+            queued = event
+            if queue.full():
+                # A stalled viewer gets a fresh snapshot instead of a backlog
+                self.dropped += queue.qsize()
+                while not queue.empty():
+                    queue.get_nowait()
+                if event[0] == "delta":
+                    queued = ("snapshot", topic.snapshot)
+            queue.put_nowait(queued)
+            self.events_sent += 1
+
+    async def close(self) -> None:
+        """Stop every upstream task (subscribers see their streams end)."""
+        topics, self._topics = self._topics, {}
+        for topic in topics.values():
+            topic.task.cancel()
+            for queue in topic.subscribers:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(("closed", None))
+        for topic in topics.values():
+            try:
+                await topic.task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "campaigns": len(self._topics),
+            "subscribers": sum(len(t.subscribers) for t in self._topics.values()),
+            "computations": self.computations,
+            "events_sent": self.events_sent,
+            "dropped": self.dropped,
+        }
+
+
+kpi_broadcaster = KPIBroadcaster()
+add_change_listener(kpi_broadcaster.notify)
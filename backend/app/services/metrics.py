@@ -0,0 +1,244 @@
+import bisect
+import time
+from typing import Callable, Iterable
+
+from app.database import QueryStats, query_stats
+
+# Upper bounds of the histogram buckets (+Inf is implied)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Observations counted into fixed buckets, per label set.
+
+    Counts are kept per bucket (found by bisect) and only made cumulative
+    when rendered, so observe() is a lookup and two additions.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: Iterable[float],
+        labels: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, labels: tuple = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = (*self.buckets, float("inf"))
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Values read from a callback at scrape time, one label value per key.
+
+    For numbers other components already keep (cache stats), so recording
+    them costs nothing on the request path.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label: str,
+        collect: Callable[[], dict[str, float]],
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels((self.label,), (key,))} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics exported together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status.",
+    ("method", "route", "status"),
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to complete a request, by route template.",
+    LATENCY_BUCKETS, ("method", "route"),
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size, by route template.",
+    SIZE_BUCKETS, ("method", "route"),
+))
+db_queries = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements run by a request, by route template.",
+    QUERY_BUCKETS, ("method", "route"),
+))
+db_query_seconds = registry.register(Counter(
+    "db_query_seconds_total", "Time spent in SQL statements, by route template.",
+    ("method", "route"),
+))
+
+
+def route_template(scope: dict) -> str:
+    """The path template of the route that handled the request."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request metrics per route template.
+
+    Labelling by template (/api/agents/{agent_id}) rather than by path keeps
+    the number of series bounded. Database statements run by the request
+    are counted through the query_stats context set around it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            query_stats.reset(token)
+            labels = (scope["method"], route_template(scope))
+            http_requests.inc((*labels, status_code))
+            http_request_duration.observe(labels, elapsed)
+            http_response_size.observe(labels, size)
+            db_queries.observe(labels, stats.queries)
+            db_query_seconds.inc(labels, stats.seconds)
+
+
+def register_caches(caches: dict[str, Callable[[], dict]]) -> None:
+    """Export hits, misses, hit ratio and size of caches with TTLCache-style stats()."""
+    def collect(field: str):
+        return lambda: {name: stats()[field] for name, stats in caches.items()}
+
+    registry.register(CallbackMetric(
+        "cache_hits_total", "Cache hits.", "cache", collect("hits"), kind="counter",
+    ))
+    registry.register(CallbackMetric(
+        "cache_misses_total", "Cache misses.", "cache", collect("misses"), kind="counter",
+    ))
+    registry.register(CallbackMetric(
+        "cache_hit_ratio", "Cache hits / lookups since start.", "cache", collect("hit_ratio"),
+    ))
+    registry.register(CallbackMetric(
+        "cache_entries", "Entries currently cached.", "cache", collect("entries"),
+    ))
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,48 @@
+import base64
+import json
+import os
+
+from app.services.cache import TTLCache
+
+# Totals for cursor-paginated listings, tagged by table name
+count_cache = TTLCache(
+    max_entries=256,
+    ttl=float(os.getenv("LIST_COUNT_CACHE_TTL_SECONDS", "60")),
+)
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """Encode the (created_at, id) keyset position of a row as an opaque token."""
+    raw = json.dumps([str(created_at), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """Decode a token from encode_cursor; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(created_at, str) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return created_at, row_id
+
+
+async def cached_count(db, table: str, where_clause: str, params: list) -> int:
+    """COUNT(*) for a filtered listing, served from count_cache when possible."""
+    key = (table, where_clause, tuple(params))
+    total = count_cache.get(key)
+    if total is None:
+        versions = count_cache.tag_versions((table,))
+        cursor = await db.execute(
+            f"SELECT COUNT(*) as count FROM {table}{where_clause}", params
+        )
+        total = (await cursor.fetchone())["count"]
+        count_cache.set(key, total, tags=(table,), versions=versions)
+    return total
+
+
+def invalidate_counts(table: str) -> None:
+    """Forget cached totals after rows are added to or removed from a table."""
+    count_cache.invalidate(table)
@@ -0,0 +1,48 @@
+import re
+
+from app.database import FTS_TABLES, fts5_enabled
+
+_TOKEN = re.compile(r"\w+")
+
+
+def build_match_query(search: str) -> str | None:
+    """
+    Turn free-text admin search into an FTS5 prefix query.
+
+    Every word must match the start of some token, so "jo smi" finds
+    "John Smith". Returns None when the input has no searchable words.
+    """
+    tokens = _TOKEN.findall(search)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_filter(table: str, search: str, ranked: bool = False) -> dict:
+    """
+    Build the SQL pieces that filter a listing by a search string.
+
+    Uses the table's FTS5 index when available and falls back to a LIKE scan
+    otherwise. Returns a dict with:
+      - condition/params: a WHERE condition on the base table
+      - join/join_params: when ranked and FTS5 is used, a JOIN exposing
+        `hit.rank` (lower is better) that replaces the condition
+    """
+    fts_table, columns = FTS_TABLES[table]
+    match_query = build_match_query(search) if fts5_enabled() else None
+    if match_query is None:
+        pattern = f"%{search}%"
+        return {
+            "condition": "(" + " OR ".join(f"{col} LIKE ?" for col in columns) + ")",
+            "params": [pattern] * len(columns),
+            "join": "",
+            "join_params": [],
+        }
+
+    matches = f"SELECT rowid, rank FROM {fts_table} WHERE {fts_table} MATCH ?"
+    return {
+        "condition": f"id IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)",
+        "params": [match_query],
+        "join": f"JOIN ({matches}) AS hit ON hit.rowid = {table}.id" if ranked else "",
+        "join_params": [match_query] if ranked else [],
+    }
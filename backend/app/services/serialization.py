@@ -0,0 +1,97 @@
+import json
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def json_dumps(content: Any) -> bytes:
+    """Serialize plain JSON data (dicts, lists, str, int, float, bool, None)."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response that serializes trusted service output directly.
+
+    Returning it from an endpoint bypasses response_model validation and
+    FastAPI's jsonable_encoder, so the content must already match the
+    declared schema. Uses orjson when it is installed.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def _accept_ranges(accept: str) -> dict[str, float]:
+    """The media ranges of an Accept header with their q-values (default 1)."""
+    ranges: dict[str, float] = {}
+    for item in accept.split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.lower()
+        ranges[media_type] = max(q, ranges.get(media_type, 0.0))
+    return ranges
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """
+    Whether an Accept header asks for MessagePack over JSON.
+
+    MessagePack must be named explicitly with a q above 0 (q=0 means "not
+    acceptable"), and rank at least as high as JSON, whose q comes from the
+    most specific of application/json, application/* and */*.
+    """
+    ranges = _accept_ranges(accept)
+    msgpack_q = max(ranges.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    if msgpack_q <= 0:
+        return False
+    json_q = next(
+        (ranges[media_type] for media_type in ("application/json", "application/*", "*/*")
+         if media_type in ranges),
+        0.0,
+    )
+    return msgpack_q >= json_q
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Whether the client asked for MessagePack and the server can produce it."""
+    if msgpack is None:
+        return False
+    return prefers_msgpack(request.headers.get("accept", ""))
+
+
+class MsgPackResponse(Response):
+    """MessagePack response for clients that send Accept: application/msgpack."""
+
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
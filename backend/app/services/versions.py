@@ -0,0 +1,68 @@
+import hashlib
+import os
+import time
+from typing import Hashable
+
+from fastapi import Request, Response
+
+# How long an ETag may stay valid without an in-process write. Writes from
+# other processes (another worker, `python -m app.ingest`) don't bump the
+# counters here, so validators also roll over on this wall-clock window.
+ETAG_WINDOW_SECONDS = float(os.getenv("ETAG_WINDOW_SECONDS", "30"))
+
+# Distinguishes counters of this process from those of a previous run
+_EPOCH = f"{os.getpid():x}.{time.time_ns():x}"
+
+_table_versions: dict[str, int] = {}
+_campaign_versions: dict[int, int] = {}
+
+
+def bump_table(*tables: str) -> None:
+    """Record that rows of the given tables changed."""
+    for table in tables:
+        _table_versions[table] = _table_versions.get(table, 0) + 1
+
+
+def bump_campaign(campaign_id: int) -> None:
+    """Record that a campaign's KPI data or metadata changed."""
+    _campaign_versions[campaign_id] = _campaign_versions.get(campaign_id, 0) + 1
+
+
+def table_version(table: str) -> int:
+    return _table_versions.get(table, 0)
+
+
+def campaign_version(campaign_id: int) -> int:
+    return _campaign_versions.get(campaign_id, 0)
+
+
+def make_etag(*parts: Hashable) -> str:
+    """
+    Weak ETag for a response identified by parts.
+
+    Parts should cover everything the body depends on: the resource kind,
+    the (resolved) request parameters and the relevant version counters.
+    """
+    window = int(time.time() // ETAG_WINDOW_SECONDS) if ETAG_WINDOW_SECONDS > 0 else 0
+    raw = repr((_EPOCH, window, parts)).encode()
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """A 304 response if the request already holds the current ETag."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
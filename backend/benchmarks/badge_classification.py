@@ -0,0 +1,68 @@
+"""
+Microbenchmark for badge classification over long hours series.
+Run with: python -m benchmarks.badge_classification [--points 1000000]
+
+Compares the per-value if/elif ladder that kpi_service used to run in its
+loops against classify_hours(), which bisects over the sorted thresholds
+and tallies tiers in one pass.
+"""
+import argparse
+import random
+import time
+
+from app.services.kpi_service import BADGE_THRESHOLDS, classify_hours
+
+
+def ladder_badge(hours):
+    """The previous scalar implementation, kept here as the baseline."""
+    if hours >= BADGE_THRESHOLDS["platinum"]:
+        return "platinum"
+    elif hours >= BADGE_THRESHOLDS["gold"]:
+        return "gold"
+    elif hours >= BADGE_THRESHOLDS["silver"]:
+        return "silver"
+    elif hours >= BADGE_THRESHOLDS["bronze"]:
+        return "bronze"
+    return None
+
+
+def ladder_summary(series):
+    counts = {"platinum": 0, "gold": 0, "silver": 0, "bronze": 0, "none": 0}
+    badges = []
+    for hours in series:
+        badge = ladder_badge(hours)
+        badges.append(badge)
+        counts[badge or "none"] += 1
+    return badges, counts
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main(points: int, repeat: int) -> None:
+    random.seed(42)
+    series = [round(random.uniform(0, 300), 1) for _ in range(points)]
+
+    baseline, (_, baseline_counts) = best_of(lambda: ladder_summary(series), repeat)
+    batch, result = best_of(lambda: classify_hours(series), repeat)
+    with_next, _ = best_of(lambda: classify_hours(series, with_next=True), repeat)
+    assert result["counts"] == baseline_counts
+
+    print(f"{points:,} points, best of {repeat}")
+    print(f"  if/elif ladder + counts     {baseline * 1000:8.1f} ms")
+    print(f"  classify_hours              {batch * 1000:8.1f} ms  (x{baseline / batch:.2f})")
+    print(f"  classify_hours(with_next)   {with_next * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.points, args.repeat)
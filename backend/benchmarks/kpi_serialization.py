@@ -0,0 +1,101 @@
+"""
+Benchmark the KPI series endpoint with and without the fast JSON path.
+Run with: python -m benchmarks.kpi_serialization [--requests 200]
+
+Seeds a throwaway database with ten years of daily hours for one campaign,
+then times GET /api/kpis/campaigns/1 in-process for 30, 365 and 3650 day
+ranges, once through response_model validation (KPI_FAST_JSON=0) and once
+through FastJSONResponse. The response cache is disabled so every request
+runs the query, as a cache miss would.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+DB_PATH = Path(tempfile.gettempdir()) / "bench_kpi_serialization.db"
+os.environ["DATABASE_PATH"] = str(DB_PATH)
+os.environ["KPI_CACHE_TTL_SECONDS"] = "0"
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app.database import get_db, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers import kpis as kpis_router  # noqa: E402
+from app.services import serialization  # noqa: E402
+
+RANGES = (30, 365, 3650)
+END_DATE = date(2025, 12, 31)
+
+
+async def seed() -> None:
+    for suffix in ("", "-wal", "-shm"):
+        DB_PATH.with_name(DB_PATH.name + suffix).unlink(missing_ok=True)
+    await init_db()
+    async with get_db() as db:
+        await db.execute("INSERT INTO campaign (id, name) VALUES (1, 'Benchmark')")
+        await db.executemany(
+            "INSERT INTO campaign_kpi (campaign_id, date, hours) VALUES (1, ?, ?)",
+            [
+                ((END_DATE - timedelta(days=n)).isoformat(), round(random.uniform(0, 300), 1))
+                for n in range(max(RANGES))
+            ],
+        )
+        await db.commit()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure(client: AsyncClient, days: int, requests: int) -> list[float]:
+    params = {
+        "start_date": (END_DATE - timedelta(days=days - 1)).isoformat(),
+        "end_date": END_DATE.isoformat(),
+    }
+    for _ in range(5):
+        await client.get("/api/kpis/campaigns/1", params=params)
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get("/api/kpis/campaigns/1", params=params)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    return timings
+
+
+async def main(requests: int) -> None:
+    await seed()
+    encoder = "orjson" if serialization.orjson is not None else "json (install orjson for more)"
+    print(f"{requests} requests per case, fast path encoder: {encoder}\n")
+    print(f"{'range':>6}  {'mode':<10} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for days in RANGES:
+            results = {}
+            for mode, fast in (("validated", False), ("fast", True)):
+                kpis_router.KPI_FAST_JSON = fast
+                timings = await measure(client, days, requests)
+                results[mode] = percentile(timings, 50)
+                print(
+                    f"{days:>6}  {mode:<10} {percentile(timings, 50):>8.2f} "
+                    f"{percentile(timings, 99):>8.2f} {statistics.mean(timings):>8.2f}"
+                )
+            print(f"{'':>6}  p50 speedup x{results['validated'] / results['fast']:.2f}\n")
+
+    for suffix in ("", "-wal", "-shm"):
+        DB_PATH.with_name(DB_PATH.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -15,7 +15,9 @@ os.environ["DATABASE_PATH"] = str(TEST_DB_PATH)
 
 from app.main import app
 from app.database import get_db, init_db
-from app.auth.jwt import create_access_token
+from app.auth import rate_limit
+from app.auth.jwt import create_access_token, revoked_tokens, token_cache
+from app.services import kpi_cache, count_cache, badge_tier_store
 
 
 @pytest.fixture(scope="session")
@@ -31,11 +33,16 @@ async def test_db():
     Yields the database path, then cleans up after the test.
     """
     # Remove existing test db if present
-    if TEST_DB_PATH.exists():
-        TEST_DB_PATH.unlink()
+    remove_test_db()
+    kpi_cache.clear()
+    count_cache.clear()
+    badge_tier_store.invalidate()
+    token_cache.clear()
+    revoked_tokens.clear()
     
     # Initialize fresh database
     await init_db()
+    await rate_limit.login_limiter.reset()
     
     # Seed test data
     await seed_test_data()
@@ -43,8 +50,15 @@ async def test_db():
     yield TEST_DB_PATH
     
     # Cleanup
-    if TEST_DB_PATH.exists():
-        TEST_DB_PATH.unlink()
+    remove_test_db()
+
+
+def remove_test_db():
+    """Delete the test database along with its WAL sidecar files."""
+    for suffix in ("", "-wal", "-shm"):
+        path = TEST_DB_PATH.with_name(TEST_DB_PATH.name + suffix)
+        if path.exists():
+            path.unlink()
 
 
 async def seed_test_data():
@@ -121,6 +135,20 @@ async def client(test_db):
         yield ac
 
 
+@pytest_asyncio.fixture
+async def pooled_client(test_db):
+    """
+    An API client with the app lifespan running, as in production.
+
+    Requests go through the connection pool's reader and writer lanes and
+    writes through the WriteQueue, which the plain client never starts.
+    """
+    async with app.router.lifespan_context(app):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            yield ac
+
+
 @pytest.fixture
 def auth_token():
     """
@@ -0,0 +1,200 @@
+"""
+API integration tests for agent listing endpoints.
+"""
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app import database
+from app.routers import agents as agents_router
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Record every SQL statement the agents router sends to SQLite."""
+    executed = []
+    original_get_db = database.get_db
+
+    @asynccontextmanager
+    async def traced_get_db(*args, **kwargs):
+        async with original_get_db(*args, **kwargs) as db:
+            await db.set_trace_callback(executed.append)
+            try:
+                yield db
+            finally:
+                await db.set_trace_callback(None)
+
+    monkeypatch.setattr(agents_router, "get_db", traced_get_db)
+    return executed
+
+
+async def add_agents(client, auth_headers, count):
+    """Create agents, each assigned to both test campaigns."""
+    for n in range(count):
+        response = await client.post(
+            "/api/agents",
+            json={"first_name": "Bulk", "last_name": str(n), "email": f"bulk{n}@test.com"},
+            headers=auth_headers,
+        )
+        agent_id = response.json()["id"]
+        await client.post(
+            f"/api/agents/{agent_id}/campaigns",
+            json={"campaign_ids": [1, 2]},
+            headers=auth_headers,
+        )
+
+
+class TestListAgents:
+    """Tests for GET /api/agents"""
+
+    @pytest.mark.asyncio
+    async def test_includes_assigned_campaigns(self, client, auth_headers):
+        """Each agent should carry its own campaign memberships."""
+        await add_agents(client, auth_headers, 1)
+        response = await client.get("/api/agents", headers=auth_headers)
+        assert response.status_code == 200
+
+        by_email = {agent["email"]: agent for agent in response.json()["data"]}
+        assert [c["id"] for c in by_email["john.doe@test.com"]["campaigns"]] == [1]
+        assert sorted(c["id"] for c in by_email["bulk0@test.com"]["campaigns"]) == [1, 2]
+        inactive = next(c for c in by_email["bulk0@test.com"]["campaigns"] if c["id"] == 2)
+        assert inactive["is_active"] is False
+
+    @pytest.mark.asyncio
+    async def test_query_count_is_constant_in_page_size(
+        self, client, auth_headers, statements
+    ):
+        """Listing 5 or 50 agents should take the same number of queries."""
+        await add_agents(client, auth_headers, 50)
+
+        counts = {}
+        for limit in (5, 20, 50):
+            statements.clear()
+            response = await client.get(
+                "/api/agents", params={"limit": limit}, headers=auth_headers
+            )
+            assert len(response.json()["data"]) == limit
+            counts[limit] = len([s for s in statements if not s.startswith("PRAGMA")])
+
+        assert counts[5] == counts[20] == counts[50]
+
+    @pytest.mark.asyncio
+    async def test_cursor_pagination_walks_every_agent_once(self, client, auth_headers):
+        """Following next_cursor should visit each agent exactly once, newest first."""
+        await add_agents(client, auth_headers, 23)
+
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            response = await client.get(
+                "/api/agents",
+                params={"limit": 10, "cursor": cursor},
+                headers=auth_headers,
+            )
+            assert response.status_code == 200
+            body = response.json()
+            assert body["total"] == 25
+            seen.extend(agent["id"] for agent in body["data"])
+            cursor = body["next_cursor"]
+
+        assert len(seen) == 25
+        assert len(set(seen)) == 25
+
+        offset_ids = []
+        for page in (1, 2, 3):
+            response = await client.get(
+                "/api/agents", params={"limit": 10, "page": page}, headers=auth_headers
+            )
+            offset_ids.extend(agent["id"] for agent in response.json()["data"])
+        assert seen == offset_ids
+
+    @pytest.mark.asyncio
+    async def test_cursor_total_is_refreshed_after_writes(self, client, auth_headers):
+        """The cached total should drop when an agent is deleted."""
+        response = await client.get("/api/agents", params={"cursor": ""}, headers=auth_headers)
+        assert response.json()["total"] == 2
+
+        await client.delete("/api/agents/1", headers=auth_headers)
+        response = await client.get("/api/agents", params={"cursor": ""}, headers=auth_headers)
+        assert response.json()["total"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_malformed_cursor(self, client, auth_headers):
+        response = await client.get(
+            "/api/agents", params={"cursor": "not-a-cursor"}, headers=auth_headers
+        )
+        assert response.status_code == 400
+
+
+class TestSearchAgents:
+    """Tests for GET /api/agents?search=..."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "search,expected",
+        [
+            ("jo", ["john.doe@test.com"]),
+            ("smi", ["jane.smith@test.com"]),
+            ("jane smith", ["jane.smith@test.com"]),
+            ("test.com", ["jane.smith@test.com", "john.doe@test.com"]),
+            ("nobody", []),
+        ],
+    )
+    async def test_prefix_search(self, client, auth_headers, search, expected):
+        response = await client.get(
+            "/api/agents", params={"search": search}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert sorted(a["email"] for a in body["data"]) == expected
+        assert body["total"] == len(expected)
+
+    @pytest.mark.asyncio
+    async def test_index_follows_updates(self, client, auth_headers):
+        await client.patch(
+            "/api/agents/1", json={"last_name": "Johnson"}, headers=auth_headers
+        )
+        response = await client.get(
+            "/api/agents", params={"search": "johns"}, headers=auth_headers
+        )
+        assert [a["id"] for a in response.json()["data"]] == [1]
+        response = await client.get(
+            "/api/agents", params={"search": "doe"}, headers=auth_headers
+        )
+        assert response.json()["data"][0]["email"] == "john.doe@test.com"
+
+    @pytest.mark.asyncio
+    async def test_ranks_better_matches_first(self, client, auth_headers):
+        await client.post(
+            "/api/agents",
+            json={"first_name": "Smith", "last_name": "Smith", "email": "smith@smith.com"},
+            headers=auth_headers,
+        )
+        response = await client.get(
+            "/api/agents", params={"search": "smith"}, headers=auth_headers
+        )
+        assert [a["email"] for a in response.json()["data"]] == [
+            "smith@smith.com",
+            "jane.smith@test.com",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_ranked_page_matches_once(self, client, auth_headers, statements):
+        """The ranked JOIN filters the page, so its query has a single MATCH."""
+        response = await client.get(
+            "/api/agents", params={"search": "smith"}, headers=auth_headers
+        )
+        assert [a["email"] for a in response.json()["data"]] == ["jane.smith@test.com"]
+        searches = [s for s in statements if "MATCH" in s]
+        assert searches
+        assert all(s.count("MATCH") == 1 for s in searches)
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_like_without_fts5(self, client, auth_headers, monkeypatch):
+        from app.services import search
+
+        monkeypatch.setattr(search, "fts5_enabled", lambda: False)
+        response = await client.get(
+            "/api/agents", params={"search": "ohn"}, headers=auth_headers
+        )
+        assert [a["email"] for a in response.json()["data"]] == ["john.doe@test.com"]
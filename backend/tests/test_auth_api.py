@@ -4,9 +4,21 @@ API integration tests for authentication endpoints.
 These tests verify the authentication flow works correctly,
 including login, token validation, and protected endpoints.
 """
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
 import pytest
 import jwt
-from app.auth.jwt import SECRET_KEY, ALGORITHM
+from app.auth import jwt as auth_jwt
+from app.auth.jwt import SECRET_KEY, ALGORITHM, create_access_token
+
+ADMIN_LOGIN = {"username": "admin", "password": "admin123"}
 
 
 class TestLogin:
@@ -169,6 +181,73 @@ class TestLogout:
         assert "message" in data
         assert "logged out" in data["message"].lower()
 
+    @pytest.mark.asyncio
+    async def test_logout_revokes_token(self, client):
+        """The token sent with logout should stop working."""
+        login_response = await client.post("/api/auth/login", data=ADMIN_LOGIN)
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+
+        response = await client.post("/api/auth/logout", headers=headers)
+        assert response.status_code == 200
+
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 401
+        assert (await client.get("/api/agents", headers=headers)).status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_logout_does_not_affect_other_tokens(self, client, auth_headers):
+        other = create_access_token({"sub": "admin", "role": "admin", "device": "other"})
+        await client.post(
+            "/api/auth/logout", headers={"Authorization": f"Bearer {other}"}
+        )
+        assert (await client.get("/api/auth/me", headers=auth_headers)).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_logout_ignores_invalid_token(self, client):
+        response = await client.post(
+            "/api/auth/logout", headers={"Authorization": "Bearer invalid-token"}
+        )
+        assert response.status_code == 200
+        assert not auth_jwt.revoked_tokens
+
+
+class TestTokenCache:
+    """Verified tokens should be reused without re-verifying them."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_requests_verify_once(self, client, auth_headers, monkeypatch):
+        decode = auth_jwt.jwt.decode
+        calls = []
+
+        def counting_decode(*args, **kwargs):
+            calls.append(args[0])
+            return decode(*args, **kwargs)
+
+        monkeypatch.setattr(auth_jwt.jwt, "decode", counting_decode)
+        for _ in range(5):
+            response = await client.get("/api/agents", headers=auth_headers)
+            assert response.status_code == 200
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_token_is_not_served_from_cache(self, client):
+        token = create_access_token(
+            {"sub": "admin", "role": "admin"}, expires_delta=timedelta(seconds=-1)
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 401
+        assert len(auth_jwt.token_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_cache_entry_ends_with_token(self, client):
+        token = create_access_token(
+            {"sub": "admin", "role": "admin"}, expires_delta=timedelta(seconds=2)
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+        await asyncio.sleep(2.1)
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 401
+
 
 class TestProtectedEndpoints:
     """Tests verifying that admin endpoints require authentication."""
@@ -206,3 +285,89 @@ class TestProtectedEndpoints:
             json={"name": "New Campaign"},
         )
         assert response.status_code == 401
+
+
+class TestPasswordHashing:
+    """Argon2 work must stay off the event loop and out of import time."""
+
+    def test_import_does_not_hash(self):
+        """Importing the app must not compute any password hash."""
+        code = (
+            "from pwdlib import PasswordHash\n"
+            "def fail(*args, **kwargs):\n"
+            "    raise AssertionError('hashed at import')\n"
+            "PasswordHash.hash = fail\n"
+            "import app.main\n"
+        )
+        env = {k: v for k, v in os.environ.items() if k != "ADMIN_PASSWORD"}
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).resolve().parents[1],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+
+    @pytest.mark.asyncio
+    async def test_plain_admin_password_is_hashed_on_first_login(self, client, monkeypatch):
+        monkeypatch.setitem(auth_jwt.ADMIN_USER, "hashed_password", None)
+        monkeypatch.setattr(auth_jwt, "_ADMIN_PASSWORD", "s3cret-pass")
+
+        response = await client.post(
+            "/api/auth/login", data={"username": "admin", "password": "s3cret-pass"}
+        )
+        assert response.status_code == 200
+        assert auth_jwt.ADMIN_USER["hashed_password"].startswith("$argon2")
+
+        response = await client.post("/api/auth/login", data=ADMIN_LOGIN)
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_login_does_not_block_other_requests(self, client, monkeypatch):
+        verify = auth_jwt.verify_password
+        finished = []
+
+        def slow_verify(plain_password, hashed_password):
+            time.sleep(0.3)
+            return verify(plain_password, hashed_password)
+
+        async def login():
+            response = await client.post("/api/auth/login", data=ADMIN_LOGIN)
+            finished.append("login")
+            return response
+
+        async def list_campaigns():
+            await asyncio.sleep(0.05)
+            response = await client.get("/api/campaigns")
+            finished.append("campaigns")
+            return response
+
+        monkeypatch.setattr(auth_jwt, "verify_password", slow_verify)
+        login_response, campaigns_response = await asyncio.gather(login(), list_campaigns())
+        assert login_response.status_code == 200
+        assert campaigns_response.status_code == 200
+        assert finished == ["campaigns", "login"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_hashes_are_capped(self, client, monkeypatch):
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def tracked_verify(plain_password, hashed_password):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return True
+
+        monkeypatch.setattr(auth_jwt, "verify_password", tracked_verify)
+        responses = await asyncio.gather(
+            *(client.post("/api/auth/login", data=ADMIN_LOGIN) for _ in range(8))
+        )
+        assert all(response.status_code == 200 for response in responses)
+        assert peak == auth_jwt.PASSWORD_HASH_WORKERS
@@ -3,11 +3,12 @@ Unit tests for badge calculation logic in kpi_service.py.
 
 These tests cover the pure functions that don't require database access.
 """
-import pytest
 from app.services.kpi_service import (
     calculate_badge,
+    classify_hours,
     get_badge_threshold,
     get_next_badge_info,
+    BadgeLadder,
     BADGE_THRESHOLDS,
 )
 
@@ -197,3 +198,46 @@ class TestBadgeThresholdsConstant:
         assert BADGE_THRESHOLDS["silver"] == 120
         assert BADGE_THRESHOLDS["gold"] == 180
         assert BADGE_THRESHOLDS["platinum"] == 240
+
+
+class TestClassifyHours:
+    """Tests for classify_hours() and BadgeLadder.classify()."""
+
+    HOURS = [0, 59.9, 60, 119.9, 120, 179.9, 180, 239.9, 240, 1000, -5]
+
+    def test_codes_match_scalar_helper(self):
+        """Batch codes should agree with calculate_badge for every value."""
+        ladder = BadgeLadder(BADGE_THRESHOLDS)
+        codes = classify_hours(self.HOURS)["codes"]
+        assert [ladder.badges[code] for code in codes] == [
+            calculate_badge(hours) for hours in self.HOURS
+        ]
+        assert codes == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 0]
+
+    def test_counts_every_tier(self):
+        assert classify_hours(self.HOURS)["counts"] == {
+            "none": 3,
+            "bronze": 2,
+            "silver": 2,
+            "gold": 2,
+            "platinum": 2,
+        }
+
+    def test_hours_to_next_matches_scalar_helper(self):
+        result = classify_hours(self.HOURS, with_next=True)
+        assert result["hours_to_next"] == [
+            get_next_badge_info(hours)["hours_to_next"] for hours in self.HOURS
+        ]
+
+    def test_hours_to_next_is_optional(self):
+        assert "hours_to_next" not in classify_hours(self.HOURS)
+
+    def test_accepts_any_iterable(self):
+        assert classify_hours(h for h in (10, 70))["codes"] == [0, 1]
+        assert classify_hours([])["counts"]["none"] == 0
+
+    def test_ladder_sorts_unordered_thresholds(self):
+        ladder = BadgeLadder({"gold": 10, "bronze": 1, "silver": 5})
+        assert ladder.badges == (None, "bronze", "silver", "gold")
+        assert ladder.badge(7) == "silver"
+        assert ladder.next_info(7) == {"next_badge": "gold", "hours_to_next": 3}
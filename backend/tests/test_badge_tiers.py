@@ -0,0 +1,230 @@
+"""
+Tests for per-campaign badge tier overrides.
+"""
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app import database
+from app.services import kpi_service
+from app.services.badge_tiers import (
+    BadgeTierStore,
+    DEFAULT_BADGE_LADDER,
+    badge_tier_store,
+    validate_thresholds,
+)
+
+SMALL_CAMPAIGN_TIERS = {"bronze": 10, "silver": 20, "gold": 40, "platinum": 100}
+
+
+class TestValidateThresholds:
+    """Tests for validate_thresholds()"""
+
+    def test_accepts_ascending_tiers(self):
+        assert validate_thresholds(SMALL_CAMPAIGN_TIERS) == SMALL_CAMPAIGN_TIERS
+
+    def test_rejects_missing_tier(self):
+        with pytest.raises(ValueError, match="platinum"):
+            validate_thresholds({"bronze": 1, "silver": 2, "gold": 3})
+
+    def test_rejects_non_ascending_tiers(self):
+        with pytest.raises(ValueError, match="gold"):
+            validate_thresholds({"bronze": 10, "silver": 20, "gold": 20, "platinum": 30})
+
+
+class TestBadgeTierStore:
+    """Tests for the in-memory BadgeTierStore"""
+
+    @pytest.mark.asyncio
+    async def test_defaults_without_override(self, test_db):
+        store = BadgeTierStore()
+        async with database.get_db() as db:
+            assert await store.ladder(db, 1) is DEFAULT_BADGE_LADDER
+
+    @pytest.mark.asyncio
+    async def test_loads_overrides_once(self, test_db):
+        async with database.get_db() as db:
+            await db.executemany(
+                "INSERT INTO badge_tier (campaign_id, badge, min_hours, version) VALUES (1, ?, ?, 7)",
+                list(SMALL_CAMPAIGN_TIERS.items()),
+            )
+            await db.commit()
+
+        store = BadgeTierStore()
+        executed = []
+        async with database.get_db() as db:
+            await db.set_trace_callback(executed.append)
+            first = await store.ladder(db, 1)
+            second = await store.ladder(db, 1)
+            other = await store.ladder(db, 2)
+            await db.set_trace_callback(None)
+
+        assert first is second
+        assert first.version == 7
+        assert first.badge(25) == "silver"
+        assert other is DEFAULT_BADGE_LADDER
+        assert len(executed) == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_reloads(self, test_db):
+        store = BadgeTierStore()
+        async with database.get_db() as db:
+            assert await store.ladder(db, 1) is DEFAULT_BADGE_LADDER
+            await db.executemany(
+                "INSERT INTO badge_tier (campaign_id, badge, min_hours, version) VALUES (1, ?, ?, 7)",
+                list(SMALL_CAMPAIGN_TIERS.items()),
+            )
+            await db.commit()
+            assert await store.ladder(db, 1) is DEFAULT_BADGE_LADDER
+            store.invalidate()
+            assert (await store.ladder(db, 1)).version == 7
+
+
+class TestBadgeTiersAPI:
+    """Tests for /api/kpis/badge-thresholds and /api/kpis/campaigns/{id}/badge-tiers"""
+
+    @pytest.mark.asyncio
+    async def test_get_defaults(self, client):
+        response = await client.get("/api/kpis/campaigns/1/badge-tiers")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["is_default"] is True
+        assert body["version"] == 0
+        assert body["thresholds"]["platinum"] == 240
+
+    @pytest.mark.asyncio
+    async def test_get_unknown_campaign(self, client):
+        response = await client.get("/api/kpis/campaigns/9999/badge-tiers")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_update_requires_admin(self, client):
+        response = await client.put(
+            "/api/kpis/campaigns/1/badge-tiers", json=SMALL_CAMPAIGN_TIERS
+        )
+        assert response.status_code == 401
+        response = await client.delete("/api/kpis/campaigns/1/badge-tiers")
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_update_rejects_non_ascending(self, client, auth_headers):
+        response = await client.put(
+            "/api/kpis/campaigns/1/badge-tiers",
+            json={"bronze": 50, "silver": 40, "gold": 60, "platinum": 70},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+        assert "silver" in response.json()["detail"]
+
+    @pytest.mark.asyncio
+    async def test_update_unknown_campaign(self, client, auth_headers):
+        response = await client.put(
+            "/api/kpis/campaigns/9999/badge-tiers",
+            json=SMALL_CAMPAIGN_TIERS,
+            headers=auth_headers,
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_override_changes_badges(self, client, auth_headers, test_dates):
+        params = {
+            "start_date": test_dates["start_of_test_data"].isoformat(),
+            "end_date": test_dates["today"].isoformat(),
+        }
+        before = await client.get("/api/kpis/campaigns/1", params=params)
+        assert before.json()["tier_version"] == 0
+
+        response = await client.put(
+            "/api/kpis/campaigns/1/badge-tiers",
+            json=SMALL_CAMPAIGN_TIERS,
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        version = response.json()["version"]
+        assert version > 0
+        assert response.json()["is_default"] is False
+
+        after = await client.get("/api/kpis/campaigns/1", params=params)
+        assert after.headers["ETag"] != before.headers["ETag"]
+        body = after.json()
+        assert body["tier_version"] == version
+        # 30 hours is no badge by default but silver here, platinum is 100+
+        assert [point["badge"] for point in body["data"]].count("platinum") == 5
+        assert None not in {point["badge"] for point in body["data"]}
+
+        badge = (await client.get("/api/kpis/campaigns/1/badge")).json()
+        assert badge["badge"] == "platinum"
+        assert badge["threshold"] == 100
+        assert badge["tier_version"] == version
+
+        summary = (
+            await client.get("/api/kpis/campaigns/1/badge-summary", params=params)
+        ).json()
+        assert summary["badge_breakdown"]["platinum"] == 5
+        assert summary["tier_version"] == version
+
+        tiers = (await client.get("/api/kpis/campaigns/1/badge-tiers")).json()
+        assert tiers["thresholds"] == SMALL_CAMPAIGN_TIERS
+        assert tiers["version"] == version
+
+        # Other campaigns keep the defaults
+        other = (await client.get("/api/kpis/campaigns/2/badge-tiers")).json()
+        assert other["is_default"] is True
+
+    @pytest.mark.asyncio
+    async def test_thresholds_listed_highest_first(self, client, auth_headers):
+        """Tiers come back platinum to bronze, after a PUT and after a reload."""
+        order = ["platinum", "gold", "silver", "bronze"]
+        defaults = (await client.get("/api/kpis/campaigns/1/badge-tiers")).json()
+        assert list(defaults["thresholds"]) == order
+
+        response = await client.put(
+            "/api/kpis/campaigns/1/badge-tiers",
+            json=SMALL_CAMPAIGN_TIERS,
+            headers=auth_headers,
+        )
+        assert list(response.json()["thresholds"]) == order
+        tiers = (await client.get("/api/kpis/campaigns/1/badge-tiers")).json()
+        assert list(tiers["thresholds"]) == order
+
+        badge_tier_store.invalidate()
+        tiers = (await client.get("/api/kpis/campaigns/1/badge-tiers")).json()
+        assert list(tiers["thresholds"]) == order
+
+    @pytest.mark.asyncio
+    async def test_delete_restores_defaults(self, client, auth_headers):
+        await client.put(
+            "/api/kpis/campaigns/1/badge-tiers",
+            json=SMALL_CAMPAIGN_TIERS,
+            headers=auth_headers,
+        )
+        response = await client.delete(
+            "/api/kpis/campaigns/1/badge-tiers", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.json()["is_default"] is True
+
+        badge = (await client.get("/api/kpis/campaigns/1/badge")).json()
+        assert badge["badge"] == "silver"
+        assert badge["tier_version"] == 0
+
+    @pytest.mark.asyncio
+    async def test_kpi_requests_do_not_query_tiers(self, client, monkeypatch):
+        """Once loaded, resolving a campaign's tiers costs no query."""
+        await client.get("/api/kpis/campaigns/1")
+        executed = []
+        original_get_db = database.get_db
+
+        @asynccontextmanager
+        async def traced_get_db(*args, **kwargs):
+            async with original_get_db(*args, **kwargs) as db:
+                await db.set_trace_callback(executed.append)
+                try:
+                    yield db
+                finally:
+                    await db.set_trace_callback(None)
+
+        monkeypatch.setattr(kpi_service, "get_db", traced_get_db)
+        await client.get("/api/kpis/campaigns/1", params={"group_by": "week"})
+        await client.get("/api/kpis/campaigns/1/badge")
+        assert not [s for s in executed if "badge_tier" in s]
@@ -0,0 +1,249 @@
+"""
+Tests for the TTL/LRU response cache, request coalescing and their use in
+kpi_service.
+"""
+import asyncio
+
+import pytest
+
+from app.services import kpi_cache, kpi_flights, kpi_service
+from app.services.cache import SingleFlight, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Unit tests for TTLCache."""
+
+    def test_counts_hits_and_misses(self):
+        cache = TTLCache()
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_expires_entries_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidates_by_tag(self):
+        cache = TTLCache()
+        cache.set("a", 1, tags=(1,))
+        cache.set("b", 2, tags=(1,))
+        cache.set("c", 3, tags=(2,))
+        assert cache.invalidate(1) == 2
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_rejects_results_computed_before_invalidation(self):
+        cache = TTLCache()
+        versions = cache.tag_versions((1,))
+        cache.invalidate(1)
+        assert cache.set("a", 1, tags=(1,), versions=versions) is False
+        assert cache.get("a") is None
+
+    def test_zero_ttl_disables_caching(self):
+        cache = TTLCache(ttl=0)
+        assert cache.set("a", 1) is False
+        assert cache.get("a") is None
+
+
+class TestKPIResponseCache:
+    """The KPI endpoints should serve repeat requests from kpi_cache."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_requests_hit_the_cache(self, client, test_dates):
+        params = {
+            "start_date": test_dates["start_of_test_data"].isoformat(),
+            "end_date": test_dates["today"].isoformat(),
+        }
+        first = await client.get("/api/kpis/campaigns/1", params=params)
+        hits = kpi_cache.hits
+        second = await client.get("/api/kpis/campaigns/1", params=params)
+        assert first.json() == second.json()
+        assert kpi_cache.hits == hits + 1
+
+    @pytest.mark.asyncio
+    async def test_campaign_update_invalidates_cached_responses(
+        self, client, auth_headers, test_dates
+    ):
+        params = {
+            "start_date": test_dates["start_of_test_data"].isoformat(),
+            "end_date": test_dates["today"].isoformat(),
+        }
+        response = await client.get("/api/kpis/campaigns/1/badge-summary", params=params)
+        assert response.json()["campaign"]["name"] == "Test Campaign"
+
+        response = await client.patch(
+            "/api/campaigns/1", json={"name": "Renamed Campaign"}, headers=auth_headers
+        )
+        assert response.status_code == 200
+
+        response = await client.get("/api/kpis/campaigns/1/badge-summary", params=params)
+        assert response.json()["campaign"]["name"] == "Renamed Campaign"
+
+    @pytest.mark.asyncio
+    async def test_missing_campaigns_are_not_cached(self, client):
+        response = await client.get("/api/kpis/campaigns/9999")
+        assert response.status_code == 404
+        assert len(kpi_cache) == 0
+
+
+class TestSingleFlight:
+    """Unit tests for SingleFlight."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_concurrent_calls(self):
+        flights = SingleFlight()
+        runs = 0
+
+        async def compute():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+
+        results = await asyncio.gather(*(flights.do("k", compute) for _ in range(10)))
+        assert runs == 1
+        assert all(result is results[0] for result in results)
+        assert flights.stats()["calls"] == 1
+        assert flights.stats()["coalesced"] == 9
+        assert len(flights) == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        flights = SingleFlight()
+
+        async def compute(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            flights.do("a", lambda: compute(1)), flights.do("b", lambda: compute(2))
+        )
+        assert results == [1, 2]
+        assert flights.stats()["coalesced"] == 0
+
+    @pytest.mark.asyncio
+    async def test_exception_reaches_every_caller(self):
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            *(flights.do("k", fail) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        # A later call starts over instead of reusing the failure
+        with pytest.raises(RuntimeError):
+            await flights.do("k", fail)
+        assert flights.stats()["calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.ensure_future(flights.do("k", compute))
+        second = asyncio.ensure_future(flights.do("k", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+        assert first.cancelled()
+
+
+class TestKPIRequestCoalescing:
+    """Bursts of identical KPI requests should run the query once."""
+
+    @staticmethod
+    def slow_series(monkeypatch):
+        """Make the series query slow enough for a burst to overlap and count it."""
+        calls = []
+        fetch_series = kpi_service._fetch_series
+
+        async def counted(*args, **kwargs):
+            calls.append(args[1:])
+            await asyncio.sleep(0.02)
+            return await fetch_series(*args, **kwargs)
+
+        monkeypatch.setattr(kpi_service, "_fetch_series", counted)
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_burst_of_identical_requests(self, client, monkeypatch):
+        calls = self.slow_series(monkeypatch)
+        coalesced = kpi_flights.coalesced
+
+        responses = await asyncio.gather(
+            *(client.get("/api/kpis/campaigns/1?group_by=week") for _ in range(50))
+        )
+        assert {response.status_code for response in responses} == {200}
+        assert len({response.content for response in responses}) == 1
+        assert len(calls) == 1
+        assert kpi_flights.coalesced - coalesced == 49
+        assert len(kpi_flights) == 0
+
+    @pytest.mark.asyncio
+    async def test_burst_of_mixed_requests(self, client, monkeypatch):
+        calls = self.slow_series(monkeypatch)
+        urls = [
+            "/api/kpis/campaigns/1?group_by=day",
+            "/api/kpis/campaigns/1?group_by=week",
+            "/api/kpis/campaigns/2?group_by=day",
+        ]
+        responses = await asyncio.gather(
+            *(client.get(url) for _ in range(20) for url in urls)
+        )
+        assert {response.status_code for response in responses} == {200}
+        assert len(calls) == len(urls)
+
+    @pytest.mark.asyncio
+    async def test_invalidation_starts_a_new_flight(self, test_db, monkeypatch):
+        """Calls after an invalidation must not get a result computed before it."""
+        calls = self.slow_series(monkeypatch)
+        today = kpi_service.date.today()
+
+        before = asyncio.ensure_future(kpi_service.get_campaign_kpis(1, today, today))
+        await asyncio.sleep(0)
+        kpi_service.invalidate_campaign(1)
+        after = asyncio.ensure_future(kpi_service.get_campaign_kpis(1, today, today))
+        await asyncio.gather(before, after)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_health_reports_coalescing(self, client):
+        response = await client.get("/api/health")
+        assert "coalesced" in response.json()["kpi_single_flight"]
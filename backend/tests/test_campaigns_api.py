@@ -0,0 +1,67 @@
+"""
+API integration tests for campaign listing endpoints.
+"""
+import pytest
+
+from app.database import query_tracer
+
+
+class TestListCampaigns:
+    """Tests for GET /api/campaigns"""
+
+    @pytest.mark.asyncio
+    async def test_includes_agent_counts(self, client):
+        response = await client.get("/api/campaigns")
+        assert response.status_code == 200
+        counts = {c["id"]: c["agent_count"] for c in response.json()["data"]}
+        assert counts == {1: 2, 2: 0}
+
+    @pytest.mark.asyncio
+    async def test_cursor_pagination_filters_and_pages(self, client, auth_headers):
+        """Cursor mode should respect filters and stop after the last page."""
+        for n in range(5):
+            await client.post(
+                "/api/campaigns", json={"name": f"Extra {n}"}, headers=auth_headers
+            )
+
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            response = await client.get(
+                "/api/campaigns",
+                params={"limit": 2, "cursor": cursor, "is_active": True},
+            )
+            body = response.json()
+            assert body["total"] == 6
+            seen.extend(c["name"] for c in body["data"])
+            cursor = body["next_cursor"]
+
+        assert len(seen) == 6
+        assert "Inactive Campaign" not in seen
+        assert seen[0] == "Extra 4"
+
+    @pytest.mark.asyncio
+    async def test_searches_name_and_description(self, client):
+        response = await client.get("/api/campaigns", params={"search": "inact"})
+        assert [c["name"] for c in response.json()["data"]] == ["Inactive Campaign"]
+
+        response = await client.get("/api/campaigns", params={"search": "unit tests"})
+        assert [c["name"] for c in response.json()["data"]] == ["Test Campaign"]
+
+    @pytest.mark.asyncio
+    async def test_ranked_page_matches_once(self, client, monkeypatch):
+        """The ranked JOIN filters the page, so its query has a single MATCH."""
+        monkeypatch.setattr(query_tracer, "enabled", True)
+        query_tracer.clear()
+        response = await client.get("/api/campaigns", params={"search": "inact"})
+        assert [c["name"] for c in response.json()["data"]] == ["Inactive Campaign"]
+        searches = [e["sql"] for e in query_tracer.entries if "MATCH" in e["sql"]]
+        query_tracer.clear()
+        assert searches
+        assert all(sql.count("MATCH") == 1 for sql in searches)
+
+    @pytest.mark.asyncio
+    async def test_search_drops_deleted_campaigns(self, client, auth_headers):
+        await client.delete("/api/campaigns/2", headers=auth_headers)
+        response = await client.get("/api/campaigns", params={"search": "inactive"})
+        assert response.json()["data"] == []
@@ -0,0 +1,126 @@
+"""
+Tests for ETag / If-None-Match handling on KPI and listing endpoints.
+"""
+import pytest
+
+from app.routers import campaigns as campaigns_router
+from app.services import etag_matches, kpi_service
+
+
+async def revalidate(client, url, etag, **kwargs):
+    headers = {**kwargs.pop("headers", {}), "If-None-Match": etag}
+    return await client.get(url, headers=headers, **kwargs)
+
+
+class TestEtagMatches:
+    """Unit tests for If-None-Match parsing."""
+
+    @pytest.mark.parametrize(
+        "header,expected",
+        [
+            (None, False),
+            ('W/"abc"', True),
+            ('"abc"', True),
+            ('W/"other", W/"abc"', True),
+            ("*", True),
+            ('W/"other"', False),
+        ],
+    )
+    def test_weak_comparison(self, header, expected):
+        assert etag_matches(header, 'W/"abc"') is expected
+
+
+class TestKPIConditionalGet:
+    """Conditional GET on the public KPI endpoints."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/api/kpis/campaigns/1",
+            "/api/kpis/campaigns/1?group_by=week",
+            "/api/kpis/campaigns/1/badge",
+            "/api/kpis/campaigns/1/badge-summary",
+        ],
+    )
+    async def test_returns_304_without_querying(self, client, monkeypatch, url):
+        response = await client.get(url)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"')
+
+        monkeypatch.setattr(kpi_service, "get_db", None)
+        response = await revalidate(client, url, etag)
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+    @pytest.mark.asyncio
+    async def test_parameters_change_the_etag(self, client):
+        day = await client.get("/api/kpis/campaigns/1", params={"group_by": "day"})
+        week = await client.get("/api/kpis/campaigns/1", params={"group_by": "week"})
+        assert day.headers["ETag"] != week.headers["ETag"]
+
+    @pytest.mark.asyncio
+    async def test_kpi_write_invalidates_etag(self, client, auth_headers, test_dates):
+        response = await client.get("/api/kpis/campaigns/1/badge")
+        etag = response.headers["ETag"]
+
+        await client.post(
+            "/api/kpis/bulk",
+            json=[{"campaign_id": 1, "date": test_dates["today"].isoformat(), "hours": 10}],
+            headers=auth_headers,
+        )
+        response = await revalidate(client, "/api/kpis/campaigns/1/badge", etag)
+        assert response.status_code == 200
+        assert response.json()["hours"] == 10
+        assert response.headers["ETag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_other_campaigns_keep_their_etag(self, client, auth_headers, test_dates):
+        etag = (await client.get("/api/kpis/campaigns/1")).headers["ETag"]
+        await client.patch("/api/campaigns/2", json={"name": "Renamed"}, headers=auth_headers)
+        response = await revalidate(client, "/api/kpis/campaigns/1", etag)
+        assert response.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_errors_carry_no_etag(self, client):
+        response = await client.get("/api/kpis/campaigns/9999")
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
+
+
+class TestListingConditionalGet:
+    """Conditional GET on the agent and campaign listings."""
+
+    @pytest.mark.asyncio
+    async def test_campaign_list_returns_304_until_changed(
+        self, client, auth_headers, monkeypatch
+    ):
+        etag = (await client.get("/api/campaigns")).headers["ETag"]
+
+        monkeypatch.setattr(campaigns_router, "get_db", None)
+        response = await revalidate(client, "/api/campaigns", etag)
+        assert response.status_code == 304
+        monkeypatch.undo()
+
+        await client.post("/api/campaigns/2/agents", json={"agent_ids": [2]}, headers=auth_headers)
+        response = await revalidate(client, "/api/campaigns", etag)
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_agent_list_follows_campaign_renames(self, client, auth_headers):
+        etag = (await client.get("/api/agents", headers=auth_headers)).headers["ETag"]
+        response = await revalidate(client, "/api/agents", etag, headers=auth_headers)
+        assert response.status_code == 304
+
+        await client.patch("/api/campaigns/1", json={"name": "Renamed"}, headers=auth_headers)
+        response = await revalidate(client, "/api/agents", etag, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["data"][0]["campaigns"][0]["name"] == "Renamed"
+
+    @pytest.mark.asyncio
+    async def test_agent_list_still_requires_admin(self, client, auth_headers):
+        etag = (await client.get("/api/agents", headers=auth_headers)).headers["ETag"]
+        response = await revalidate(client, "/api/agents", etag)
+        assert response.status_code == 401
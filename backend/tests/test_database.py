@@ -0,0 +1,226 @@
+"""
+Tests for the SQLite connection pool and writer queue in database.py.
+
+These tests exercise the pool and queue directly against the test database,
+and through the API with the app lifespan running.
+"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.database import ConnectionPool, WriteQueue, get_db, get_pool, get_write_queue
+from app.main import app
+
+
+class TestConnectionPool:
+    """Tests for ConnectionPool."""
+
+    @pytest.mark.asyncio
+    async def test_reuses_warm_connections(self, test_db):
+        """Sequential checkouts should reuse the same connection."""
+        pool = ConnectionPool(max_readers=2, max_writers=1)
+        try:
+            async with pool.connection(readonly=True) as first:
+                pass
+            async with pool.connection(readonly=True) as second:
+                pass
+            assert first is second
+
+            stats = pool.stats()["readers"]
+            assert stats["open"] == 1
+            assert stats["acquired"] == 2
+            assert stats["reused"] == 1
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_reader_lane_is_read_only(self, test_db):
+        """Reader connections should reject writes."""
+        pool = ConnectionPool()
+        try:
+            async with pool.connection(readonly=True) as db:
+                cursor = await db.execute("SELECT COUNT(*) AS count FROM campaign")
+                row = await cursor.fetchone()
+                assert row["count"] == 2
+
+                with pytest.raises(sqlite3.OperationalError):
+                    await db.execute("DELETE FROM campaign")
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_writer_lane_is_bounded(self, test_db):
+        """A second writer should wait until the first is returned."""
+        pool = ConnectionPool(max_writers=1, acquire_timeout=0.05)
+        try:
+            async with pool.connection() as db:
+                assert db is not None
+                with pytest.raises(asyncio.TimeoutError):
+                    async with pool.connection():
+                        pass
+            async with pool.connection():
+                pass
+            assert pool.stats()["writers"]["open"] == 1
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_discards_unhealthy_connections(self, test_db):
+        """A connection that fails its health check should be replaced."""
+        pool = ConnectionPool()
+        try:
+            async with pool.connection(readonly=True) as first:
+                pass
+            await first.close()
+
+            async with pool.connection(readonly=True) as second:
+                cursor = await second.execute("SELECT 1 AS ok")
+                assert (await cursor.fetchone())["ok"] == 1
+
+            assert second is not first
+            assert pool.stats()["readers"]["discarded"] == 1
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_rolls_back_open_transactions_on_return(self, test_db):
+        """Uncommitted writes should not leak into the next borrower."""
+        pool = ConnectionPool()
+        try:
+            async with pool.connection() as db:
+                await db.execute("DELETE FROM campaign_kpi")
+            async with pool.connection(readonly=True) as db:
+                cursor = await db.execute("SELECT COUNT(*) AS count FROM campaign_kpi")
+                assert (await cursor.fetchone())["count"] == 7
+        finally:
+            await pool.close()
+
+
+class TestStorageProfile:
+    """Tests for the PRAGMA profile applied by init_db and get_db."""
+
+    @pytest.mark.asyncio
+    async def test_database_uses_wal_journal(self, test_db):
+        """init_db should switch the database to WAL mode."""
+        async with get_db(readonly=True) as db:
+            cursor = await db.execute("PRAGMA journal_mode")
+            assert (await cursor.fetchone())[0] == "wal"
+
+    @pytest.mark.asyncio
+    async def test_connections_get_tuned_pragmas(self, test_db):
+        """Each connection should have the busy timeout and synchronous level."""
+        async with get_db() as db:
+            cursor = await db.execute("PRAGMA busy_timeout")
+            assert (await cursor.fetchone())[0] == 5000
+            cursor = await db.execute("PRAGMA synchronous")
+            assert (await cursor.fetchone())[0] == 1  # NORMAL
+
+
+class TestWriteQueue:
+    """Tests for the single-writer WriteQueue."""
+
+    @pytest.mark.asyncio
+    async def test_group_commits_concurrent_writes(self, test_db):
+        """Writes queued together should share one transaction."""
+        queue = WriteQueue(max_batch=50)
+
+        def make_job(n):
+            async def job(db):
+                cursor = await db.execute(
+                    "INSERT INTO agent (first_name, last_name, email) VALUES (?, ?, ?)",
+                    ("Queued", str(n), f"queued{n}@test.com"),
+                )
+                return cursor.lastrowid
+            return job
+
+        # Queue everything before the writer starts so it forms one batch
+        submissions = [asyncio.ensure_future(queue.submit(make_job(n))) for n in range(20)]
+        await asyncio.sleep(0)
+        queue.start()
+        ids = await asyncio.gather(*submissions)
+        await queue.stop()
+
+        assert len(set(ids)) == 20
+        assert queue.stats()["batches"] == 1
+        assert queue.stats()["largest_batch"] == 20
+
+        async with get_db(readonly=True) as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*) AS count FROM agent WHERE first_name = 'Queued'"
+            )
+            assert (await cursor.fetchone())["count"] == 20
+
+    @pytest.mark.asyncio
+    async def test_failing_job_does_not_roll_back_its_batch(self, test_db):
+        """A failing job should only undo its own statements."""
+        queue = WriteQueue()
+
+        async def good(db):
+            await db.execute("UPDATE campaign SET description = 'updated' WHERE id = 1")
+
+        async def bad(db):
+            await db.execute("UPDATE campaign SET description = 'lost' WHERE id = 2")
+            await db.execute(
+                "INSERT INTO agent (first_name, last_name, email) VALUES ('Dup', 'E', 'john.doe@test.com')"
+            )
+
+        submissions = [
+            asyncio.ensure_future(queue.submit(good)),
+            asyncio.ensure_future(queue.submit(bad)),
+        ]
+        await asyncio.sleep(0)
+        queue.start()
+        results = await asyncio.gather(*submissions, return_exceptions=True)
+        await queue.stop()
+
+        assert results[0] is None
+        assert isinstance(results[1], sqlite3.IntegrityError)
+        async with get_db(readonly=True) as db:
+            cursor = await db.execute("SELECT id, description FROM campaign ORDER BY id")
+            rows = await cursor.fetchall()
+            assert rows[0]["description"] == "updated"
+            assert rows[1]["description"] == "An inactive test campaign"
+
+
+class TestPooledApp:
+    """Requests served with the lifespan's pool and write queue running"""
+
+    @pytest.mark.asyncio
+    async def test_routes_use_pool_and_write_queue(self, pooled_client, auth_headers):
+        pool, write_queue = get_pool(), get_write_queue()
+        assert pool is not None and write_queue is not None
+
+        response = await pooled_client.get("/api/agents", headers=auth_headers)
+        assert response.status_code == 200
+        readers = pool.stats()["readers"]
+        assert readers["acquired"] >= 1 and readers["in_use"] == 0
+
+        response = await pooled_client.post(
+            "/api/agents",
+            json={"first_name": "Pooled", "last_name": "Writer", "email": "pooled@test.com"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        assert write_queue.stats()["submitted"] >= 1
+        assert write_queue.stats()["failed"] == 0
+
+        # The write is visible to a reader-lane connection
+        response = await pooled_client.get(
+            "/api/agents", params={"search": "pooled"}, headers=auth_headers
+        )
+        assert [a["email"] for a in response.json()["data"]] == ["pooled@test.com"]
+
+        health = (await pooled_client.get("/api/health")).json()
+        assert health["database_pool"]["writers"]["acquired"] >= 1
+
+        # Reader-lane connections refuse writes
+        async with get_db(readonly=True) as db:
+            with pytest.raises(sqlite3.OperationalError):
+                await db.execute("DELETE FROM agent")
+
+    @pytest.mark.asyncio
+    async def test_lifespan_shuts_down_pool(self, test_db):
+        async with app.router.lifespan_context(app):
+            assert get_pool() is not None
+        assert get_pool() is None and get_write_queue() is None
@@ -0,0 +1,149 @@
+"""
+Tests for the bulk KPI import CLI (app.ingest).
+"""
+import pytest
+
+from app.database import DERIVED_TABLES_DIRTY, get_db, get_flag, init_db
+from app.ingest import KPI_INDEX, _suspend_derived_tables, ingest, main
+
+
+def write_csv(path, lines):
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+class TestIngest:
+    """Tests for app.ingest.ingest"""
+
+    @pytest.mark.asyncio
+    async def test_loads_rows_by_campaign_name_and_id(self, test_db, tmp_path):
+        csv_path = write_csv(tmp_path / "kpis.csv", [
+            "campaign,campaign_id,date,hours",
+            "Inactive Campaign,,2024-01-01,10",
+            "Inactive Campaign,,2024-01-02,20.5",
+            ",2,2024-01-03,30",
+            "Unknown Campaign,,2024-01-04,40",
+            "Inactive Campaign,,2024-13-01,50",
+        ])
+        stats = await ingest([csv_path], batch_size=2, quiet=True)
+        assert stats["read"] == 5
+        assert stats["loaded"] == 3
+        assert stats["skipped"] == 2
+        assert stats["batches"] == 3
+
+        async with get_db() as db:
+            cursor = await db.execute(
+                "SELECT date, hours FROM campaign_kpi WHERE campaign_id = 2 ORDER BY date"
+            )
+            rows = [tuple(row) for row in await cursor.fetchall()]
+        assert rows == [("2024-01-01", 10.0), ("2024-01-02", 20.5), ("2024-01-03", 30.0)]
+
+    @pytest.mark.asyncio
+    async def test_reports_row_numbers_per_file(self, test_db, tmp_path, capsys):
+        first = write_csv(tmp_path / "first.csv", [
+            "campaign_id,date,hours",
+            "2,2024-01-01,10",
+            "2,2024-01-02,oops",
+        ])
+        second = write_csv(tmp_path / "second.csv", [
+            "campaign_id,date,hours",
+            "2,2024-01-03,10",
+            "2,2024-01-04,10",
+            "9999,2024-01-05,10",
+        ])
+        stats = await ingest([first, second])
+        assert stats["read"] == 5
+        errors = [line for line in capsys.readouterr().err.splitlines() if ": row " in line]
+        assert errors == [
+            f"{first}: row 2: hours must be a number",
+            f"{second}: row 3: campaign 9999 does not exist",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_restores_index_triggers_and_rollups(self, test_db, tmp_path):
+        async with get_db() as db:
+            cursor = await db.execute(
+                "SELECT name FROM sqlite_master WHERE tbl_name = 'campaign_kpi' ORDER BY name"
+            )
+            schema_before = [row["name"] for row in await cursor.fetchall()]
+
+        csv_path = write_csv(tmp_path / "kpis.csv", [
+            "campaign_id,date,hours",
+            "2,2024-01-01,10",
+            "2,2024-01-02,15",
+            "2,2024-01-02,25",
+        ])
+        await ingest([csv_path], quiet=True)
+
+        async with get_db() as db:
+            cursor = await db.execute(
+                "SELECT name FROM sqlite_master WHERE tbl_name = 'campaign_kpi' ORDER BY name"
+            )
+            assert [row["name"] for row in await cursor.fetchall()] == schema_before
+            assert KPI_INDEX in schema_before
+
+            cursor = await db.execute(
+                "SELECT total_hours, days_count FROM campaign_kpi_monthly "
+                "WHERE campaign_id = 2 AND period_start = '2024-01-01'"
+            )
+            assert tuple(await cursor.fetchone()) == (35.0, 2)
+            cursor = await db.execute(
+                "SELECT cum_hours, cum_days FROM campaign_kpi_cumulative "
+                "WHERE campaign_id = 2 AND date = '2024-01-02'"
+            )
+            assert tuple(await cursor.fetchone()) == (35.0, 2)
+
+            # Triggers are live again after the load
+            await db.execute(
+                "INSERT INTO campaign_kpi (campaign_id, date, hours) VALUES (2, '2024-01-03', 5)"
+            )
+            cursor = await db.execute(
+                "SELECT total_hours FROM campaign_kpi_monthly "
+                "WHERE campaign_id = 2 AND period_start = '2024-01-01'"
+            )
+            assert (await cursor.fetchone())[0] == 40.0
+
+    @pytest.mark.asyncio
+    async def test_init_db_repairs_an_aborted_load(self, test_db):
+        """A load killed before restoring the triggers is repaired on the next start."""
+        async with get_db() as db:
+            await _suspend_derived_tables(db)
+            await db.executemany(
+                "INSERT INTO campaign_kpi (campaign_id, date, hours) VALUES (2, ?, ?)",
+                [("2024-01-01", 10), ("2024-01-02", 25)],
+            )
+            await db.commit()
+            # The process dies here: no restore, no rebuild
+            assert await get_flag(db, DERIVED_TABLES_DIRTY)
+
+        await init_db()
+
+        async with get_db() as db:
+            assert not await get_flag(db, DERIVED_TABLES_DIRTY)
+            cursor = await db.execute(
+                "SELECT name FROM sqlite_master WHERE name = ?", (KPI_INDEX,)
+            )
+            assert await cursor.fetchone() is not None
+            cursor = await db.execute(
+                "SELECT total_hours, days_count FROM campaign_kpi_monthly "
+                "WHERE campaign_id = 2 AND period_start = '2024-01-01'"
+            )
+            assert tuple(await cursor.fetchone()) == (35.0, 2)
+            cursor = await db.execute(
+                "SELECT cum_hours, cum_days FROM campaign_kpi_cumulative "
+                "WHERE campaign_id = 2 AND date = '2024-01-02'"
+            )
+            assert tuple(await cursor.fetchone()) == (35.0, 2)
+
+    @pytest.mark.asyncio
+    async def test_completed_load_clears_dirty_flag(self, test_db, tmp_path):
+        csv_path = write_csv(tmp_path / "kpis.csv", ["campaign_id,date,hours", "2,2024-01-01,10"])
+        await ingest([csv_path], quiet=True)
+        async with get_db() as db:
+            assert not await get_flag(db, DERIVED_TABLES_DIRTY)
+
+    def test_rejects_unsupported_files(self, tmp_path):
+        path = tmp_path / "kpis.xlsx"
+        path.write_text("")
+        with pytest.raises(SystemExit):
+            main([str(path)])
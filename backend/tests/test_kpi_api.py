@@ -5,8 +5,13 @@ These tests verify the KPI-related API endpoints return correct
 data structures and handle error cases properly.
 """
 import pytest
+from contextlib import asynccontextmanager
 from datetime import date, timedelta
 
+from app import database
+from app.routers import kpis as kpis_router
+from app.services import kpi_service, serialization
+
 
 class TestGetCampaignKPIs:
     """Tests for GET /api/kpis/campaigns/{campaign_id}"""
@@ -148,6 +153,254 @@ class TestGetCampaignKPIs:
         assert len(no_badge_days) >= 1
 
 
+class TestFastJSON:
+    """The fast serialization path must match the validated response_model output."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/api/kpis/campaigns/1?group_by=day",
+            "/api/kpis/campaigns/1?group_by=month",
+            "/api/kpis/campaigns/2",
+            "/api/kpis/campaigns/1?group_by=week&format=columnar",
+            "/api/kpis/campaigns?ids=1,2,9999&group_by=week",
+            "/api/kpis/campaigns/1/dashboard?group_by=week",
+            "/api/kpis/campaigns/2/dashboard",
+        ],
+    )
+    async def test_matches_validated_output(self, client, monkeypatch, url, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr(serialization, "orjson", None)
+        monkeypatch.setattr(kpis_router, "KPI_FAST_JSON", False)
+        validated = await client.get(url)
+        monkeypatch.setattr(kpis_router, "KPI_FAST_JSON", True)
+        fast = await client.get(url)
+
+        assert fast.status_code == validated.status_code == 200
+        assert fast.headers["content-type"] == "application/json"
+        assert fast.headers.get("ETag") == validated.headers.get("ETag")
+        assert fast.content == validated.content
+
+
+class TestColumnarFormat:
+    """Tests for GET /api/kpis/campaigns/{campaign_id}?format=columnar"""
+
+    @pytest.mark.asyncio
+    async def test_dense_daily_series(self, client, test_dates):
+        response = await client.get(
+            "/api/kpis/campaigns/1",
+            params={
+                "start_date": test_dates["start_of_test_data"].isoformat(),
+                "end_date": test_dates["today"].isoformat(),
+                "format": "columnar",
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["format"] == "columnar"
+        assert data["badge_codes"] == [None, "bronze", "silver", "gold", "platinum"]
+        assert data["series"] == {
+            "length": 7,
+            "start": test_dates["start_of_test_data"].isoformat(),
+            "step": "day",
+            "dates": None,
+            "hours": [250.0, 200.0, 150.0, 80.0, 30.0, 190.0, 140.0],
+            "badge": [4, 3, 2, 1, 0, 3, 2],
+            "days_in_period": None,
+            "is_complete": None,
+        }
+        assert data["summary"]["days_with_data"] == 7
+
+    @pytest.mark.asyncio
+    async def test_sparse_series_lists_dates(self, client, auth_headers):
+        await client.post(
+            "/api/kpis/bulk",
+            json=[
+                {"campaign_id": 2, "date": "2024-01-01", "hours": 10},
+                {"campaign_id": 2, "date": "2024-01-03", "hours": 70},
+            ],
+            headers=auth_headers,
+        )
+        response = await client.get(
+            "/api/kpis/campaigns/2",
+            params={"start_date": "2024-01-01", "end_date": "2024-01-31", "format": "columnar"},
+        )
+        series = response.json()["series"]
+        assert series["step"] is None
+        assert series["dates"] == ["2024-01-01", "2024-01-03"]
+        assert series["badge"] == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_monthly_series_keeps_period_columns(self, client, auth_headers):
+        await client.post(
+            "/api/kpis/bulk",
+            json=[
+                {"campaign_id": 2, "date": f"2024-0{month}-01", "hours": 100}
+                for month in (1, 2, 3)
+            ],
+            headers=auth_headers,
+        )
+        response = await client.get(
+            "/api/kpis/campaigns/2",
+            params={
+                "start_date": "2024-01-01",
+                "end_date": "2024-03-31",
+                "group_by": "month",
+                "format": "columnar",
+            },
+        )
+        series = response.json()["series"]
+        assert (series["start"], series["step"]) == ("2024-01-01", "month")
+        assert series["days_in_period"] == [1, 1, 1]
+        assert series["is_complete"] == [False, False, False]
+
+    @pytest.mark.asyncio
+    async def test_shrinks_long_daily_series(self, client, auth_headers):
+        start = date(2023, 1, 1)
+        await client.post(
+            "/api/kpis/bulk",
+            json=[
+                {"campaign_id": 2, "date": (start + timedelta(days=n)).isoformat(), "hours": n % 300}
+                for n in range(365)
+            ],
+            headers=auth_headers,
+        )
+        params = {"start_date": "2023-01-01", "end_date": "2023-12-31"}
+        rows = await client.get("/api/kpis/campaigns/2", params=params)
+        columnar = await client.get(
+            "/api/kpis/campaigns/2", params={**params, "format": "columnar"}
+        )
+        assert rows.headers["ETag"] != columnar.headers["ETag"]
+        assert len(columnar.content) * 8 < len(rows.content)
+
+    @pytest.mark.asyncio
+    async def test_msgpack_negotiation(self, client):
+        msgpack = pytest.importorskip("msgpack")
+        response = await client.get(
+            "/api/kpis/campaigns/1",
+            params={"format": "columnar"},
+            headers={"Accept": "application/msgpack"},
+        )
+        assert response.headers["content-type"] == "application/msgpack"
+        assert response.headers["Vary"] == "Accept"
+        assert msgpack.unpackb(response.content)["format"] == "columnar"
+
+    @pytest.mark.asyncio
+    async def test_msgpack_refused_with_q_zero(self, client):
+        pytest.importorskip("msgpack")
+        response = await client.get(
+            "/api/kpis/campaigns/1",
+            params={"format": "columnar"},
+            headers={"Accept": "application/msgpack;q=0, application/json"},
+        )
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["format"] == "columnar"
+
+    @pytest.mark.parametrize(
+        "accept,expected",
+        [
+            ("application/msgpack", True),
+            ("application/json, application/x-msgpack", True),
+            ("application/msgpack;q=0, application/json", False),
+            ("application/msgpack; q=0.0", False),
+            ("application/msgpack;q=0.5, application/json", False),
+            ("application/msgpack;q=0.5, */*;q=0.1", True),
+            ("application/json;q=0.2, APPLICATION/MSGPACK;q=0.9", True),
+            ("*/*", False),
+            ("application/msgpack-not-really", False),
+            ("", False),
+        ],
+    )
+    def test_msgpack_accept_header(self, accept, expected):
+        assert serialization.prefers_msgpack(accept) is expected
+
+
+class TestGetBatchKPIs:
+    """Tests for GET /api/kpis/campaigns?ids=..."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("group_by", ["day", "week", "month"])
+    async def test_matches_single_campaign_responses(self, client, test_dates, group_by):
+        """Each entry should equal what the per-campaign endpoint returns."""
+        params = {
+            "start_date": test_dates["start_of_test_data"].isoformat(),
+            "end_date": test_dates["today"].isoformat(),
+            "group_by": group_by,
+        }
+        response = await client.get("/api/kpis/campaigns", params={**params, "ids": "1,2"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["period"]["group_by"] == group_by
+        assert data["not_found"] == []
+        assert sorted(data["campaigns"]) == ["1", "2"]
+        assert data["campaigns"]["2"]["data"] == []
+
+        for campaign_id in (1, 2):
+            single = await client.get(f"/api/kpis/campaigns/{campaign_id}", params=params)
+            assert data["campaigns"][str(campaign_id)] == single.json()
+
+    @pytest.mark.asyncio
+    async def test_uses_constant_number_of_queries(self, client, monkeypatch):
+        """A 50-campaign request should cost one lookup plus one series query."""
+        async with database.get_db() as db:
+            await db.executemany(
+                "INSERT INTO campaign (name) VALUES (?)",
+                [(f"Wallboard {n}",) for n in range(48)],
+            )
+            await db.commit()
+            # Badge tier overrides are loaded once, not per request
+            await kpi_service.badge_tier_store.ladders(db)
+
+        executed = []
+        original_get_db = database.get_db
+
+        @asynccontextmanager
+        async def traced_get_db(*args, **kwargs):
+            async with original_get_db(*args, **kwargs) as db:
+                await db.set_trace_callback(executed.append)
+                try:
+                    yield db
+                finally:
+                    await db.set_trace_callback(None)
+
+        monkeypatch.setattr(kpi_service, "get_db", traced_get_db)
+        response = await client.get(
+            "/api/kpis/campaigns", params={"ids": "all", "group_by": "week"}
+        )
+        assert len(response.json()["campaigns"]) == 50
+        assert len([s for s in executed if not s.startswith("PRAGMA")]) == 2
+
+    @pytest.mark.asyncio
+    async def test_all_returns_every_campaign(self, client):
+        response = await client.get("/api/kpis/campaigns", params={"ids": "all"})
+        assert response.status_code == 200
+        assert sorted(response.json()["campaigns"]) == ["1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_reports_unknown_ids(self, client):
+        response = await client.get("/api/kpis/campaigns", params={"ids": "1,9999"})
+        assert response.status_code == 200
+        assert list(response.json()["campaigns"]) == ["1"]
+        assert response.json()["not_found"] == [9999]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("ids", ["", "1,abc", ","])
+    async def test_returns_400_for_invalid_ids(self, client, ids):
+        response = await client.get("/api/kpis/campaigns", params={"ids": ids})
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_limits_explicit_ids(self, client, monkeypatch):
+        monkeypatch.setattr(kpis_router, "KPI_BATCH_MAX_IDS", 2)
+        response = await client.get("/api/kpis/campaigns", params={"ids": "1,2,3"})
+        assert response.status_code == 400
+        assert "At most 2" in response.json()["detail"]
+        response = await client.get("/api/kpis/campaigns", params={"ids": "1,2"})
+        assert response.status_code == 200
+
+
 class TestGetDailyBadge:
     """Tests for GET /api/kpis/campaigns/{campaign_id}/badge"""
 
@@ -307,6 +560,254 @@ class TestGetBadgeSummary:
         assert data["average_daily_hours"] == 148.6
         assert data["average_badge"] == "silver"
 
+    @pytest.mark.asyncio
+    async def test_counts_threshold_boundaries_like_calculate_badge(
+        self, client, auth_headers
+    ):
+        """Values on and just below each threshold land in the same tier as in Python."""
+        hours = [0, 59.9, 60, 119.9, 120, 179.9, 180, 239.9, 240, 500]
+        start = date(2024, 1, 1)
+        await client.post(
+            "/api/kpis/bulk",
+            json=[
+                {"campaign_id": 2, "date": (start + timedelta(days=n)).isoformat(), "hours": h}
+                for n, h in enumerate(hours)
+            ],
+            headers=auth_headers,
+        )
+        response = await client.get(
+            "/api/kpis/campaigns/2/badge-summary",
+            params={"start_date": "2024-01-01", "end_date": "2024-12-31"},
+        )
+        data = response.json()
+        assert data["badge_breakdown"] == {
+            "platinum": 2, "gold": 2, "silver": 2, "bronze": 2, "none": 2,
+        }
+        assert data["total_days"] == 10
+        assert data["total_hours"] == round(sum(hours), 1)
+
+    @pytest.mark.asyncio
+    async def test_campaign_without_data_in_range(self, client):
+        response = await client.get(
+            "/api/kpis/campaigns/2/badge-summary",
+            params={"start_date": "2024-01-01", "end_date": "2024-12-31"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["campaign"]["name"] == "Inactive Campaign"
+        assert data["total_days"] == 0
+        assert data["total_hours"] == 0
+        assert data["average_badge"] is None
+        assert sum(data["badge_breakdown"].values()) == 0
+
+    @pytest.mark.asyncio
+    async def test_fetches_a_single_row(self, client, monkeypatch, test_dates):
+        """The summary should be one aggregate query, not one row per day."""
+        fetched = []
+        original_get_db = database.get_db
+
+        @asynccontextmanager
+        async def counting_get_db(*args, **kwargs):
+            async with original_get_db(*args, **kwargs) as db:
+                original_execute = db.execute
+
+                async def execute(*a, **kw):
+                    cursor = await original_execute(*a, **kw)
+                    original_fetchall, original_fetchone = cursor.fetchall, cursor.fetchone
+
+                    async def fetchall():
+                        rows = await original_fetchall()
+                        fetched.extend(rows)
+                        return rows
+
+                    async def fetchone():
+                        row = await original_fetchone()
+                        fetched.append(row)
+                        return row
+
+                    cursor.fetchall, cursor.fetchone = fetchall, fetchone
+                    return cursor
+
+                db.execute = execute
+                yield db
+
+        monkeypatch.setattr(kpi_service, "get_db", counting_get_db)
+        response = await client.get(
+            "/api/kpis/campaigns/1/badge-summary",
+            params={
+                "start_date": test_dates["start_of_test_data"].isoformat(),
+                "end_date": test_dates["today"].isoformat(),
+            },
+        )
+        assert response.json()["total_days"] == 7
+        assert len(fetched) == 1
+
+
+class TestGetDashboard:
+    """Tests for GET /api/kpis/campaigns/{campaign_id}/dashboard"""
+
+    @pytest.mark.asyncio
+    async def test_returns_404_for_nonexistent_campaign(self, client):
+        response = await client.get("/api/kpis/campaigns/9999/dashboard")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_returns_400_when_start_after_end(self, client):
+        response = await client.get(
+            "/api/kpis/campaigns/1/dashboard",
+            params={"start_date": "2025-01-15", "end_date": "2025-01-01"},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("group_by", ["day", "week", "month"])
+    async def test_matches_separate_endpoints(self, client, test_dates, group_by):
+        params = {
+            "start_date": (test_dates["today"] - timedelta(days=40)).isoformat(),
+            "end_date": test_dates["today"].isoformat(),
+        }
+        response = await client.get(
+            "/api/kpis/campaigns/1/dashboard", params={**params, "group_by": group_by}
+        )
+        assert response.status_code == 200
+        dashboard = response.json()
+
+        kpis = await client.get("/api/kpis/campaigns/1", params={**params, "group_by": group_by})
+        badge = await client.get("/api/kpis/campaigns/1/badge")
+        summary = await client.get("/api/kpis/campaigns/1/badge-summary", params=params)
+        assert dashboard["kpis"] == kpis.json()
+        assert dashboard["badge"] == badge.json()
+        assert dashboard["badge_summary"] == summary.json()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("group_by", ["week", "month"])
+    async def test_matches_series_at_tier_threshold(self, client, group_by):
+        """Six days averaging exactly 60 hours: float sums differ in the last bit."""
+        async with database.get_db() as db:
+            await db.executemany(
+                "INSERT INTO campaign_kpi (campaign_id, date, hours) VALUES (2, ?, ?)",
+                [
+                    (f"2026-01-{day:02d}", hours)
+                    for day, hours in zip(range(5, 11), [67.1, 67.8, 53.2, 53.0, 56.7, 62.2])
+                ],
+            )
+            await db.commit()
+        for end_date in ("2026-01-10", "2026-01-31"):
+            params = {"start_date": "2026-01-01", "end_date": end_date, "group_by": group_by}
+            dashboard = await client.get("/api/kpis/campaigns/2/dashboard", params=params)
+            kpis = await client.get("/api/kpis/campaigns/2", params=params)
+            assert dashboard.json()["kpis"] == kpis.json()
+            assert [p["badge"] for p in kpis.json()["data"]] == ["bronze"]
+
+    @pytest.mark.asyncio
+    async def test_target_date_outside_range(self, client, test_dates):
+        response = await client.get(
+            "/api/kpis/campaigns/1/dashboard",
+            params={
+                "start_date": "2020-01-01",
+                "end_date": "2020-01-31",
+                "target_date": test_dates["yesterday"].isoformat(),
+            },
+        )
+        data = response.json()
+        assert data["kpis"]["data"] == []
+        assert data["badge"]["hours"] == 190.0
+        assert data["badge"]["badge"] == "gold"
+
+    @pytest.mark.asyncio
+    async def test_uses_one_connection(self, client, monkeypatch):
+        """The composite payload should cost one connection and three queries."""
+        connections = 0
+        executed = []
+        original_get_db = database.get_db
+
+        @asynccontextmanager
+        async def traced_get_db(*args, **kwargs):
+            nonlocal connections
+            connections += 1
+            async with original_get_db(*args, **kwargs) as db:
+                await db.set_trace_callback(executed.append)
+                try:
+                    yield db
+                finally:
+                    await db.set_trace_callback(None)
+
+        monkeypatch.setattr(kpi_service, "get_db", traced_get_db)
+        response = await client.get("/api/kpis/campaigns/1/dashboard")
+        assert response.status_code == 200
+        assert connections == 1
+        # Campaign lookup, badge tiers (first use only) and the daily rows
+        assert len([s for s in executed if not s.startswith("PRAGMA")]) == 3
+
+        # Week/month series also read the rollups
+        executed.clear()
+        response = await client.get("/api/kpis/campaigns/1/dashboard", params={"group_by": "week"})
+        assert response.status_code == 200
+        assert connections == 2
+        assert len([s for s in executed if not s.startswith("PRAGMA")]) == 3
+
+
+class TestGetCampaignSummary:
+    """Tests for GET /api/kpis/campaigns/{campaign_id}/summary"""
+
+    @pytest.mark.asyncio
+    async def test_returns_404_for_nonexistent_campaign(self, client):
+        response = await client.get("/api/kpis/campaigns/9999/summary")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_returns_400_when_start_after_end(self, client):
+        response = await client.get(
+            "/api/kpis/campaigns/1/summary",
+            params={"start_date": "2025-01-15", "end_date": "2025-01-01"},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_totals_for_range(self, client, test_dates):
+        response = await client.get(
+            "/api/kpis/campaigns/1/summary",
+            params={
+                "start_date": test_dates["start_of_test_data"].isoformat(),
+                "end_date": test_dates["today"].isoformat(),
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        # 250 + 200 + 150 + 80 + 30 + 190 + 140
+        assert data["summary"]["total_hours"] == 1040.0
+        assert data["summary"]["days_with_data"] == 7
+        assert data["summary"]["average_daily_hours"] == 148.6
+        assert data["average_badge"] == "silver"
+
+    @pytest.mark.asyncio
+    async def test_partial_and_empty_ranges(self, client, test_dates):
+        yesterday = test_dates["yesterday"].isoformat()
+        response = await client.get(
+            "/api/kpis/campaigns/1/summary",
+            params={"start_date": yesterday, "end_date": yesterday},
+        )
+        assert response.json()["summary"]["total_hours"] == 190.0
+
+        response = await client.get(
+            "/api/kpis/campaigns/2/summary",
+            params={"start_date": "2000-01-01", "end_date": yesterday},
+        )
+        assert response.json()["summary"] == {
+            "total_hours": 0.0,
+            "average_daily_hours": 0.0,
+            "days_with_data": 0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_answers_conditional_get(self, client):
+        first = await client.get("/api/kpis/campaigns/1/summary")
+        again = await client.get(
+            "/api/kpis/campaigns/1/summary",
+            headers={"If-None-Match": first.headers["ETag"]},
+        )
+        assert again.status_code == 304
+
 
 class TestGetBadgeThresholds:
     """Tests for GET /api/kpis/badge-thresholds"""
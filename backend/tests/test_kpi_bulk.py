@@ -0,0 +1,236 @@
+"""
+API integration tests for POST /api/kpis/bulk.
+"""
+import json
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pytest
+
+from app import database
+from app.database import get_db, rebuild_cumulative
+from app.routers import kpis as kpis_router
+from app.services import kpi_service
+
+
+class TestBulkUpsertKPIs:
+    """Tests for POST /api/kpis/bulk"""
+
+    @pytest.mark.asyncio
+    async def test_requires_admin(self, client):
+        response = await client.post("/api/kpis/bulk", json=[])
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_inserts_json_array(self, client, auth_headers):
+        rows = [
+            {"campaign_id": 2, "date": f"2024-01-{day:02d}", "hours": 100 + day}
+            for day in range(1, 11)
+        ]
+        response = await client.post("/api/kpis/bulk", json=rows, headers=auth_headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["received"] == 10
+        assert body["upserted"] == 10
+        assert body["failed"] == 0
+        assert body["errors"] == []
+        assert body["rows_per_second"] > 0
+
+        response = await client.get(
+            "/api/kpis/campaigns/2",
+            params={"start_date": "2024-01-01", "end_date": "2024-01-31", "group_by": "month"},
+        )
+        assert response.json()["data"] == [
+            {
+                "date": "2024-01-01",
+                "hours": 1055.0,
+                "badge": "bronze",
+                "days_in_period": 10,
+                "is_complete": False,
+            }
+        ]
+
+    @pytest.mark.asyncio
+    async def test_overwrites_existing_days_and_refreshes_cache(
+        self, client, auth_headers, test_dates
+    ):
+        today = test_dates["today"].isoformat()
+        response = await client.get("/api/kpis/campaigns/1/badge", params={"target_date": today})
+        assert response.json()["badge"] == "silver"
+
+        response = await client.post(
+            "/api/kpis/bulk",
+            json=[{"campaign_id": 1, "date": today, "hours": 245}],
+            headers=auth_headers,
+        )
+        assert response.json()["upserted"] == 1
+
+        response = await client.get("/api/kpis/campaigns/1/badge", params={"target_date": today})
+        assert response.json()["hours"] == 245
+        assert response.json()["badge"] == "platinum"
+
+    @pytest.mark.asyncio
+    async def test_reports_invalid_rows_without_stopping(self, client, auth_headers):
+        rows = [
+            {"campaign_id": 2, "date": "2024-02-01", "hours": 10},
+            {"campaign_id": 2, "date": "2024-02-30", "hours": 10},
+            {"campaign_id": 2, "date": "2024-02-02", "hours": -1},
+            {"campaign_id": "abc", "date": "2024-02-03", "hours": 1},
+            {"campaign_id": 9999, "date": "2024-02-04", "hours": 1},
+            "not an object",
+            {"campaign_id": 2, "date": "2024-02-05", "hours": "12.5"},
+        ]
+        response = await client.post("/api/kpis/bulk", json=rows, headers=auth_headers)
+        body = response.json()
+        assert body["received"] == 7
+        assert body["upserted"] == 2
+        assert body["failed"] == 5
+        assert sorted(error["row"] for error in body["errors"]) == [2, 3, 4, 5, 6]
+        errors = {error["row"]: error["error"] for error in body["errors"]}
+        assert "date" in errors[2]
+        assert "hours" in errors[3]
+        assert "campaign_id" in errors[4]
+        assert "9999" in errors[5]
+
+    @pytest.mark.asyncio
+    async def test_accepts_ndjson_in_chunks(self, client, auth_headers, monkeypatch):
+        monkeypatch.setattr(kpis_router, "KPI_BULK_CHUNK_SIZE", 3)
+        lines = [
+            json.dumps({"campaign_id": 2, "date": date(2024, 3, day).isoformat(), "hours": 50})
+            for day in range(1, 8)
+        ]
+        lines.insert(3, "{broken")
+        lines.insert(5, "")
+        response = await client.post(
+            "/api/kpis/bulk",
+            content="\n".join(lines) + "\n",
+            headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+        )
+        body = response.json()
+        assert body["upserted"] == 7
+        assert body["chunks"] == 3
+        assert body["errors"] == [{"row": 4, "error": "invalid JSON"}]
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_array_body(self, client, auth_headers):
+        response = await client.post(
+            "/api/kpis/bulk", json={"campaign_id": 1}, headers=auth_headers
+        )
+        assert response.status_code == 400
+
+
+async def cumulative_rows(campaign_id):
+    async with get_db(readonly=True) as db:
+        cursor = await db.execute(
+            "SELECT date, cum_hours, cum_days FROM campaign_kpi_cumulative "
+            "WHERE campaign_id = ? ORDER BY date",
+            (campaign_id,),
+        )
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Record every SQL statement run on connections from get_db."""
+    executed = []
+    original_get_db = database.get_db
+
+    @asynccontextmanager
+    async def traced_get_db(*args, **kwargs):
+        async with original_get_db(*args, **kwargs) as db:
+            await db.set_trace_callback(executed.append)
+            try:
+                yield db
+            finally:
+                await db.set_trace_callback(None)
+
+    monkeypatch.setattr(database, "get_db", traced_get_db)
+    return executed
+
+
+class TestUpsertCampaignKPIs:
+    """Tests for kpi_service.upsert_campaign_kpis"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("rebuild_rows", [1000, 1])
+    async def test_back_dated_batch_keeps_running_totals(
+        self, test_db, monkeypatch, statements, rebuild_rows
+    ):
+        """Unsorted, back-dated rows give the same totals through either path."""
+        monkeypatch.setattr(kpi_service, "KPI_CUMULATIVE_REBUILD_ROWS", rebuild_rows)
+        async with get_db(readonly=True) as db:
+            cursor = await db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+            )
+            triggers_before = [row["name"] for row in await cursor.fetchall()]
+        history_before = await cumulative_rows(1)
+
+        # Campaign 1 has a week of KPIs up to today
+        days = [f"2023-12-{day:02d}" for day in range(31, 0, -1)]
+        rows = [(n, 1, day, float(n)) for n, day in enumerate(days)]
+        # A repeated day: the later row wins
+        rows.append((len(rows), 1, "2023-12-15", 99.0))
+        # Campaign 2 only appends in the same batch
+        rows += [(len(rows) + n, 2, f"2099-01-{n + 1:02d}", 8.0) for n in range(3)]
+        statements.clear()
+        result = await kpi_service.upsert_campaign_kpis(rows)
+        assert result["upserted"] == len(rows)
+        assert any("DROP TRIGGER" in s for s in statements) == (rebuild_rows == 1)
+        maintained = {campaign_id: await cumulative_rows(campaign_id) for campaign_id in (1, 2)}
+
+        async with get_db() as db:
+            cursor = await db.execute(
+                "SELECT hours FROM campaign_kpi WHERE campaign_id = 1 AND date = '2023-12-15'"
+            )
+            assert (await cursor.fetchone())[0] == 99.0
+            cursor = await db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+            )
+            assert [row["name"] for row in await cursor.fetchall()] == triggers_before
+            await rebuild_cumulative(db)
+            await db.commit()
+        for campaign_id in (1, 2):
+            rebuilt = await cumulative_rows(campaign_id)
+            assert [row[::2] for row in maintained[campaign_id]] == [row[::2] for row in rebuilt]
+            assert [row[1] for row in maintained[campaign_id]] == pytest.approx(
+                [row[1] for row in rebuilt]
+            )
+        assert len(maintained[1]) == 31 + len(history_before)
+        assert maintained[1][-1][2] == 31 + len(history_before)
+        assert [row[2] for row in maintained[2]] == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_append_only_batch_keeps_triggers(self, test_db, monkeypatch, statements):
+        """Rows after each campaign's last day need no rebuild, however many."""
+        monkeypatch.setattr(kpi_service, "KPI_CUMULATIVE_REBUILD_ROWS", 1)
+        rows = [(n, 1, f"2099-01-{n + 1:02d}", 5.0) for n in range(10)]
+        await kpi_service.upsert_campaign_kpis(rows)
+        assert not [s for s in statements if "DROP TRIGGER" in s]
+        assert (await cumulative_rows(1))[-1][0] == "2099-01-10"
+
+    @pytest.mark.asyncio
+    async def test_rebuilds_from_earliest_written_day(self, test_db, monkeypatch, statements):
+        monkeypatch.setattr(kpi_service, "KPI_CUMULATIVE_REBUILD_ROWS", 1)
+        history = await cumulative_rows(1)
+        back_dated = history[-3][0]
+        await kpi_service.upsert_campaign_kpis([(0, 1, back_dated, 1.0)])
+        assert [s for s in statements if "DROP TRIGGER" in s]
+        deletes = [s for s in statements if s.startswith("DELETE FROM campaign_kpi_cumulative")]
+        assert deletes and all(f"date >= '{back_dated}'" in s for s in deletes)
+        rebuilt = await cumulative_rows(1)
+        # Days before the rewritten one are left alone, later ones carry on from them
+        assert rebuilt[:-3] == history[:-3]
+        assert rebuilt[-3][1] == pytest.approx(history[-4][1] + 1.0)
+        assert [row[2] for row in rebuilt] == [row[2] for row in history]
+
+    @pytest.mark.asyncio
+    async def test_writes_rows_in_date_order(self, test_db, statements):
+        """Back-dated rows are inserted oldest first, so no later day is shifted."""
+        rows = [(n, 1, f"2023-12-{day:02d}", 1.0) for n, day in enumerate((3, 1, 2))]
+        await kpi_service.upsert_campaign_kpis(rows)
+        # The trace repeats a statement for each trigger step it runs
+        days = [
+            s.split("'")[1] for s in statements
+            if s.lstrip().startswith("INSERT INTO campaign_kpi ")
+        ]
+        assert list(dict.fromkeys(days)) == ["2023-12-01", "2023-12-02", "2023-12-03"]
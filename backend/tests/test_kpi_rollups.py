@@ -0,0 +1,270 @@
+"""
+Tests for the tables derived from campaign_kpi by triggers.
+
+These tests check that rollup-backed week/month series and running-total
+range summaries match a direct aggregation over the daily rows, including
+after rows are updated or deleted.
+"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.database import get_db, rebuild_cumulative, rebuild_rollups
+from app.services.badge_tiers import DEFAULT_BADGE_LADDER
+from app.services.kpi_service import (
+    _average_hours,
+    _fetch_range_totals,
+    get_campaign_kpis,
+    get_kpi_summary,
+)
+
+PERIOD_EXPRESSIONS = {
+    "week": "date(date, 'weekday 0', '-6 days')",
+    "month": "date(date, 'start of month')",
+}
+
+
+async def seed_history(days: int = 200):
+    """Add a long, gappy history for campaign 2."""
+    rng = random.Random(42)
+    start = date(2024, 1, 1)
+    async with get_db() as db:
+        for offset in range(days):
+            if rng.random() < 0.2:
+                continue
+            await db.execute(
+                "INSERT INTO campaign_kpi (campaign_id, date, hours) VALUES (?, ?, ?)",
+                (2, (start + timedelta(days=offset)).isoformat(), round(rng.uniform(0, 300), 1)),
+            )
+        await db.commit()
+
+
+async def direct_series(campaign_id, start_date, end_date, group_by):
+    """Group daily rows on the fly, the way the service used to."""
+    expr = PERIOD_EXPRESSIONS[group_by]
+    async with get_db(readonly=True) as db:
+        cursor = await db.execute(
+            f"""
+            SELECT {expr} as period_date, SUM(hours) as total_hours,
+                   COUNT(DISTINCT date) as days_in_period
+            FROM campaign_kpi
+            WHERE campaign_id = ? AND date BETWEEN ? AND ?
+            GROUP BY {expr}
+            ORDER BY period_date
+            """,
+            (campaign_id, start_date.isoformat(), end_date.isoformat()),
+        )
+        return [
+            (row["period_date"], round(row["total_hours"], 1), row["days_in_period"])
+            for row in await cursor.fetchall()
+        ]
+
+
+def service_series(result):
+    return [(p["date"], p["hours"], p["days_in_period"]) for p in result["data"]]
+
+
+RANGES = [
+    (date(2024, 1, 1), date(2024, 7, 18)),   # aligned start, partial end
+    (date(2024, 1, 17), date(2024, 5, 31)),  # partial start, aligned month end
+    (date(2024, 2, 7), date(2024, 2, 9)),    # inside a single week
+    (date(2024, 3, 4), date(2024, 3, 10)),   # exactly one week
+    (date(2023, 12, 1), date(2024, 12, 31)), # wider than the data
+]
+
+
+class TestRollupSeries:
+    """Rollup-backed series should match direct aggregation."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("group_by", ["week", "month"])
+    @pytest.mark.parametrize("start_date,end_date", RANGES)
+    async def test_matches_direct_group_by(self, test_db, group_by, start_date, end_date):
+        await seed_history()
+        result = await get_campaign_kpis(2, start_date, end_date, group_by)
+        assert service_series(result) == await direct_series(2, start_date, end_date, group_by)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("group_by", ["week", "month"])
+    async def test_stays_in_sync_after_updates_and_deletes(self, test_db, group_by):
+        await seed_history()
+        async with get_db() as db:
+            await db.execute(
+                "UPDATE campaign_kpi SET hours = hours + 50 WHERE campaign_id = 2 AND date < '2024-03-01'"
+            )
+            await db.execute(
+                "UPDATE campaign_kpi SET date = date(date, '+1 year') WHERE campaign_id = 2 AND date LIKE '2024-04-%'"
+            )
+            await db.execute(
+                "DELETE FROM campaign_kpi WHERE campaign_id = 2 AND date BETWEEN '2024-05-10' AND '2024-06-20'"
+            )
+            await db.commit()
+
+        start_date, end_date = date(2024, 1, 1), date(2025, 6, 30)
+        expected = await direct_series(2, start_date, end_date, group_by)
+        result = await get_campaign_kpis(2, start_date, end_date, group_by)
+        assert service_series(result) == expected
+
+    @pytest.mark.asyncio
+    async def test_rebuild_matches_trigger_maintained_rollups(self, test_db):
+        await seed_history()
+        async with get_db() as db:
+            cursor = await db.execute("SELECT * FROM campaign_kpi_weekly ORDER BY 1, 2")
+            maintained = [tuple(row) for row in await cursor.fetchall()]
+            await rebuild_rollups(db)
+            cursor = await db.execute("SELECT * FROM campaign_kpi_weekly ORDER BY 1, 2")
+            rebuilt = [tuple(row) for row in await cursor.fetchall()]
+        assert maintained == rebuilt
+
+
+async def direct_totals(campaign_id, start_date, end_date):
+    async with get_db(readonly=True) as db:
+        cursor = await db.execute(
+            """
+            SELECT TOTAL(hours), COUNT(*) FROM campaign_kpi
+            WHERE campaign_id = ? AND date BETWEEN ? AND ?
+            """,
+            (campaign_id, start_date.isoformat(), end_date.isoformat()),
+        )
+        total_hours, total_days = await cursor.fetchone()
+    return round(total_hours, 1), total_days
+
+
+class TestRunningTotals:
+    """Range summaries from campaign_kpi_cumulative should match direct sums."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("start_date,end_date", RANGES)
+    async def test_matches_direct_sum(self, test_db, start_date, end_date):
+        await seed_history()
+        result = await get_kpi_summary(2, start_date, end_date)
+        total_hours, total_days = await direct_totals(2, start_date, end_date)
+        assert result["summary"]["total_hours"] == total_hours
+        assert result["summary"]["days_with_data"] == total_days
+
+    @pytest.mark.asyncio
+    async def test_random_ranges_match_plain_sum(self, test_db):
+        """Differences of running totals must not show their float error."""
+        await seed_history(days=400)
+        rng = random.Random(7)
+        first = date(2024, 1, 1)
+        for _ in range(400):
+            start_date = first + timedelta(days=rng.randrange(400))
+            end_date = start_date + timedelta(days=rng.randrange(400))
+            result = await get_kpi_summary(2, start_date, end_date)
+            async with get_db(readonly=True) as db:
+                cursor = await db.execute(
+                    "SELECT SUM(hours), COUNT(*) FROM campaign_kpi "
+                    "WHERE campaign_id = 2 AND date BETWEEN ? AND ?",
+                    (start_date.isoformat(), end_date.isoformat()),
+                )
+                total_hours, total_days = await cursor.fetchone()
+            total_hours = total_hours or 0.0
+            average = round(_average_hours(total_hours, total_days), 1)
+            assert result["summary"] == {
+                "total_hours": round(total_hours, 1),
+                "average_daily_hours": average,
+                "days_with_data": total_days,
+            }, (start_date, end_date)
+            assert result["average_badge"] == DEFAULT_BADGE_LADDER.badge(average)
+
+    @pytest.mark.asyncio
+    async def test_matches_series_summary(self, test_db):
+        await seed_history()
+        start_date, end_date = RANGES[0]
+        series = await get_campaign_kpis(2, start_date, end_date, "week")
+        summary = await get_kpi_summary(2, start_date, end_date)
+        assert summary["summary"] == series["summary"]
+
+    @pytest.mark.asyncio
+    async def test_stays_in_sync_after_updates_and_deletes(self, test_db):
+        await seed_history()
+        async with get_db() as db:
+            await db.execute(
+                "UPDATE campaign_kpi SET hours = hours + 50 WHERE campaign_id = 2 AND date < '2024-03-01'"
+            )
+            await db.execute(
+                "UPDATE campaign_kpi SET date = date(date, '+1 year') WHERE campaign_id = 2 AND date LIKE '2024-04-%'"
+            )
+            await db.execute(
+                "UPDATE campaign_kpi SET campaign_id = 1 WHERE campaign_id = 2 AND date LIKE '2024-02-1%'"
+            )
+            await db.execute(
+                "DELETE FROM campaign_kpi WHERE campaign_id = 2 AND date BETWEEN '2024-05-10' AND '2024-06-20'"
+            )
+            await db.execute(
+                """
+                INSERT INTO campaign_kpi (campaign_id, date, hours) VALUES (2, '2024-01-05', 7.5)
+                ON CONFLICT(campaign_id, date) DO UPDATE SET hours = excluded.hours
+                """
+            )
+            await db.commit()
+
+        for campaign_id in (1, 2):
+            for start_date, end_date in RANGES + [(date(2024, 1, 1), date(2025, 6, 30))]:
+                async with get_db(readonly=True) as db:
+                    row = await _fetch_range_totals(db, campaign_id, start_date, end_date)
+                expected = await direct_totals(campaign_id, start_date, end_date)
+                assert (round(row["total_hours"], 1), row["total_days"]) == expected
+
+    @pytest.mark.asyncio
+    async def test_rebuild_matches_trigger_maintained_totals(self, test_db):
+        await seed_history()
+        async with get_db() as db:
+            await db.execute("DELETE FROM campaign_kpi WHERE date LIKE '2024-03-%'")
+            cursor = await db.execute("SELECT * FROM campaign_kpi_cumulative ORDER BY 1, 2")
+            maintained = [tuple(row) for row in await cursor.fetchall()]
+            await rebuild_cumulative(db)
+            cursor = await db.execute("SELECT * FROM campaign_kpi_cumulative ORDER BY 1, 2")
+            rebuilt = [tuple(row) for row in await cursor.fetchall()]
+        assert [row[:2] + row[3:] for row in maintained] == [row[:2] + row[3:] for row in rebuilt]
+        assert [row[2] for row in maintained] == pytest.approx([row[2] for row in rebuilt])
+
+    @pytest.mark.asyncio
+    async def test_range_lookup_does_not_scan(self, test_db):
+        """Totals must come from index searches, never a scan of the range."""
+        async with get_db(readonly=True) as db:
+            cursor = await db.execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT cum_hours FROM campaign_kpi_cumulative
+                WHERE campaign_id = 2 AND date <= '2024-12-31'
+                ORDER BY date DESC LIMIT 1
+                """
+            )
+            plan = " ".join(row["detail"] for row in await cursor.fetchall())
+        assert "SEARCH" in plan and "SCAN" not in plan and "TEMP B-TREE" not in plan
+
+
+# Six days averaging exactly 60 hours (the bronze threshold); added up as
+# floats they come to 359.99999999999994, the rollups store 360.0
+BOUNDARY_WEEK = date(2026, 1, 5)
+BOUNDARY_HOURS = [67.1, 67.8, 53.2, 53.0, 56.7, 62.2]
+
+
+class TestThresholdBoundary:
+    """Badges at a tier threshold must not depend on how hours were summed."""
+
+    async def seed_boundary_week(self):
+        async with get_db() as db:
+            await db.executemany(
+                "INSERT INTO campaign_kpi (campaign_id, date, hours) VALUES (2, ?, ?)",
+                [
+                    ((BOUNDARY_WEEK + timedelta(days=offset)).isoformat(), hours)
+                    for offset, hours in enumerate(BOUNDARY_HOURS)
+                ],
+            )
+            await db.commit()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("group_by", ["week", "month"])
+    async def test_rollup_and_direct_sums_agree(self, test_db, group_by):
+        await self.seed_boundary_week()
+        assert sum(BOUNDARY_HOURS) != 360.0
+        start_date, end_date = date(2026, 1, 1), date(2026, 1, 31)
+        rollup = await get_campaign_kpis(2, start_date, end_date, group_by)
+        # A range ending mid-period is summed from the daily rows instead
+        direct = await get_campaign_kpis(2, start_date, date(2026, 1, 10), group_by)
+        assert [p["badge"] for p in rollup["data"]] == ["bronze"]
+        assert [p["badge"] for p in direct["data"]] == ["bronze"]
@@ -0,0 +1,165 @@
+"""
+Tests for the live KPI broadcaster and the SSE stream endpoint.
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.routers.kpis import stream_campaign_updates
+from app.services import KPIBroadcaster, kpi_broadcaster
+
+
+class FakeSource:
+    """Stand-in for get_daily_badge that counts how often it is called."""
+
+    def __init__(self):
+        self.calls = 0
+        self.badges = {1: {"date": "2025-01-01", "hours": 100.0, "badge": "bronze"}}
+
+    async def __call__(self, campaign_id):
+        self.calls += 1
+        badge = self.badges.get(campaign_id)
+        return dict(badge) if badge else None
+
+
+async def next_event(queue):
+    return await asyncio.wait_for(queue.get(), 1)
+
+
+class TestKPIBroadcaster:
+    """Unit tests for KPIBroadcaster."""
+
+    @pytest.mark.asyncio
+    async def test_viewers_share_one_computation(self):
+        source = FakeSource()
+        broadcaster = KPIBroadcaster(fetch=source, poll_interval=60)
+        queues = [await broadcaster.subscribe(1) for _ in range(100)]
+
+        assert source.calls == 1
+        for queue in queues:
+            assert await next_event(queue) == ("snapshot", source.badges[1])
+        assert broadcaster.stats()["subscribers"] == 100
+        await broadcaster.close()
+
+    @pytest.mark.asyncio
+    async def test_pushes_only_changed_fields(self):
+        source = FakeSource()
+        broadcaster = KPIBroadcaster(fetch=source, poll_interval=60)
+        first = await broadcaster.subscribe(1)
+        second = await broadcaster.subscribe(1)
+        await next_event(first)
+        await next_event(second)
+
+        source.badges[1]["hours"] = 130.0
+        source.badges[1]["badge"] = "silver"
+        broadcaster.notify(1)
+
+        expected = ("delta", {"date": "2025-01-01", "hours": 130.0, "badge": "silver"})
+        assert await next_event(first) == expected
+        assert await next_event(second) == expected
+        assert source.calls == 2
+        await broadcaster.close()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_data_sends_nothing(self):
+        source = FakeSource()
+        broadcaster = KPIBroadcaster(fetch=source, poll_interval=60)
+        queue = await broadcaster.subscribe(1)
+        await next_event(queue)
+
+        broadcaster.notify(1)
+        await asyncio.sleep(0.01)
+        assert source.calls == 2
+        assert queue.empty()
+        await broadcaster.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_campaign_returns_none(self):
+        broadcaster = KPIBroadcaster(fetch=FakeSource(), poll_interval=60)
+        assert await broadcaster.subscribe(9999) is None
+        assert broadcaster.stats()["campaigns"] == 0
+
+    @pytest.mark.asyncio
+    async def test_deleted_campaign_ends_stream(self):
+        source = FakeSource()
+        broadcaster = KPIBroadcaster(fetch=source, poll_interval=60)
+        queue = await broadcaster.subscribe(1)
+        await next_event(queue)
+
+        del source.badges[1]
+        broadcaster.notify(1)
+        assert await next_event(queue) == ("gone", None)
+        assert broadcaster.stats()["campaigns"] == 0
+
+    @pytest.mark.asyncio
+    async def test_last_viewer_leaving_stops_upstream(self):
+        source = FakeSource()
+        broadcaster = KPIBroadcaster(fetch=source, poll_interval=60)
+        first = await broadcaster.subscribe(1)
+        second = await broadcaster.subscribe(1)
+
+        await broadcaster.unsubscribe(1, first)
+        assert broadcaster.stats()["campaigns"] == 1
+        await broadcaster.unsubscribe(1, second)
+        assert broadcaster.stats()["campaigns"] == 0
+
+        broadcaster.notify(1)
+        await asyncio.sleep(0.01)
+        assert source.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_viewer_gets_fresh_snapshot(self):
+        source = FakeSource()
+        broadcaster = KPIBroadcaster(fetch=source, poll_interval=60, queue_size=2)
+        queue = await broadcaster.subscribe(1)
+
+        for hours in (110.0, 120.0, 130.0):
+            source.badges[1]["hours"] = hours
+            broadcaster.notify(1)
+            await asyncio.sleep(0.01)
+
+        # The backlog was replaced by a snapshot; later updates queue up as usual
+        event, payload = await next_event(queue)
+        assert (event, payload["hours"]) == ("snapshot", 120.0)
+        assert await next_event(queue) == ("delta", {"date": "2025-01-01", "hours": 130.0})
+        assert broadcaster.dropped == 2
+        await broadcaster.close()
+
+
+class TestStreamCampaignUpdates:
+    """Tests for GET /api/kpis/campaigns/{campaign_id}/stream"""
+
+    @pytest.mark.asyncio
+    async def test_returns_404_for_nonexistent_campaign(self, client):
+        response = await client.get("/api/kpis/campaigns/9999/stream")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_streams_snapshot_then_delta_after_write(
+        self, client, auth_headers, test_dates
+    ):
+        response = await stream_campaign_updates(1)
+        assert response.media_type == "text/event-stream"
+        events = response.body_iterator
+        try:
+            assert await anext(events) == "retry: 5000\n\n"
+            snapshot = await asyncio.wait_for(anext(events), 1)
+            assert snapshot.startswith("event: snapshot\n")
+            assert json.loads(snapshot.split("data: ", 1)[1])["badge"] == "silver"
+
+            await client.post(
+                "/api/kpis/bulk",
+                json=[{"campaign_id": 1, "date": test_dates["today"].isoformat(), "hours": 250}],
+                headers=auth_headers,
+            )
+            delta = await asyncio.wait_for(anext(events), 1)
+            assert delta.startswith("event: delta\n")
+            payload = json.loads(delta.split("data: ", 1)[1])
+            assert payload["hours"] == 250
+            assert payload["badge"] == "platinum"
+            assert "threshold" in payload
+        finally:
+            await events.aclose()
+
+        assert kpi_broadcaster.stats()["campaigns"] == 0
@@ -0,0 +1,93 @@
+"""
+Tests for request metrics and the /api/metrics endpoint.
+
+The metrics registry lives for the whole test session, so tests compare
+values before and after the requests they make.
+"""
+import pytest
+
+from app.services.metrics import Histogram, db_queries, db_query_seconds, http_requests
+
+CAMPAIGN_ROUTE = ("GET", "/api/campaigns/{campaign_id}")
+
+
+class TestHistogram:
+    """Tests for Histogram rendering"""
+
+    def test_renders_cumulative_buckets(self):
+        histogram = Histogram("latency_seconds", "Latency.", (0.1, 1.0), ("route",))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(("/a",), value)
+        lines = histogram.render()
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'latency_seconds_sum{route="/a"} 3.65' in lines
+        assert 'latency_seconds_count{route="/a"} 4' in lines
+
+    def test_escapes_label_values(self):
+        histogram = Histogram("h", "H.", (1,), ("route",))
+        histogram.observe(('say "hi"\n',), 0)
+        assert 'h_count{route="say \\"hi\\"\\n"} 1' in histogram.render()
+
+
+class TestRequestMetrics:
+    """Tests for MetricsMiddleware"""
+
+    @pytest.mark.asyncio
+    async def test_counts_requests_by_route_template(self, client):
+        labels = (*CAMPAIGN_ROUTE, 200)
+        before = http_requests.value(labels)
+        await client.get("/api/campaigns/1")
+        await client.get("/api/campaigns/2")
+        assert http_requests.value(labels) == before + 2
+
+        not_found = (*CAMPAIGN_ROUTE, 404)
+        before = http_requests.value(not_found)
+        await client.get("/api/campaigns/9999")
+        assert http_requests.value(not_found) == before + 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_paths_share_one_label(self, client):
+        labels = ("GET", "unmatched", 404)
+        before = http_requests.value(labels)
+        await client.get("/api/nothing/here/1")
+        await client.get("/api/nothing/here/2")
+        assert http_requests.value(labels) == before + 2
+
+    @pytest.mark.asyncio
+    async def test_records_db_queries(self, client):
+        count_before = db_queries.count(CAMPAIGN_ROUTE)
+        seconds_before = db_query_seconds.value(CAMPAIGN_ROUTE)
+        await client.get("/api/campaigns/1")
+        assert db_queries.count(CAMPAIGN_ROUTE) == count_before + 1
+        assert db_query_seconds.value(CAMPAIGN_ROUTE) > seconds_before
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /api/metrics"""
+
+    @pytest.mark.asyncio
+    async def test_exposition_format(self, client):
+        await client.get("/api/campaigns/1")
+        response = await client.get("/api/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in text
+        assert (
+            'http_requests_total{method="GET",route="/api/campaigns/{campaign_id}",status="200"}'
+            in text
+        )
+        assert 'http_response_size_bytes_count{method="GET",route="/api/campaigns/{campaign_id}"}' in text
+
+    @pytest.mark.asyncio
+    async def test_exports_cache_stats(self, client, test_dates):
+        params = {"start_date": test_dates["start_of_test_data"].isoformat()}
+        await client.get("/api/kpis/campaigns/1", params=params)
+        await client.get("/api/kpis/campaigns/1", params=params)
+        text = (await client.get("/api/metrics")).text
+        assert "# TYPE cache_hits_total counter" in text
+        for cache in ("kpi", "list_count", "token"):
+            assert f'cache_hit_ratio{{cache="{cache}"}}' in text
+        assert 'kpi_single_flight_total{outcome="coalesced"}' in text
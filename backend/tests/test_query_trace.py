@@ -0,0 +1,142 @@
+"""
+Tests for statement tracing in get_db and the /api/admin/queries endpoint.
+"""
+from collections import deque
+
+import aiosqlite
+import pytest
+
+from app.database import fingerprint_sql, get_db, query_tracer
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    monkeypatch.setattr(query_tracer, "enabled", True)
+    monkeypatch.setattr(query_tracer, "slow_ms", 10_000.0)
+    query_tracer.clear()
+    yield query_tracer
+    query_tracer.clear()
+
+
+class TestFingerprint:
+    """Tests for fingerprint_sql()"""
+
+    def test_replaces_literals_and_lists(self):
+        sql = """
+            SELECT * FROM campaign_kpi -- recent days
+            WHERE campaign_id IN (?, ?, ?) AND date >= '2024-01-01' AND hours > 2.5
+        """
+        assert fingerprint_sql(sql) == (
+            "SELECT * FROM campaign_kpi WHERE campaign_id IN (...) AND date >= ? AND hours > ?"
+        )
+
+    def test_keeps_identifiers(self):
+        assert fingerprint_sql("SELECT t2.x FROM t2 LIMIT 10") == "SELECT t2.x FROM t2 LIMIT ?"
+
+
+class TestQueryTracer:
+    """Tests for tracing statements run through get_db"""
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, test_db):
+        assert query_tracer.enabled is False
+        async with get_db() as db:
+            assert isinstance(db, aiosqlite.Connection)
+
+    @pytest.mark.asyncio
+    async def test_records_rows_and_duration(self, test_db, tracer):
+        async with get_db(readonly=True) as db:
+            cursor = await db.execute("SELECT id FROM campaign WHERE id = ?", (1,))
+            assert (await cursor.fetchone())["id"] == 1
+            cursor = await db.execute("SELECT id FROM agent")
+            agents = await cursor.fetchall()
+
+        first, second = tracer.entries
+        assert first["fingerprint"] == "SELECT id FROM campaign WHERE id = ?"
+        assert first["rows"] == 1
+        assert second["rows"] == len(agents) > 1
+        assert first["duration_ms"] > 0
+        assert not first["slow"] and first["plan"] is None
+
+    @pytest.mark.asyncio
+    async def test_explains_slow_statements(self, test_db, tracer):
+        tracer.slow_ms = 0.0
+        async with get_db(readonly=True) as db:
+            cursor = await db.execute(
+                "SELECT hours FROM campaign_kpi WHERE campaign_id = ? AND date >= ?",
+                (1, "2024-01-01"),
+            )
+            await cursor.fetchall()
+            cursor = await db.execute("SELECT COUNT(*) FROM agent WHERE email LIKE '%a%'")
+            await cursor.fetchone()
+
+        indexed, scan = tracer.entries
+        assert indexed["slow"] and "SEARCH" in " ".join(indexed["plan"])
+        assert "SCAN" in " ".join(scan["plan"])
+        assert tracer.slow == 2
+
+    @pytest.mark.asyncio
+    async def test_groups_repeated_statements(self, test_db, tracer):
+        async with get_db(readonly=True) as db:
+            for agent_id in range(1, 6):
+                cursor = await db.execute(
+                    f"SELECT campaign_id FROM campaign_agent WHERE agent_id = {agent_id}"
+                )
+                await cursor.fetchall()
+
+        [group] = tracer.fingerprints(list(tracer.entries))
+        assert group["fingerprint"] == "SELECT campaign_id FROM campaign_agent WHERE agent_id = ?"
+        assert group["calls"] == 5
+
+    @pytest.mark.asyncio
+    async def test_buffer_is_bounded(self, test_db, tracer, monkeypatch):
+        monkeypatch.setattr(tracer, "entries", deque(maxlen=3))
+        async with get_db(readonly=True) as db:
+            for _ in range(10):
+                await db.execute("SELECT 1")
+        assert len(tracer.entries) == 3
+
+
+class TestQueryTraceAPI:
+    """Tests for /api/admin/queries"""
+
+    @pytest.mark.asyncio
+    async def test_requires_admin(self, client):
+        assert (await client.get("/api/admin/queries")).status_code == 401
+        assert (await client.put("/api/admin/queries", json={"enabled": True})).status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_lists_traced_statements(self, client, auth_headers, tracer):
+        await client.get("/api/campaigns/1")
+        response = await client.get("/api/admin/queries", headers=auth_headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["enabled"] is True
+        assert body["entries"]
+        assert body["entries"][0]["at"] >= body["entries"][-1]["at"]
+        assert any("FROM campaign" in group["fingerprint"] for group in body["fingerprints"])
+
+        slow = await client.get(
+            "/api/admin/queries", params={"slow_only": True}, headers=auth_headers
+        )
+        assert slow.json()["entries"] == []
+
+    @pytest.mark.asyncio
+    async def test_update_and_clear(self, client, auth_headers, monkeypatch):
+        monkeypatch.setattr(query_tracer, "enabled", False)
+        monkeypatch.setattr(query_tracer, "slow_ms", query_tracer.slow_ms)
+        response = await client.put(
+            "/api/admin/queries",
+            json={"enabled": True, "slow_query_ms": 0},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["enabled"] is True
+        assert response.json()["slow_query_ms"] == 0
+
+        await client.get("/api/campaigns/1")
+        body = (await client.get("/api/admin/queries", headers=auth_headers)).json()
+        assert body["entries"] and all(entry["slow"] for entry in body["entries"])
+
+        response = await client.delete("/api/admin/queries", headers=auth_headers)
+        assert response.json()["entries"] == []
@@ -0,0 +1,287 @@
+"""
+Tests for the login throttle.
+
+Limiters are driven with a fake clock so refills are deterministic.
+"""
+import pytest
+from starlette.requests import Request
+
+from app.auth import jwt as auth_jwt
+from app.auth import rate_limit
+from app.auth.rate_limit import (
+    MemoryTokenBucketLimiter,
+    RateLimit,
+    SQLiteTokenBucketLimiter,
+    TokenBucketLimiter,
+    client_ip,
+    parse_proxies,
+)
+from app.database import get_db
+
+# 3 attempts at once, then one every 10 seconds
+LIMIT = RateLimit(burst=3, per_minute=6)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def take(limiter, times, key="k"):
+    return [await limiter.acquire(key, LIMIT) for _ in range(times)]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_limiter(request, test_db):
+    def make(clock, **kwargs):
+        if request.param == "memory":
+            return MemoryTokenBucketLimiter(clock=clock, **kwargs)
+        return SQLiteTokenBucketLimiter(clock=clock, **kwargs)
+
+    return make
+
+
+class TestTokenBucket:
+    """Both stores should implement the same bucket."""
+
+    @pytest.mark.asyncio
+    async def test_allows_burst_then_rejects(self, make_limiter):
+        clock = FakeClock()
+        limiter = make_limiter(clock)
+        waits = await take(limiter, 4)
+        assert waits[:3] == [0.0, 0.0, 0.0]
+        assert waits[3] == pytest.approx(10.0)
+
+    @pytest.mark.asyncio
+    async def test_refills_over_time(self, make_limiter):
+        clock = FakeClock()
+        limiter = make_limiter(clock)
+        await take(limiter, 3)
+        clock.now += 10
+        assert await take(limiter, 2) == [0.0, pytest.approx(10.0)]
+        clock.now += 30
+        assert await take(limiter, 3) == [0.0, 0.0, 0.0]
+
+    @pytest.mark.asyncio
+    async def test_rejections_do_not_use_tokens(self, make_limiter):
+        clock = FakeClock()
+        limiter = make_limiter(clock)
+        await take(limiter, 3)
+        for _ in range(20):
+            clock.now += 0.1
+            await limiter.acquire("k", LIMIT)
+        clock.now = 1010.0
+        assert await limiter.acquire("k", LIMIT) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self, make_limiter):
+        limiter = make_limiter(FakeClock())
+        await take(limiter, 3, key="a")
+        assert await limiter.acquire("b", LIMIT) == 0.0
+        assert await limiter.acquire("a", LIMIT) > 0
+
+
+class TestLimiterBase:
+    """Tests for the TokenBucketLimiter interface"""
+
+    def test_incomplete_backend_fails_at_instantiation(self):
+        class AcquireOnly(TokenBucketLimiter):
+            async def acquire(self, key, limit):
+                return 0.0
+
+        with pytest.raises(TypeError, match="reset"):
+            AcquireOnly()
+        with pytest.raises(TypeError):
+            TokenBucketLimiter()
+
+
+class TestMemoryLimiter:
+    """Tests for MemoryTokenBucketLimiter eviction"""
+
+    @pytest.mark.asyncio
+    async def test_sweeps_full_buckets(self):
+        clock = FakeClock()
+        limiter = MemoryTokenBucketLimiter(sweep_seconds=60, clock=clock)
+        await take(limiter, 3, key="busy")
+        await take(limiter, 1, key="idle")
+        assert len(limiter) == 2
+        clock.now += 60
+        await take(limiter, 1, key="new")
+        # "idle" refilled after 10s and "busy" after 30s
+        assert len(limiter) == 1
+
+    @pytest.mark.asyncio
+    async def test_bounds_keys(self):
+        limiter = MemoryTokenBucketLimiter(max_keys=10, clock=FakeClock())
+        for n in range(25):
+            await limiter.acquire(f"ip:{n}", LIMIT)
+        assert len(limiter) == 10
+        assert limiter.stats()["evictions"] == 15
+
+
+class TestSQLiteLimiter:
+    """Tests for SQLiteTokenBucketLimiter"""
+
+    @pytest.mark.asyncio
+    async def test_workers_share_buckets(self, test_db):
+        clock = FakeClock()
+        worker_a = SQLiteTokenBucketLimiter(clock=clock)
+        worker_b = SQLiteTokenBucketLimiter(clock=clock)
+        await take(worker_a, 2)
+        assert await worker_b.acquire("k", LIMIT) == 0.0
+        assert await worker_a.acquire("k", LIMIT) > 0
+
+    @pytest.mark.asyncio
+    async def test_sweeps_full_buckets(self, test_db):
+        clock = FakeClock()
+        limiter = SQLiteTokenBucketLimiter(sweep_seconds=60, clock=clock)
+        await take(limiter, 1, key="idle")
+        clock.now += 60
+        await take(limiter, 1, key="new")
+        async with get_db(readonly=True) as db:
+            cursor = await db.execute("SELECT key FROM rate_limit_bucket")
+            assert [row[0] for row in await cursor.fetchall()] == ["new"]
+
+
+def make_request(peer, headers=()):
+    return Request({
+        "type": "http",
+        "client": (peer, 4321),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+    })
+
+
+class TestClientIP:
+    """Tests for client_ip()"""
+
+    @pytest.fixture(autouse=True)
+    def trust_frontend(self, monkeypatch):
+        monkeypatch.setattr(rate_limit, "trusted_proxies", parse_proxies("10.0.0.5, 172.18.0.0/16"))
+
+    def test_ignores_header_from_untrusted_peer(self):
+        request = make_request("203.0.113.9", [("X-Forwarded-For", "198.51.100.1")])
+        assert client_ip(request) == "203.0.113.9"
+
+    def test_reads_header_from_trusted_proxy(self):
+        request = make_request("10.0.0.5", [("X-Forwarded-For", "198.51.100.1")])
+        assert client_ip(request) == "198.51.100.1"
+        assert client_ip(make_request("10.0.0.5")) == "10.0.0.5"
+
+    def test_takes_rightmost_untrusted_hop(self):
+        """Hops left of the first untrusted one could be made up by the client."""
+        request = make_request(
+            "10.0.0.5", [("X-Forwarded-For", "1.2.3.4, 198.51.100.1, 172.18.0.3")]
+        )
+        assert client_ip(request) == "198.51.100.1"
+
+    def test_malformed_header_falls_back_to_peer(self):
+        request = make_request("10.0.0.5", [("X-Forwarded-For", "not-an-ip")])
+        assert client_ip(request) == "10.0.0.5"
+
+    def test_configurable_header(self, monkeypatch):
+        monkeypatch.setattr(rate_limit, "FORWARDED_IP_HEADER", "X-Real-IP")
+        request = make_request(
+            "10.0.0.5", [("X-Real-IP", "198.51.100.1"), ("X-Forwarded-For", "1.2.3.4")]
+        )
+        assert client_ip(request) == "198.51.100.1"
+
+    def test_rejects_bad_proxy_list(self):
+        with pytest.raises(ValueError):
+            parse_proxies("10.0.0.5, frontend")
+
+
+class TestLoginThrottle:
+    """Tests for throttling POST /api/auth/login"""
+
+    @pytest.fixture
+    def verify_calls(self, monkeypatch):
+        calls = []
+        verify = auth_jwt.verify_password
+
+        def counting_verify(plain_password, hashed_password):
+            calls.append(plain_password)
+            return verify(plain_password, hashed_password)
+
+        monkeypatch.setattr(auth_jwt, "verify_password", counting_verify)
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_throttles_username_before_hashing(self, client, monkeypatch, verify_calls):
+        monkeypatch.setattr(rate_limit, "LOGIN_USERNAME_LIMIT", LIMIT)
+        for _ in range(3):
+            response = await client.post(
+                "/api/auth/login", data={"username": "admin", "password": "wrong"}
+            )
+            assert response.status_code == 401
+
+        response = await client.post(
+            "/api/auth/login", data={"username": "Admin ", "password": "admin123"}
+        )
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) == 10
+        assert len(verify_calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_throttles_ip_across_usernames(self, client, monkeypatch, verify_calls):
+        monkeypatch.setattr(rate_limit, "LOGIN_IP_LIMIT", LIMIT)
+        statuses = [
+            (
+                await client.post(
+                    "/api/auth/login", data={"username": f"user{n}", "password": "x"}
+                )
+            ).status_code
+            for n in range(4)
+        ]
+        assert statuses == [401, 401, 401, 429]
+
+    @pytest.mark.asyncio
+    async def test_throttles_forwarded_ips_separately(self, client, monkeypatch):
+        """Logins relayed by the frontend are throttled per caller, not per frontend."""
+        monkeypatch.setattr(rate_limit, "LOGIN_IP_LIMIT", LIMIT)
+        monkeypatch.setattr(rate_limit, "trusted_proxies", parse_proxies("127.0.0.1"))
+
+        async def attempt(n, caller):
+            response = await client.post(
+                "/api/auth/login",
+                data={"username": f"user{n}", "password": "x"},
+                headers={"X-Forwarded-For": caller},
+            )
+            return response.status_code
+
+        assert [await attempt(n, "198.51.100.1") for n in range(4)] == [401, 401, 401, 429]
+        assert await attempt(4, "198.51.100.2") == 401
+
+        # Made-up hops left of the one the proxy added share its bucket
+        spoofed = [
+            (
+                await client.post(
+                    "/api/auth/login",
+                    data={"username": f"spoof{n}", "password": "x"},
+                    headers={"X-Forwarded-For": f"203.0.113.{n}, 198.51.100.1"},
+                )
+            ).status_code
+            for n in range(3)
+        ]
+        assert spoofed == [429, 429, 429]
+
+        # The header is ignored when the peer isn't a trusted proxy
+        monkeypatch.setattr(rate_limit, "trusted_proxies", ())
+        statuses = [await attempt(n, f"198.51.100.{10 + n}") for n in range(5, 9)]
+        assert statuses == [401, 401, 401, 429]
+
+    @pytest.mark.asyncio
+    async def test_off_backend_allows_everything(self, client, monkeypatch):
+        monkeypatch.setattr(rate_limit, "login_limiter", rate_limit.create_limiter("off"))
+        monkeypatch.setattr(rate_limit, "LOGIN_USERNAME_LIMIT", LIMIT)
+        for _ in range(5):
+            response = await client.post(
+                "/api/auth/login", data={"username": "nobody", "password": "x"}
+            )
+            assert response.status_code == 401
+
+    def test_rejects_unknown_backend(self):
+        with pytest.raises(ValueError):
+            rate_limit.create_limiter("redis")
@@ -1,9 +1,9 @@
 'use client';
 
-import { useCallback, useMemo } from 'react';
+import { useCallback, useEffect, useMemo } from 'react';
 import { useSearchParams, useRouter } from 'next/navigation';
-import { useQuery } from '@tanstack/react-query';
-import { kpisApi, campaignsApi } from '@/lib/api';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { kpisApi, campaignsApi, type DailyBadgeResponse } from '@/lib/api';
 import { BadgeDisplay } from './BadgeDisplay';
 import { KPIChart } from './KPIChart';
 import { BadgeSummary } from './BadgeSummary';
@@ -35,6 +35,7 @@ function isValidDate(dateStr: string): boolean {
 export function CampaignDashboard({ campaignId }: CampaignDashboardProps) {
   const router = useRouter();
   const searchParams = useSearchParams();
+  const queryClient = useQueryClient();
 
   // Read state from URL with defaults
   const groupBy = (searchParams.get('groupBy') as GroupBy) || 'day';
@@ -94,30 +95,60 @@ export function CampaignDashboard({ campaignId }: CampaignDashboardProps) {
     queryFn: () => campaignsApi.get(campaignId),
   });
 
-  const { data: kpiData, isLoading: kpiLoading } = useQuery({
-    queryKey: ['kpis', campaignId, start, end, groupBy],
+  // Chart series, badge summary (always from daily data regardless of chart
+  // grouping) and today's badge come back together in one request
+  const { data: dashboard, isLoading: dashboardLoading } = useQuery({
+    queryKey: ['dashboard', campaignId, start, end, groupBy],
     queryFn: () =>
-      kpisApi.getCampaignKPIs(campaignId, {
+      kpisApi.getDashboard(campaignId, {
         start_date: start,
         end_date: end,
         group_by: groupBy,
       }),
   });
+  const kpiData = dashboard?.kpis;
+  const badgeSummary = dashboard?.badge_summary;
+  const kpiLoading = dashboardLoading;
+  const badgeSummaryLoading = dashboardLoading;
 
-  // Separate query for badge summary - always uses daily data regardless of chart grouping
-  const { data: badgeSummary, isLoading: badgeSummaryLoading } = useQuery({
-    queryKey: ['badge-summary', campaignId, start, end],
-    queryFn: () =>
-      kpisApi.getBadgeSummary(campaignId, {
-        start_date: start,
-        end_date: end,
-      }),
+  // Tier config only changes when the server's tier_version does, so it is
+  // keyed on that version and otherwise never refetched
+  const tierVersion = kpiData?.tier_version;
+  const { data: badgeTiers } = useQuery({
+    queryKey: ['badge-tiers', campaignId, tierVersion],
+    queryFn: () => kpisApi.getBadgeTiers(campaignId),
+    enabled: tierVersion !== undefined,
+    staleTime: Infinity,
   });
 
-  const { data: todayBadge } = useQuery({
+  // Filled in by the live stream below; until then use the dashboard's copy
+  const { data: liveBadge } = useQuery({
     queryKey: ['badge', campaignId, 'today'],
     queryFn: () => kpisApi.getDailyBadge(campaignId),
+    enabled: false,
   });
+  const todayBadge = liveBadge ?? dashboard?.badge;
+
+  // Live updates: patch today's badge in place and refetch the dashboard
+  // only when the server reports a change
+  useEffect(() => {
+    const source = new EventSource(kpisApi.streamUrl(campaignId));
+    const badgeKey = ['badge', campaignId, 'today'];
+
+    source.addEventListener('snapshot', (event) => {
+      queryClient.setQueryData<DailyBadgeResponse>(badgeKey, JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('delta', (event) => {
+      const delta = JSON.parse((event as MessageEvent).data) as Partial<DailyBadgeResponse>;
+      queryClient.setQueryData<DailyBadgeResponse>(badgeKey, (current) =>
+        current ? { ...current, ...delta } : undefined
+      );
+      queryClient.invalidateQueries({ queryKey: ['dashboard', campaignId] });
+    });
+    source.addEventListener('gone', () => source.close());
+
+    return () => source.close();
+  }, [campaignId, queryClient]);
 
   if (campaignLoading) {
     return (
@@ -317,6 +348,7 @@ export function CampaignDashboard({ campaignId }: CampaignDashboardProps) {
                 startDate={start}
                 endDate={end}
                 showEmptyDays={showEmptyDays}
+                thresholds={badgeTiers?.thresholds}
               />
             ) : (
               <div className="flex items-center justify-center h-96 bg-white rounded-xl shadow-sm border border-gray-100 text-gray-500">
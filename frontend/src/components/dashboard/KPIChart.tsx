@@ -11,7 +11,7 @@ import {
   ReferenceLine,
 } from 'recharts';
 import { KPIDataPoint } from '@/lib/api';
-import { BADGE_THRESHOLDS, badgeColors, BadgeKey } from '@/lib/badge-config';
+import { BADGE_THRESHOLDS, BadgeThresholds, badgeColors, BadgeKey } from '@/lib/badge-config';
 
 interface KPIChartProps {
   data: KPIDataPoint[];
@@ -19,6 +19,8 @@ interface KPIChartProps {
   startDate: string;
   endDate: string;
   showEmptyDays: boolean;
+  // Campaign's badge tiers; defaults until they are loaded
+  thresholds?: BadgeThresholds;
 }
 
 function formatDate(dateStr: string, groupBy: string): string {
@@ -122,7 +124,14 @@ function CustomTooltip({ active, payload, label, groupBy }: CustomTooltipProps)
   return null;
 }
 
-export function KPIChart({ data, groupBy, startDate, endDate, showEmptyDays }: KPIChartProps) {
+export function KPIChart({
+  data,
+  groupBy,
+  startDate,
+  endDate,
+  showEmptyDays,
+  thresholds = BADGE_THRESHOLDS,
+}: KPIChartProps) {
   // Fill in empty days if enabled and viewing daily grouping
   const processedData = groupBy === 'day' && showEmptyDays
     ? fillEmptyDays(data, startDate, endDate)
@@ -137,7 +146,7 @@ export function KPIChart({ data, groupBy, startDate, endDate, showEmptyDays }: K
 
   const maxAvgHours = Math.max(
     ...chartData.map((d) => d.avgDailyHours),
-    BADGE_THRESHOLDS.platinum + 20
+    thresholds.platinum + 20
   );
 
   return (
@@ -147,7 +156,7 @@ export function KPIChart({ data, groupBy, startDate, endDate, showEmptyDays }: K
           Average Daily Hours
         </h3>
         <div className="flex items-center gap-4 text-sm">
-          {Object.entries(BADGE_THRESHOLDS)
+          {Object.entries(thresholds)
             .reverse()
             .map(([badge, threshold]) => (
               <div key={badge} className="flex items-center gap-1">
@@ -194,25 +203,25 @@ export function KPIChart({ data, groupBy, startDate, endDate, showEmptyDays }: K
 
             {/* Badge threshold lines - always at daily values */}
             <ReferenceLine
-              y={BADGE_THRESHOLDS.platinum}
+              y={thresholds.platinum}
               stroke={badgeColors.platinum}
               strokeDasharray="5 5"
               strokeWidth={2}
             />
             <ReferenceLine
-              y={BADGE_THRESHOLDS.gold}
+              y={thresholds.gold}
               stroke={badgeColors.gold}
               strokeDasharray="5 5"
               strokeWidth={2}
             />
             <ReferenceLine
-              y={BADGE_THRESHOLDS.silver}
+              y={thresholds.silver}
               stroke={badgeColors.silver}
               strokeDasharray="5 5"
               strokeWidth={2}
             />
             <ReferenceLine
-              y={BADGE_THRESHOLDS.bronze}
+              y={thresholds.bronze}
               stroke={badgeColors.bronze}
               strokeDasharray="5 5"
               strokeWidth={2}
@@ -1,14 +1,32 @@
 'use server';
 
+import { headers } from 'next/headers';
 import { redirect } from 'next/navigation';
 import { authApi } from './api';
-import { createSession, deleteSession } from './session';
+import { createSession, deleteSession, getApiToken } from './session';
 
 export interface LoginState {
   error?: string;
   success?: boolean;
 }
 
+// Header an edge proxy in front of Next.js (e.g. nginx) sets to the address
+// it accepted the connection from, such as x-real-ip. Unset when browsers
+// reach Next.js directly: any header they send could be made up.
+const clientIpHeader = process.env.TRUSTED_CLIENT_IP_HEADER?.toLowerCase();
+
+// The IP of the browser calling this action, when a trusted proxy vouches for it
+async function getClientIp(): Promise<string | undefined> {
+  if (!clientIpHeader) {
+    return undefined;
+  }
+  const value = (await headers()).get(clientIpHeader);
+  // A proxy appending to x-forwarded-for adds its peer as the last hop;
+  // everything before it came from the client
+  const hop = value?.split(',').pop()?.trim();
+  return hop || undefined;
+}
+
 export async function login(
   _prevState: LoginState,
   formData: FormData
@@ -21,7 +39,7 @@ export async function login(
   }
 
   try {
-    const response = await authApi.login(username, password);
+    const response = await authApi.login(username, password, await getClientIp());
     await createSession(response.access_token, username, 'admin');
     
   } catch (error) {
@@ -33,6 +51,13 @@ export async function login(
 }
 
 export async function logout(): Promise<void> {
+  const token = await getApiToken();
+  if (token) {
+    // Revoke the API token server-side; the session goes away regardless
+    await authApi.logout(token).catch((error) => {
+      console.error('Logout error:', error);
+    });
+  }
   await deleteSession();
   redirect('/login');
 }
@@ -55,16 +55,23 @@ async function fetchApi<T>(endpoint: string, options: FetchOptions = {}): Promis
 
 // Auth API
 export const authApi = {
-  login: async (username: string, password: string) => {
+  login: async (username: string, password: string, clientIp?: string) => {
     const formData = new URLSearchParams();
     formData.append('username', username);
     formData.append('password', password);
 
+    const headers: HeadersInit = {
+      'Content-Type': 'application/x-www-form-urlencoded',
+    };
+    if (clientIp) {
+      // A single hop, so the backend (with this server in TRUSTED_PROXIES)
+      // throttles per user rather than per frontend server
+      (headers as Record<string, string>)['X-Forwarded-For'] = clientIp;
+    }
+
     const response = await fetch(`${API_BASE_URL}/api/auth/login`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/x-www-form-urlencoded',
-      },
+      headers,
       body: formData,
     });
 
@@ -81,6 +88,9 @@ export const authApi = {
   },
 
   me: (token: string) => fetchApi<{ username: string; role: string }>('/api/auth/me', { token }),
+
+  logout: (token: string) =>
+    fetchApi<{ message: string }>('/api/auth/logout', { method: 'POST', token }),
 };
 
 // Agents API
@@ -100,6 +110,7 @@ export interface AgentListResponse {
   page: number;
   limit: number;
   pages: number;
+  next_cursor?: string | null;
 }
 
 export interface CreateAgentInput {
@@ -189,6 +200,7 @@ export interface CampaignListResponse {
   page: number;
   limit: number;
   pages: number;
+  next_cursor?: string | null;
 }
 
 export interface CreateCampaignInput {
@@ -265,6 +277,13 @@ export interface KPIResponse {
     average_daily_hours: number;
     days_with_data: number;
   };
+  tier_version: number;
+}
+
+export interface KPIBatchResponse {
+  period: { start_date: string; end_date: string; group_by: string };
+  campaigns: Record<string, KPIResponse>;
+  not_found: number[];
 }
 
 export interface BadgeBreakdown {
@@ -283,6 +302,7 @@ export interface BadgeSummaryResponse {
   total_hours: number;
   average_daily_hours: number;
   average_badge: BadgeType;
+  tier_version: number;
 }
 
 export interface DailyBadgeResponse {
@@ -292,6 +312,21 @@ export interface DailyBadgeResponse {
   threshold: number;
   next_badge: BadgeType;
   hours_to_next: number;
+  tier_version: number;
+}
+
+export interface DashboardResponse {
+  kpis: KPIResponse;
+  badge: DailyBadgeResponse;
+  badge_summary: BadgeSummaryResponse;
+}
+
+export interface BadgeTiersResponse {
+  campaign_id: number;
+  thresholds: Record<'platinum' | 'gold' | 'silver' | 'bronze', number>;
+  // Matches tier_version on KPI and badge responses
+  version: number;
+  is_default: boolean;
 }
 
 export const kpisApi = {
@@ -308,6 +343,33 @@ export const kpisApi = {
     return fetchApi<KPIResponse>(`/api/kpis/campaigns/${campaignId}${query ? `?${query}` : ''}`);
   },
 
+  getCampaignsKPIs: (
+    campaignIds: number[] | 'all',
+    params?: { start_date?: string; end_date?: string; group_by?: 'day' | 'week' | 'month' }
+  ) => {
+    const searchParams = new URLSearchParams();
+    searchParams.set('ids', campaignIds === 'all' ? 'all' : campaignIds.join(','));
+    if (params?.start_date) searchParams.set('start_date', params.start_date);
+    if (params?.end_date) searchParams.set('end_date', params.end_date);
+    if (params?.group_by) searchParams.set('group_by', params.group_by);
+
+    return fetchApi<KPIBatchResponse>(`/api/kpis/campaigns?${searchParams.toString()}`);
+  },
+
+  // Series, badge summary and today's badge in one request
+  getDashboard: (
+    campaignId: number,
+    params?: { start_date?: string; end_date?: string; group_by?: 'day' | 'week' | 'month' }
+  ) => {
+    const searchParams = new URLSearchParams();
+    if (params?.start_date) searchParams.set('start_date', params.start_date);
+    if (params?.end_date) searchParams.set('end_date', params.end_date);
+    if (params?.group_by) searchParams.set('group_by', params.group_by);
+
+    const query = searchParams.toString();
+    return fetchApi<DashboardResponse>(`/api/kpis/campaigns/${campaignId}/dashboard${query ? `?${query}` : ''}`);
+  },
+
   getDailyBadge: (campaignId: number, date?: string) => {
     const searchParams = new URLSearchParams();
     if (date) searchParams.set('target_date', date);
@@ -316,6 +378,9 @@ export const kpisApi = {
     return fetchApi<DailyBadgeResponse>(`/api/kpis/campaigns/${campaignId}/badge${query ? `?${query}` : ''}`);
   },
 
+  // Server-Sent Events: `snapshot` (DailyBadgeResponse), then `delta` (changed fields only)
+  streamUrl: (campaignId: number) => `${API_BASE_URL}/api/kpis/campaigns/${campaignId}/stream`,
+
   getBadgeSummary: (
     campaignId: number,
     params?: { start_date?: string; end_date?: string }
@@ -327,6 +392,26 @@ export const kpisApi = {
     const query = searchParams.toString();
     return fetchApi<BadgeSummaryResponse>(`/api/kpis/campaigns/${campaignId}/badge-summary${query ? `?${query}` : ''}`);
   },
+
+  getBadgeTiers: (campaignId: number) =>
+    fetchApi<BadgeTiersResponse>(`/api/kpis/campaigns/${campaignId}/badge-tiers`),
+
+  updateBadgeTiers: (
+    token: string,
+    campaignId: number,
+    thresholds: BadgeTiersResponse['thresholds']
+  ) =>
+    fetchApi<BadgeTiersResponse>(`/api/kpis/campaigns/${campaignId}/badge-tiers`, {
+      method: 'PUT',
+      body: JSON.stringify(thresholds),
+      token,
+    }),
+
+  resetBadgeTiers: (token: string, campaignId: number) =>
+    fetchApi<BadgeTiersResponse>(`/api/kpis/campaigns/${campaignId}/badge-tiers`, {
+      method: 'DELETE',
+      token,
+    }),
 };
 
 export { ApiError };
@@ -1,7 +1,8 @@
 import { Trophy, Medal, Award, Star, Circle, Target } from 'lucide-react';
 import type { BadgeType } from './api';
 
-// Badge thresholds (hours per day)
+// Default badge thresholds (hours per day). Campaigns can override them; the
+// dashboard loads the effective tiers from /api/kpis/campaigns/{id}/badge-tiers
 export const BADGE_THRESHOLDS = {
   platinum: 240,
   gold: 180,
@@ -9,6 +10,8 @@ export const BADGE_THRESHOLDS = {
   bronze: 60,
 } as const;
 
+export type BadgeThresholds = Record<keyof typeof BADGE_THRESHOLDS, number>;
+
 // Badge colors using CSS variables for chart compatibility
 export const badgeColors = {
   platinum: 'var(--color-slate-100)',